@@ -84,6 +84,10 @@ CREATE TABLE IF NOT EXISTS users (
     CONSTRAINT user_check_email CHECK (email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$')
 );
 CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_users_created_at_id ON users(created_at DESC, id DESC);
+
+-- Retenção dos cliques brutos (NULL = padrão do servidor)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS analytics_retention_days INTEGER CHECK (analytics_retention_days > 0);
 
 
 -------------[USER SESSIONS TOKENS]--------------
@@ -107,6 +111,11 @@ CREATE TABLE IF NOT EXISTS user_session_tokens (
 CREATE INDEX IF NOT EXISTS idx_user_session_tokens_user ON user_session_tokens(user_id) WHERE revoked = FALSE;
 CREATE INDEX IF NOT EXISTS idx_user_session_tokens_expires ON user_session_tokens(expires_at) WHERE revoked = FALSE;
 
+-- Chave estável para paginação por cursor (o refresh_token não pode ir no cursor)
+ALTER TABLE user_session_tokens ADD COLUMN IF NOT EXISTS id BIGINT GENERATED ALWAYS AS IDENTITY;
+CREATE INDEX IF NOT EXISTS idx_user_session_tokens_issued ON user_session_tokens(issued_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_user_session_tokens_user_issued ON user_session_tokens(user_id, issued_at DESC, id DESC);
+
 
 -------------[USER LOGIN ATTEMPTS]--------------
 CREATE TABLE IF NOT EXISTS user_login_attempts (
@@ -158,6 +167,10 @@ CREATE INDEX IF NOT EXISTS idx_urls_original_url_hash ON urls(original_url_hash)
 CREATE INDEX IF NOT EXISTS idx_urls_created_at ON urls(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_urls_last_clicked_at ON urls(last_clicked_at DESC);
 CREATE INDEX IF NOT EXISTS idx_urls_domain_created ON urls(domain_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_urls_clicks ON urls(clicks DESC);
+
+-- Retenção dos cliques brutos (NULL = herda do dono da url ou do padrão do servidor)
+ALTER TABLE urls ADD COLUMN IF NOT EXISTS analytics_retention_days INTEGER CHECK (analytics_retention_days > 0);
 
 
 ------------------[USER URLS]-------------------
@@ -171,7 +184,22 @@ CREATE TABLE IF NOT EXISTS user_urls (
     FOREIGN KEY (user_id) REFERENCES users(id) ON UPDATE CASCADE ON DELETE CASCADE
 );
 CREATE INDEX IF NOT EXISTS idx_user_urls_user_favorite ON user_urls(user_id, is_favorite);
-CREATE INDEX IF NOT EXISTS idx_user_urls_url_id ON user_urls(url_id);
+
+-- Cursor usa (is_favorite, id): a coluna não pode ser NULL
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'user_urls' AND column_name = 'is_favorite' AND is_nullable = 'YES'
+    ) THEN
+        UPDATE user_urls SET is_favorite = FALSE WHERE is_favorite IS NULL;
+        ALTER TABLE user_urls ALTER COLUMN is_favorite SET NOT NULL;
+    END IF;
+END$$;
+CREATE INDEX IF NOT EXISTS idx_user_urls_user_favorite_id ON user_urls(user_id, is_favorite DESC, id DESC);
+-- Lookup LATERAL do dono mais recente de cada url (substitui idx_user_urls_url_id)
+CREATE INDEX IF NOT EXISTS idx_user_urls_url_id_id ON user_urls(url_id, id DESC);
+DROP INDEX IF EXISTS idx_user_urls_url_id;
 
 
 -------------------[URL TAGS]-------------------
@@ -189,8 +217,15 @@ CREATE TABLE IF NOT EXISTS url_tags (
     FOREIGN KEY (user_id) REFERENCES users(id) ON UPDATE CASCADE ON DELETE CASCADE
 );
 CREATE INDEX IF NOT EXISTS idx_url_tags_user ON url_tags(user_id);
+CREATE INDEX IF NOT EXISTS idx_url_tags_user_id ON url_tags(user_id, id);
 CREATE INDEX IF NOT EXISTS idx_url_tags_name_trgm ON url_tags  USING gin(name gin_trgm_ops);
 
+-- Busca por similaridade (pg_trgm): atende ILIKE '%x%', % e <%
+CREATE INDEX IF NOT EXISTS idx_urls_title_trgm ON urls USING gin(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_urls_descr_trgm ON urls USING gin(descr gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_urls_original_url_trgm ON urls USING gin(original_url gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_domains_url_trgm ON domains USING gin(url gin_trgm_ops);
+
 ------------------------------------------------
 ----          [URL TAG RELATIONS]           ----
 ------------------------------------------------
@@ -204,6 +239,41 @@ CREATE TABLE IF NOT EXISTS url_tag_relations (
 );
 CREATE INDEX IF NOT EXISTS idx_url_tag_relations_url ON url_tag_relations(url_id);
 CREATE INDEX IF NOT EXISTS idx_url_tag_relations_tag ON url_tag_relations(tag_id);
+CREATE INDEX IF NOT EXISTS idx_url_tag_relations_tag_url ON url_tag_relations(tag_id, url_id);
+
+------------------------------------------------
+----       [URL ANALYTICS DIMENSIONS]       ----
+------------------------------------------------
+-- Tabelas de lookup: url_analytics guarda apenas ids pequenos
+CREATE TABLE IF NOT EXISTS analytics_user_agents (
+    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL,
+    CONSTRAINT analytics_user_agents_unique_name UNIQUE (name)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_referers (
+    id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL,
+    CONSTRAINT analytics_referers_unique_name UNIQUE (name)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_browsers (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(50) NOT NULL,
+    CONSTRAINT analytics_browsers_unique_name UNIQUE (name)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_os (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(50) NOT NULL,
+    CONSTRAINT analytics_os_unique_name UNIQUE (name)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_device_types (
+    id SMALLINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name VARCHAR(20) NOT NULL,
+    CONSTRAINT analytics_device_types_unique_name UNIQUE (name)
+);
 
 ------------------------------------------------
 ----             [URL ANALYTICS]            ----
@@ -214,15 +284,76 @@ CREATE TABLE IF NOT EXISTS url_analytics (
     clicked_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
     ip_address INET,
     country_code CHAR(2),
+    device_type_id SMALLINT,
+    browser_id SMALLINT,
+    os_id SMALLINT,
+    user_agent_id INTEGER,
+    referer_id INTEGER,
     city TEXT,
-    user_agent TEXT,
-    referer TEXT,
-    device_type VARCHAR(20),
-    browser VARCHAR(50),
-    os VARCHAR(50),
     PRIMARY KEY (id, clicked_at),
-    FOREIGN KEY (url_id) REFERENCES urls(id) ON DELETE CASCADE ON UPDATE CASCADE
+    FOREIGN KEY (url_id) REFERENCES urls(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (device_type_id) REFERENCES analytics_device_types(id),
+    FOREIGN KEY (browser_id) REFERENCES analytics_browsers(id),
+    FOREIGN KEY (os_id) REFERENCES analytics_os(id),
+    FOREIGN KEY (user_agent_id) REFERENCES analytics_user_agents(id),
+    FOREIGN KEY (referer_id) REFERENCES analytics_referers(id)
 );
+
+-- Migra instalações antigas (dimensões em texto) para ids
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'url_analytics' AND column_name = 'user_agent'
+    ) THEN
+        DROP MATERIALIZED VIEW IF EXISTS mv_dashboard;
+
+        ALTER TABLE url_analytics
+            ADD COLUMN IF NOT EXISTS device_type_id SMALLINT REFERENCES analytics_device_types(id),
+            ADD COLUMN IF NOT EXISTS browser_id SMALLINT REFERENCES analytics_browsers(id),
+            ADD COLUMN IF NOT EXISTS os_id SMALLINT REFERENCES analytics_os(id),
+            ADD COLUMN IF NOT EXISTS user_agent_id INTEGER REFERENCES analytics_user_agents(id),
+            ADD COLUMN IF NOT EXISTS referer_id INTEGER REFERENCES analytics_referers(id);
+
+        INSERT INTO analytics_user_agents (name)
+        SELECT DISTINCT user_agent FROM url_analytics WHERE user_agent IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        INSERT INTO analytics_referers (name)
+        SELECT DISTINCT lower(substring(referer FROM '^[A-Za-z][A-Za-z0-9+.-]*://([^/:?#]+)'))
+        FROM url_analytics
+        WHERE substring(referer FROM '^[A-Za-z][A-Za-z0-9+.-]*://([^/:?#]+)') IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        INSERT INTO analytics_browsers (name)
+        SELECT DISTINCT browser FROM url_analytics WHERE browser IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        INSERT INTO analytics_os (name)
+        SELECT DISTINCT os FROM url_analytics WHERE os IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        INSERT INTO analytics_device_types (name)
+        SELECT DISTINCT device_type FROM url_analytics WHERE device_type IS NOT NULL
+        ON CONFLICT (name) DO NOTHING;
+
+        UPDATE url_analytics a
+        SET
+            user_agent_id = (SELECT id FROM analytics_user_agents WHERE name = a.user_agent),
+            referer_id = (SELECT id FROM analytics_referers WHERE name = lower(substring(a.referer FROM '^[A-Za-z][A-Za-z0-9+.-]*://([^/:?#]+)'))),
+            browser_id = (SELECT id FROM analytics_browsers WHERE name = a.browser),
+            os_id = (SELECT id FROM analytics_os WHERE name = a.os),
+            device_type_id = (SELECT id FROM analytics_device_types WHERE name = a.device_type);
+
+        ALTER TABLE url_analytics
+            DROP COLUMN user_agent,
+            DROP COLUMN referer,
+            DROP COLUMN device_type,
+            DROP COLUMN browser,
+            DROP COLUMN os;
+    END IF;
+END$$;
+
 CREATE INDEX IF NOT EXISTS idx_url_analytics_url_date_country ON url_analytics(
     url_id, 
     clicked_at DESC, 
@@ -230,13 +361,156 @@ CREATE INDEX IF NOT EXISTS idx_url_analytics_url_date_country ON url_analytics(
 ) WHERE country_code IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_url_analytics_device_stats ON url_analytics(
     url_id, 
-    device_type, 
-    browser
-) WHERE device_type IS NOT NULL;
+    device_type_id, 
+    browser_id
+) WHERE device_type_id IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_url_analytics_url_id ON url_analytics(url_id, clicked_at DESC);
 CREATE INDEX IF NOT EXISTS idx_url_analytics_date ON url_analytics(clicked_at DESC);
 CREATE INDEX IF NOT EXISTS idx_url_analytics_country ON url_analytics(country_code) WHERE country_code IS NOT NULL;
 
+-- Id da entrada no stream de cliques: uma reentrega ao worker não grava o clique de novo
+ALTER TABLE url_analytics ADD COLUMN IF NOT EXISTS stream_id TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_url_analytics_stream_id ON url_analytics(stream_id) WHERE stream_id IS NOT NULL;
+
+-- Visão com as dimensões resolvidas para leitura
+CREATE OR REPLACE VIEW v_url_analytics AS
+SELECT
+    a.id,
+    a.url_id,
+    a.clicked_at,
+    a.ip_address,
+    a.country_code,
+    a.city,
+    ua.name AS user_agent,
+    r.name AS referer,
+    dt.name AS device_type,
+    b.name AS browser,
+    o.name AS os
+FROM
+    url_analytics a
+LEFT JOIN analytics_user_agents ua ON ua.id = a.user_agent_id
+LEFT JOIN analytics_referers r ON r.id = a.referer_id
+LEFT JOIN analytics_device_types dt ON dt.id = a.device_type_id
+LEFT JOIN analytics_browsers b ON b.id = a.browser_id
+LEFT JOIN analytics_os o ON o.id = a.os_id;
+
+------------------------------------------------
+----          [URL ANALYTICS DAILY]         ----
+------------------------------------------------
+-- Cubo diário pré-agregado (mantido por trigger em url_analytics).
+-- Dimensões desconhecidas usam '--' / 0 para caberem na chave primária.
+-- Os cliques entram no cubo no INSERT, então o job de retenção pode apagar
+-- linhas antigas de url_analytics sem perder os totais.
+CREATE TABLE IF NOT EXISTS url_analytics_daily (
+    url_id BIGINT NOT NULL,
+    day DATE NOT NULL,
+    country_code CHAR(2) NOT NULL DEFAULT '--',
+    device_type_id SMALLINT NOT NULL DEFAULT 0,
+    browser_id SMALLINT NOT NULL DEFAULT 0,
+    os_id SMALLINT NOT NULL DEFAULT 0,
+    clicks BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (url_id, day, country_code, device_type_id, browser_id, os_id),
+    FOREIGN KEY (url_id) REFERENCES urls(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT chk_daily_clicks_non_negative CHECK (clicks >= 0)
+);
+CREATE INDEX IF NOT EXISTS idx_url_analytics_daily_day ON url_analytics_daily(day, url_id);
+
+-- Backfill para instalações que já possuem cliques
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM url_analytics_daily) THEN
+        INSERT INTO url_analytics_daily (
+            url_id,
+            day,
+            country_code,
+            device_type_id,
+            browser_id,
+            os_id,
+            clicks
+        )
+        SELECT
+            url_id,
+            (clicked_at AT TIME ZONE 'UTC')::date,
+            COALESCE(country_code, '--'),
+            COALESCE(device_type_id, 0),
+            COALESCE(browser_id, 0),
+            COALESCE(os_id, 0),
+            COUNT(*)
+        FROM
+            url_analytics
+        GROUP BY
+            1, 2, 3, 4, 5, 6;
+    END IF;
+END$$;
+
+------------------------------------------------
+----          [DASHBOARD COUNTERS]          ----
+------------------------------------------------
+-- Totais corridos do dashboard, mantidos por triggers nos caminhos de escrita
+-- (cliques, urls, usuários e sessões). Só o que é global de verdade (mediana,
+-- tops, visitantes únicos...) fica em mv_dashboard_global.
+-- Cada contador é dividido em slots (dashboard_counter_slot()): escritores concorrentes
+-- atualizam linhas diferentes em vez de se enfileirar no lock de uma só; a leitura soma os slots.
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    name TEXT NOT NULL,
+    slot SMALLINT NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, slot)
+);
+
+-- Buckets diários (UTC): new_users, new_urls, clicks
+CREATE TABLE IF NOT EXISTS dashboard_daily_counters (
+    name TEXT NOT NULL,
+    day DATE NOT NULL,
+    slot SMALLINT NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, day, slot)
+);
+
+-- Migra instalações com uma linha por contador (valores existentes ficam no slot 0)
+ALTER TABLE dashboard_counters ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+ALTER TABLE dashboard_daily_counters ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+DO $$
+BEGIN
+    IF (
+        SELECT array_length(conkey, 1) FROM pg_constraint
+        WHERE conrelid = 'dashboard_counters'::regclass AND contype = 'p'
+    ) = 1 THEN
+        ALTER TABLE dashboard_counters
+            DROP CONSTRAINT dashboard_counters_pkey,
+            ADD PRIMARY KEY (name, slot);
+    END IF;
+    IF (
+        SELECT array_length(conkey, 1) FROM pg_constraint
+        WHERE conrelid = 'dashboard_daily_counters'::regclass AND contype = 'p'
+    ) = 2 THEN
+        ALTER TABLE dashboard_daily_counters
+            DROP CONSTRAINT dashboard_daily_counters_pkey,
+            ADD PRIMARY KEY (name, day, slot);
+    END IF;
+END$$;
+
+-- Backfill a partir dos dados existentes
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM dashboard_counters) THEN
+        INSERT INTO dashboard_counters (name, value) VALUES
+            ('users', (SELECT COUNT(*) FROM users)),
+            ('urls', (SELECT COUNT(*) FROM urls)),
+            ('clicks', (SELECT COALESCE(SUM(clicks), 0) FROM urls)),
+            ('analytics_records', (SELECT COUNT(*) FROM url_analytics)),
+            ('sessions', (SELECT COUNT(*) FROM user_session_tokens)),
+            ('sessions_revoked', (SELECT COUNT(*) FROM user_session_tokens WHERE revoked));
+
+        INSERT INTO dashboard_daily_counters (name, day, value)
+        SELECT 'new_users', (created_at AT TIME ZONE 'UTC')::date, COUNT(*) FROM users GROUP BY 2
+        UNION ALL
+        SELECT 'new_urls', (created_at AT TIME ZONE 'UTC')::date, COUNT(*) FROM urls GROUP BY 2
+        UNION ALL
+        SELECT 'clicks', day, SUM(clicks) FROM url_analytics_daily GROUP BY 2;
+    END IF;
+END$$;
+
 ------------------------------------------------
 ----                 [LOGS]                 ----
 ------------------------------------------------
@@ -255,6 +529,7 @@ CREATE TABLE IF NOT EXISTS logs (
 );
 
 CREATE INDEX IF NOT EXISTS idx_logs_created_at ON logs(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_logs_created_at_id ON logs(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_logs_user ON logs(user_id) WHERE user_id IS NOT NULL;
 
@@ -314,6 +589,409 @@ EXECUTE FUNCTION auto_generate_short_code();
 ------------------------------------------------
 
 
+------------------[CLICK ROLLUP]----------------
+-- Agrega os cliques inseridos no cubo diário (uma vez por statement)
+CREATE OR REPLACE FUNCTION rollup_url_analytics_daily()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO url_analytics_daily (
+        url_id,
+        day,
+        country_code,
+        device_type_id,
+        browser_id,
+        os_id,
+        clicks
+    )
+    SELECT
+        url_id,
+        (clicked_at AT TIME ZONE 'UTC')::date,
+        COALESCE(country_code, '--'),
+        COALESCE(device_type_id, 0),
+        COALESCE(browser_id, 0),
+        COALESCE(os_id, 0),
+        COUNT(*)
+    FROM
+        new_rows
+    GROUP BY
+        1, 2, 3, 4, 5, 6
+    ON CONFLICT
+        (url_id, day, country_code, device_type_id, browser_id, os_id)
+    DO UPDATE SET
+        clicks = url_analytics_daily.clicks + EXCLUDED.clicks;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_rollup_url_analytics_daily
+AFTER INSERT ON url_analytics
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION rollup_url_analytics_daily();
+------------------------------------------------
+
+
+--------------[DASHBOARD COUNTERS]--------------
+-- Todos os triggers são por statement: o custo é proporcional às linhas alteradas
+-- Slot por conexão: cada backend escreve sempre na mesma das 16 linhas do contador
+CREATE OR REPLACE FUNCTION dashboard_counter_slot()
+RETURNS SMALLINT AS $$
+    SELECT (pg_backend_pid() % 16)::SMALLINT;
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION bump_dashboard_counter(p_name TEXT, p_delta BIGINT)
+RETURNS void AS $$
+BEGIN
+    IF p_delta <> 0 THEN
+        INSERT INTO dashboard_counters (name, slot, value)
+        VALUES (p_name, dashboard_counter_slot(), p_delta)
+        ON CONFLICT (name, slot) DO UPDATE SET
+            value = dashboard_counters.value + EXCLUDED.value;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- url_analytics
+CREATE OR REPLACE FUNCTION dashboard_url_analytics_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('analytics_records', (SELECT COUNT(*) FROM new_rows));
+
+    INSERT INTO dashboard_daily_counters (name, day, slot, value)
+    SELECT 'clicks', (clicked_at AT TIME ZONE 'UTC')::date, dashboard_counter_slot(), COUNT(*)
+    FROM new_rows
+    GROUP BY 2
+    ON CONFLICT (name, day, slot) DO UPDATE SET
+        value = dashboard_daily_counters.value + EXCLUDED.value;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_url_analytics_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Buckets diários são históricos: retenção não os altera
+    PERFORM bump_dashboard_counter('analytics_records', -(SELECT COUNT(*) FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_dashboard_url_analytics_insert
+AFTER INSERT ON url_analytics
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_url_analytics_inserted();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_url_analytics_delete
+AFTER DELETE ON url_analytics
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_url_analytics_deleted();
+
+-- urls
+CREATE OR REPLACE FUNCTION dashboard_urls_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('urls', (SELECT COUNT(*) FROM new_rows));
+    PERFORM bump_dashboard_counter('clicks', (SELECT COALESCE(SUM(clicks), 0) FROM new_rows));
+
+    INSERT INTO dashboard_daily_counters (name, day, slot, value)
+    SELECT 'new_urls', (created_at AT TIME ZONE 'UTC')::date, dashboard_counter_slot(), COUNT(*)
+    FROM new_rows
+    GROUP BY 2
+    ON CONFLICT (name, day, slot) DO UPDATE SET
+        value = dashboard_daily_counters.value + EXCLUDED.value;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_urls_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter(
+        'clicks',
+        (SELECT COALESCE(SUM(n.clicks - o.clicks), 0) FROM new_rows n JOIN old_rows o ON o.id = n.id)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_urls_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('urls', -(SELECT COUNT(*) FROM old_rows));
+    PERFORM bump_dashboard_counter('clicks', -(SELECT COALESCE(SUM(clicks), 0) FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_dashboard_urls_insert
+AFTER INSERT ON urls
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_urls_inserted();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_urls_update
+AFTER UPDATE ON urls
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_urls_updated();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_urls_delete
+AFTER DELETE ON urls
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_urls_deleted();
+
+-- users
+CREATE OR REPLACE FUNCTION dashboard_users_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('users', (SELECT COUNT(*) FROM new_rows));
+
+    INSERT INTO dashboard_daily_counters (name, day, slot, value)
+    SELECT 'new_users', (created_at AT TIME ZONE 'UTC')::date, dashboard_counter_slot(), COUNT(*)
+    FROM new_rows
+    GROUP BY 2
+    ON CONFLICT (name, day, slot) DO UPDATE SET
+        value = dashboard_daily_counters.value + EXCLUDED.value;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_users_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('users', -(SELECT COUNT(*) FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_dashboard_users_insert
+AFTER INSERT ON users
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_users_inserted();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_users_delete
+AFTER DELETE ON users
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_users_deleted();
+
+-- user_session_tokens
+CREATE OR REPLACE FUNCTION dashboard_sessions_inserted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('sessions', (SELECT COUNT(*) FROM new_rows));
+    PERFORM bump_dashboard_counter('sessions_revoked', (SELECT COUNT(*) FROM new_rows WHERE revoked));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_sessions_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter(
+        'sessions_revoked',
+        (SELECT COUNT(*) FROM new_rows WHERE revoked) - (SELECT COUNT(*) FROM old_rows WHERE revoked)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dashboard_sessions_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_dashboard_counter('sessions', -(SELECT COUNT(*) FROM old_rows));
+    PERFORM bump_dashboard_counter('sessions_revoked', -(SELECT COUNT(*) FROM old_rows WHERE revoked));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_dashboard_sessions_insert
+AFTER INSERT ON user_session_tokens
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_sessions_inserted();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_sessions_update
+AFTER UPDATE ON user_session_tokens
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_sessions_updated();
+
+CREATE OR REPLACE TRIGGER trg_dashboard_sessions_delete
+AFTER DELETE ON user_session_tokens
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION dashboard_sessions_deleted();
+------------------------------------------------
+
+
+-----------------[CHANGE FEED]------------------
+-- NOTIFY em cache_invalidation para os caches de cada worker (src/changefeed.py).
+-- Payload compacto '<entidade>:<chave>,<chave>'; acima do limite vira '<entidade>:*'
+CREATE OR REPLACE FUNCTION notify_cache_invalidation(p_entity TEXT, p_keys TEXT[])
+RETURNS void AS $$
+DECLARE
+    v_payload TEXT;
+BEGIN
+    IF cardinality(p_keys) = 0 THEN
+        RETURN;
+    END IF;
+
+    v_payload := p_entity || ':' || array_to_string(p_keys, ',');
+    IF cardinality(p_keys) > 500 OR octet_length(v_payload) > 7800 THEN
+        v_payload := p_entity || ':*';
+    END IF;
+    PERFORM pg_notify('cache_invalidation', v_payload);
+END;
+$$ LANGUAGE plpgsql;
+
+-- urls: chave = short_code
+CREATE OR REPLACE FUNCTION cache_urls_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_invalidation('url', ARRAY(SELECT short_code FROM old_rows LIMIT 501));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cache_urls_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Contagem de cliques não conta: só o que muda o redirect
+    PERFORM notify_cache_invalidation(
+        'url',
+        ARRAY(
+            SELECT o.short_code
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            WHERE n.short_code IS DISTINCT FROM o.short_code
+               OR n.original_url IS DISTINCT FROM o.original_url
+            LIMIT 501
+        )
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_cache_urls_update
+AFTER UPDATE ON urls
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_urls_updated();
+
+CREATE OR REPLACE TRIGGER trg_cache_urls_delete
+AFTER DELETE ON urls
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_urls_deleted();
+
+-- domains: chave = url do domínio
+CREATE OR REPLACE FUNCTION cache_domains_deleted()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_invalidation('domain', ARRAY(SELECT url FROM old_rows LIMIT 501));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cache_domains_updated()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_invalidation(
+        'domain',
+        ARRAY(
+            SELECT o.url
+            FROM old_rows o
+            JOIN new_rows n ON n.id = o.id
+            WHERE n.is_secure IS DISTINCT FROM o.is_secure
+               OR n.url IS DISTINCT FROM o.url
+            LIMIT 501
+        )
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_cache_domains_update
+AFTER UPDATE ON domains
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_domains_updated();
+
+CREATE OR REPLACE TRIGGER trg_cache_domains_delete
+AFTER DELETE ON domains
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_domains_deleted();
+
+-- user_urls: o redirect guarda o dono mais recente (user_id dos cliques).
+-- Cobre também a exclusão de usuários, que remove user_urls em cascata; urls removidas
+-- no mesmo statement já saem pelo trigger de urls
+CREATE OR REPLACE FUNCTION cache_user_urls_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_invalidation(
+        'url',
+        ARRAY(
+            SELECT DISTINCT u.short_code
+            FROM changed_rows c
+            JOIN urls u ON u.id = c.url_id
+            LIMIT 501
+        )
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_cache_user_urls_insert
+AFTER INSERT ON user_urls
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_user_urls_changed();
+
+CREATE OR REPLACE TRIGGER trg_cache_user_urls_delete
+AFTER DELETE ON user_urls
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_user_urls_changed();
+
+-- url_tags: chave = user_id (trie de autocomplete do dono)
+CREATE OR REPLACE FUNCTION cache_url_tags_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM notify_cache_invalidation('tag', ARRAY(SELECT DISTINCT user_id::TEXT FROM changed_rows LIMIT 501));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_cache_url_tags_insert
+AFTER INSERT ON url_tags
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_url_tags_changed();
+
+CREATE OR REPLACE TRIGGER trg_cache_url_tags_update
+AFTER UPDATE ON url_tags
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_url_tags_changed();
+
+CREATE OR REPLACE TRIGGER trg_cache_url_tags_delete
+AFTER DELETE ON url_tags
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION cache_url_tags_changed();
+
+-- Substituído pelos triggers de user_urls e url_tags
+DROP TRIGGER IF EXISTS trg_cache_users_delete ON users;
+DROP FUNCTION IF EXISTS cache_users_deleted();
+------------------------------------------------
+
+
 ----------------[LOGIN ATTEMPTS]----------------
 
 -- Cria um novo registro em user_login_attemps
@@ -347,32 +1025,26 @@ END$$;
 ------------------------------------------------
 
 -------------------[DASHBOARD]------------------
-CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dashboard AS
+-- Substituída por dashboard_counters + mv_dashboard_global
+DROP FUNCTION IF EXISTS refresh_dashboard_stats();
+DROP MATERIALIZED VIEW IF EXISTS mv_dashboard;
+
+-- Apenas as partes globais do dashboard (não incrementais).
+-- Totais e séries diárias vêm de dashboard_counters / dashboard_daily_counters.
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dashboard_global AS
 WITH 
--- Estatísticas de Usuários
+-- Usuários ativos (last_login_at muda sem gerar eventos contáveis)
 user_stats AS (
     SELECT
-        COUNT(*) as total_users,
-        COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '30 days') as new_users_30d,
-        COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '7 days') as new_users_7d,
         COUNT(*) FILTER (WHERE last_login_at >= NOW() - INTERVAL '30 days') as active_users_30d,
         COUNT(*) FILTER (WHERE last_login_at >= NOW() - INTERVAL '7 days') as active_users_7d,
         COUNT(*) FILTER (WHERE last_login_at >= NOW() - INTERVAL '1 day') as active_users_24h
     FROM users
 ),
 
--- Estatísticas de URLs
+-- Mediana de cliques por url
 url_stats AS (
     SELECT
-        COUNT(*) as total_urls,
-        COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '30 days') as new_urls_30d,
-        COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '7 days') as new_urls_7d,
-        COUNT(*) FILTER (WHERE created_at >= NOW() - INTERVAL '1 day') as new_urls_24h,
-        SUM(clicks) as total_clicks,
-        SUM(clicks) FILTER (WHERE last_clicked_at >= NOW() - INTERVAL '30 days') as clicks_30d,
-        SUM(clicks) FILTER (WHERE last_clicked_at >= NOW() - INTERVAL '7 days') as clicks_7d,
-        SUM(clicks) FILTER (WHERE last_clicked_at >= NOW() - INTERVAL '1 day') as clicks_24h,
-        AVG(clicks) as avg_clicks_per_url,
         PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY clicks) as median_clicks
     FROM urls
 ),
@@ -403,22 +1075,27 @@ top_urls AS (
     ) t
 ),
 
--- Estatísticas de Analytics
-analytics_stats AS (
+-- Visitantes únicos (dependem do IP: só existem nos cliques brutos retidos)
+visitor_stats AS (
     SELECT
-        COUNT(*) as total_analytics_records,
-        COUNT(*) FILTER (WHERE clicked_at >= NOW() - INTERVAL '30 days') as analytics_30d,
-        COUNT(*) FILTER (WHERE clicked_at >= NOW() - INTERVAL '7 days') as analytics_7d,
-        COUNT(*) FILTER (WHERE clicked_at >= NOW() - INTERVAL '1 day') as analytics_24h,
         COUNT(DISTINCT ip_address) as unique_visitors_all_time,
-        COUNT(DISTINCT ip_address) FILTER (WHERE clicked_at >= NOW() - INTERVAL '30 days') as unique_visitors_30d,
-        COUNT(DISTINCT country_code) FILTER (WHERE country_code IS NOT NULL) as countries_reached
+        COUNT(DISTINCT ip_address) FILTER (WHERE clicked_at >= NOW() - INTERVAL '30 days') as unique_visitors_30d
     FROM url_analytics
 ),
 
--- Top 10 países por cliques
+-- Top 10 países por cliques (cubo diário)
+country_stats AS (
+    SELECT
+        country_code,
+        SUM(clicks) as clicks
+    FROM url_analytics_daily
+    WHERE country_code <> '--'
+    GROUP BY country_code
+),
+
 top_countries AS (
     SELECT
+        (SELECT COUNT(*) FROM country_stats) as countries_reached,
         jsonb_agg(
             jsonb_build_object(
                 'country_code', country_code,
@@ -429,31 +1106,29 @@ top_countries AS (
     FROM (
         SELECT 
             country_code,
-            COUNT(*) as clicks,
-            SUM(COUNT(*)) OVER() as total_clicks
-        FROM url_analytics
-        WHERE country_code IS NOT NULL
-        GROUP BY country_code
+            clicks,
+            SUM(clicks) OVER() as total_clicks
+        FROM country_stats
         ORDER BY clicks DESC
         LIMIT 10
     ) t
 ),
 
--- Estatísticas de dispositivos
+-- Estatísticas de dispositivos (cubo diário, últimos 30 dias)
 device_stats AS (
     SELECT
         jsonb_build_object(
-            'mobile', COUNT(*) FILTER (WHERE device_type = 'mobile'),
-            'desktop', COUNT(*) FILTER (WHERE device_type = 'desktop'),
-            'tablet', COUNT(*) FILTER (WHERE device_type = 'tablet'),
-            'other', COUNT(*) FILTER (WHERE device_type NOT IN ('mobile', 'desktop', 'tablet') OR device_type IS NULL)
-        ) as device_breakdown,
-        COUNT(*) as total_with_device_info
-    FROM url_analytics
-    WHERE clicked_at >= NOW() - INTERVAL '30 days'
+            'mobile', COALESCE(SUM(d.clicks) FILTER (WHERE dt.name = 'mobile'), 0),
+            'desktop', COALESCE(SUM(d.clicks) FILTER (WHERE dt.name = 'desktop'), 0),
+            'tablet', COALESCE(SUM(d.clicks) FILTER (WHERE dt.name = 'tablet'), 0),
+            'other', COALESCE(SUM(d.clicks) FILTER (WHERE dt.name NOT IN ('mobile', 'desktop', 'tablet') OR dt.name IS NULL), 0)
+        ) as device_breakdown
+    FROM url_analytics_daily d
+    LEFT JOIN analytics_device_types dt ON dt.id = d.device_type_id
+    WHERE d.day >= CURRENT_DATE - INTERVAL '30 days'
 ),
 
--- Top 5 browsers
+-- Top 5 browsers (cubo diário, últimos 30 dias)
 browser_stats AS (
     SELECT
         jsonb_agg(
@@ -464,18 +1139,18 @@ browser_stats AS (
         ) as top_5_browsers
     FROM (
         SELECT 
-            COALESCE(browser, 'Unknown') as browser,
-            COUNT(*) as count
-        FROM url_analytics
-        WHERE clicked_at >= NOW() - INTERVAL '30 days'
-          AND browser IS NOT NULL
-        GROUP BY browser
+            b.name as browser,
+            SUM(d.clicks) as count
+        FROM url_analytics_daily d
+        JOIN analytics_browsers b ON b.id = d.browser_id
+        WHERE d.day >= CURRENT_DATE - INTERVAL '30 days'
+        GROUP BY b.name
         ORDER BY count DESC
         LIMIT 5
     ) t
 ),
 
--- Estatísticas de tags (COMPLETAMENTE CORRIGIDA)
+-- Estatísticas de tags
 tag_stats AS (
     WITH tag_usage AS (
         SELECT
@@ -516,7 +1191,7 @@ tag_stats AS (
         ) as top_10_tags
 ),
 
--- Domínios mais populares (CORRIGIDO)
+-- Domínios mais populares
 domain_stats AS (
     WITH domain_rankings AS (
         SELECT 
@@ -548,55 +1223,9 @@ domain_stats AS (
     INNER JOIN domains d ON dr.domain_id = d.id
 ),
 
--- Crescimento diário (últimos 30 dias)
-daily_growth AS (
-    SELECT
-        jsonb_agg(
-            jsonb_build_object(
-                'date', daily_data.date::date,
-                'new_urls', daily_data.new_urls,
-                'new_users', daily_data.new_users,
-                'clicks', daily_data.clicks
-            ) ORDER BY daily_data.date
-        ) as last_30_days
-    FROM (
-        SELECT 
-            d.date::date as date,
-            COALESCE(u.new_urls, 0) as new_urls,
-            COALESCE(us.new_users, 0) as new_users,
-            COALESCE(a.clicks, 0) as clicks
-        FROM generate_series(
-            CURRENT_DATE - INTERVAL '29 days',
-            CURRENT_DATE,
-            INTERVAL '1 day'
-        ) AS d(date)
-        LEFT JOIN (
-            SELECT DATE(created_at) as date, COUNT(*) as new_urls
-            FROM urls
-            WHERE created_at >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY DATE(created_at)
-        ) u ON d.date::date = u.date
-        LEFT JOIN (
-            SELECT DATE(created_at) as date, COUNT(*) as new_users
-            FROM users
-            WHERE created_at >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY DATE(created_at)
-        ) us ON d.date::date = us.date
-        LEFT JOIN (
-            SELECT DATE(clicked_at) as date, COUNT(*) as clicks
-            FROM url_analytics
-            WHERE clicked_at >= CURRENT_DATE - INTERVAL '30 days'
-            GROUP BY DATE(clicked_at)
-        ) a ON d.date::date = a.date
-    ) daily_data
-),
-
--- Estatísticas de sessões ativas
+-- Sessões: só o que depende do tempo (totais vêm dos contadores)
 session_stats AS (
     SELECT
-        COUNT(*) as total_sessions,
-        COUNT(*) FILTER (WHERE revoked = FALSE) as active_sessions,
-        COUNT(*) FILTER (WHERE revoked = TRUE) as revoked_sessions,
         COUNT(DISTINCT user_id) FILTER (WHERE revoked = FALSE) as users_with_active_sessions,
         COALESCE(AVG(EXTRACT(EPOCH FROM (last_used_at - issued_at))/3600), 0) as avg_session_duration_hours
     FROM user_session_tokens
@@ -619,45 +1248,13 @@ conversion_stats AS (
 -- Agregação final
 SELECT
     NOW() as last_updated,
-    
-    -- Usuários
-    jsonb_build_object(
-        'total', us.total_users,
-        'new_30d', us.new_users_30d,
-        'new_7d', us.new_users_7d,
-        'active_30d', us.active_users_30d,
-        'active_7d', us.active_users_7d,
-        'active_24h', us.active_users_24h
-    ) as users,
-    
-    -- URLs
-    jsonb_build_object(
-        'total', url.total_urls,
-        'new_30d', url.new_urls_30d,
-        'new_7d', url.new_urls_7d,
-        'new_24h', url.new_urls_24h,
-        'avg_clicks', ROUND(COALESCE(url.avg_clicks_per_url, 0)::numeric, 2),
-        'median_clicks', COALESCE(url.median_clicks, 0)
-    ) as urls,
-    
-    -- Cliques
-    jsonb_build_object(
-        'total', COALESCE(url.total_clicks, 0),
-        'last_30d', COALESCE(url.clicks_30d, 0),
-        'last_7d', COALESCE(url.clicks_7d, 0),
-        'last_24h', COALESCE(url.clicks_24h, 0)
-    ) as clicks,
-    
-    -- Analytics
-    jsonb_build_object(
-        'total_records', an.total_analytics_records,
-        'records_30d', an.analytics_30d,
-        'records_7d', an.analytics_7d,
-        'records_24h', an.analytics_24h,
-        'unique_visitors_all_time', an.unique_visitors_all_time,
-        'unique_visitors_30d', an.unique_visitors_30d,
-        'countries_reached', an.countries_reached
-    ) as analytics,
+    us.active_users_30d,
+    us.active_users_7d,
+    us.active_users_24h,
+    COALESCE(url.median_clicks, 0) as median_clicks,
+    vs.unique_visitors_all_time,
+    vs.unique_visitors_30d,
+    COALESCE(tc.countries_reached, 0) as countries_reached,
     
     -- Top URLs
     COALESCE(tu.top_10_urls, '[]'::jsonb) as top_urls,
@@ -687,17 +1284,9 @@ SELECT
         'top_domains', COALESCE(dm.top_10_domains, '[]'::jsonb)
     ) as domains,
     
-    -- Crescimento diário
-    COALESCE(dg.last_30_days, '[]'::jsonb) as daily_growth,
-    
     -- Sessões
-    jsonb_build_object(
-        'total', ss.total_sessions,
-        'active', ss.active_sessions,
-        'revoked', ss.revoked_sessions,
-        'users_with_sessions', ss.users_with_active_sessions,
-        'avg_duration_hours', ROUND(COALESCE(ss.avg_session_duration_hours, 0)::numeric, 2)
-    ) as sessions,
+    ss.users_with_active_sessions,
+    ROUND(COALESCE(ss.avg_session_duration_hours, 0)::numeric, 2) as avg_session_duration_hours,
     
     -- Conversão
     jsonb_build_object(
@@ -709,27 +1298,23 @@ SELECT
 
 FROM user_stats us
 CROSS JOIN url_stats url
-CROSS JOIN analytics_stats an
+CROSS JOIN visitor_stats vs
 CROSS JOIN top_urls tu
 CROSS JOIN top_countries tc
 CROSS JOIN device_stats ds
 CROSS JOIN browser_stats bs
 CROSS JOIN tag_stats ts
 CROSS JOIN domain_stats dm
-CROSS JOIN daily_growth dg
 CROSS JOIN session_stats ss
 CROSS JOIN conversion_stats cs;
 
 -- Índices para a materialized view
-CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_dashboard_last_updated ON mv_dashboard(last_updated);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_dashboard_global_last_updated ON mv_dashboard_global(last_updated);
 
 -- Função para refresh automático
-CREATE OR REPLACE FUNCTION refresh_dashboard_stats()
+CREATE OR REPLACE FUNCTION refresh_dashboard_global()
 RETURNS void AS $$
 BEGIN
-    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_dashboard;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_dashboard_global;
 END;
 $$ LANGUAGE plpgsql;
-
-
-SELECT refresh_dashboard_stats();
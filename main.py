@@ -6,10 +6,16 @@ from fastapi.staticfiles import StaticFiles
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.middleware.gzip import GZipMiddleware
 from src.constants import Constants
+from src.cache.config import CacheSettings
 from src.services import logs as log_service
-from src.db import db_init, db_close
+from src.services import analytics as analytics_service
+from src.services import dashboard as dashboard_service
+from src.db import db_init, db_close, DATABASE_URL
+from src.changefeed import ChangeFeed
+from src.http_client import http_init, http_close
 from src.perf.system_monitor import get_monitor
 from src.globals import Globals
+from src.versioning import NotModified
 from src import middleware
 from src.routes import shortener
 from src.routes import admin
@@ -22,6 +28,8 @@ from src.routes import domains_admin
 from src.routes import tags
 from src.routes import user
 from src.routes import dashboard
+from src.routes import analytics
+from src.routes import analytics_admin
 from src import util
 import time
 import contextlib
@@ -38,9 +46,29 @@ async def lifespan(app: FastAPI):
 
     # Database
     await db_init()
+
+    # Cliente HTTP compartilhado (keep-alive/HTTP2)
+    await http_init()
     
     # Redis
     await util.init_redis_cache()
+    Globals.near_cache.start()
+
+    # Invalidações vindas do Postgres (LISTEN/NOTIFY)
+    change_feed = ChangeFeed(DATABASE_URL)
+    change_feed.start()
+
+    # Retenção dos cliques brutos
+    retention_task = asyncio.create_task(analytics_service.periodic_retention())
+
+    # Dashboard
+    dashboard_task = asyncio.create_task(dashboard_service.periodic_refresh())
+
+    # Live click stream
+    Globals.click_broker.start()
+
+    # Manutenção do cache de respostas (estatísticas e sets de tags)
+    cache_task = asyncio.create_task(Globals.cache_service.periodic_maintenance())
 
     yield
     
@@ -49,11 +77,36 @@ async def lifespan(app: FastAPI):
     with contextlib.suppress(asyncio.CancelledError):
         await task
 
+    # Dashboard
+    dashboard_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await dashboard_task
+
+    # Retenção dos cliques brutos
+    retention_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await retention_task
+
+    # Live click stream
+    await Globals.click_broker.stop()
+
+    # Cache
+    cache_task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await cache_task
+    await Globals.cache_service.flush_stats()
+    await Globals.near_cache.stop()
+    await change_feed.stop()
+
+    # HTTP
+    await http_close()
+
     # Database
     await db_close()    
     
     # Redis
     await Globals.redis_client.aclose()
+    await Globals.redis_bytes_client.aclose()
 
     print(f"[Shutting down {Constants.API_NAME}]")
 
@@ -88,8 +141,10 @@ app.include_router(urls_admin.router, prefix="/admin", tags=["admin_urls"])
 app.include_router(logs_admin.router, prefix="/admin", tags=["admin_logs"])
 app.include_router(time_perf_admin.router, prefix="/admin", tags=["admin_time_perf"])
 app.include_router(domains_admin.router, prefix="/admin", tags=["admin_domains"])
+app.include_router(analytics_admin.router, prefix="/admin", tags=["admin_analytics"])
 app.include_router(tags.router, prefix="/user/tags", tags=["tags"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 app.include_router(user.router, prefix="/user", tags=["user"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 
@@ -108,6 +163,11 @@ if Constants.IS_PRODUCTION:
     )
     
 
+# Registrado antes do GZip: fica por dentro dele e guarda o corpo sem compressão
+if CacheSettings.ENABLE_CACHE:
+    app.middleware("http")(Globals.cache_service.cache_middleware)
+
+
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 
@@ -185,6 +245,11 @@ async def http_middleware(request: Request, call_next):
     response.headers["X-RateLimit-Limit"] = str(Constants.MAX_REQUESTS)
     response.headers["X-RateLimit-Remaining"] = str(remaining)
     response.headers["X-RateLimit-Reset"] = str(ttl)
+
+    # ETag calculado pela dependência de versão (src/versioning.py)
+    etag = getattr(request.state, "etag", None)
+    if etag and response.status_code == status.HTTP_200_OK:
+        response.headers["ETag"] = etag
         
     middleware.add_security_headers(request, response)
     response_time_ms = (time.perf_counter() - start_time) * 1000
@@ -207,6 +272,11 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     )
 
 
+@app.exception_handler(NotModified)
+async def not_modified_handler(request: Request, exc: NotModified):
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": exc.etag})
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return await log_service.log_and_build_response(
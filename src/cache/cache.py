@@ -1,74 +1,233 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Iterable
+from collections import OrderedDict, Counter
 from fastapi import Request
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import Response
 from src.cache.config import CacheSettings
+from src.cache.serialized import accepts_gzip, etag_matches
+from urllib.parse import urlencode
 import redis.asyncio as redis
-import json
+import orjson
+import struct
+import gzip
+import zlib
 import hashlib
 import time
 import asyncio
+import re
+
+
+class CachedEntry:
+    """Resposta cacheada: corpo já serializado + janela de frescor e de stale-while-revalidate."""
+
+    # Envelope binário: magic, versão, flags, status, fresh_until, stale_until, tamanho dos headers
+    # seguido dos headers (orjson) e do corpo. Acima de CacheSettings.COMPRESS_MIN_SIZE só a variante
+    # gzip vai para o Redis; o corpo sem compressão é reconstruído na leitura.
+    HEADER = struct.Struct(">2sBBHddI")
+    MAGIC = b"RC"
+    VERSION = 2
+    FLAG_GZIP = 0x01
+
+    __slots__ = ("body", "gzip_body", "status_code", "headers", "media_type", "fresh_until", "stale_until")
+
+    def __init__(
+        self,
+        body: bytes,
+        gzip_body: Optional[bytes],
+        status_code: int,
+        headers: Dict[str, str],
+        media_type: Optional[str],
+        fresh_until: float,
+        stale_until: float
+    ):
+        self.body = body
+        self.gzip_body = gzip_body
+        self.status_code = status_code
+        self.headers = headers
+        self.media_type = media_type
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    @classmethod
+    def from_response(cls, body: bytes, response: Response, ttl: int, etag: Optional[str] = None) -> "CachedEntry":
+        now = time.time()
+        headers = {
+            key: value
+            for key, value in response.headers.items()
+            if key.lower() not in CacheSettings.SENSITIVE_HEADERS and key.lower() != "content-length"
+        }
+        # O ETag de versão da rota (request.state.etag) é o único validador; sem ele, um hash do corpo
+        if etag:
+            headers["etag"] = etag
+        else:
+            headers.setdefault("etag", f'"{hashlib.sha1(body).hexdigest()[:16]}"')
+        # Comprime uma única vez, no miss; os hits servem a variante pronta
+        gzip_body: Optional[bytes] = None
+        if len(body) >= CacheSettings.COMPRESS_MIN_SIZE:
+            compressed = gzip.compress(body, compresslevel=CacheSettings.COMPRESS_LEVEL)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+        return cls(
+            body,
+            gzip_body,
+            response.status_code,
+            headers,
+            response.headers.get("content-type"),
+            now + ttl,
+            now + ttl + CacheSettings.STALE_TTL
+        )
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.fresh_until
+
+    def is_usable(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.stale_until
+
+    def to_response(self, cache_status: str, request: Request) -> Response:
+        etag = self.headers.get("etag")
+        if etag and etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "X-Cache": cache_status})
+        if self.gzip_body is not None and accepts_gzip(request):
+            # Content-Encoding já definido: o GZipMiddleware repassa sem recomprimir
+            response = Response(content=self.gzip_body, status_code=self.status_code, headers=self.headers)
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Vary"] = "Accept-Encoding"
+        else:
+            response = Response(content=self.body, status_code=self.status_code, headers=self.headers)
+        response.headers["X-Cache"] = cache_status
+        return response
+
+    def to_redis(self) -> bytes:
+        flags = 0
+        body = self.body
+        if self.gzip_body is not None:
+            body = self.gzip_body
+            flags |= self.FLAG_GZIP
+
+        meta = orjson.dumps(self.headers)
+        header = self.HEADER.pack(
+            self.MAGIC,
+            self.VERSION,
+            flags,
+            self.status_code,
+            self.fresh_until,
+            self.stale_until,
+            len(meta)
+        )
+        return b"".join((header, meta, body))
+
+    @classmethod
+    def from_redis(cls, data: bytes) -> "CachedEntry":
+        magic, version, flags, status_code, fresh_until, stale_until, meta_size = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise ValueError("Unknown cache entry format")
+
+        offset = cls.HEADER.size
+        headers: Dict[str, str] = orjson.loads(data[offset:offset + meta_size])
+        body = data[offset + meta_size:]
+        gzip_body: Optional[bytes] = None
+        if flags & cls.FLAG_GZIP:
+            gzip_body, body = body, gzip.decompress(body)
+        return cls(body, gzip_body, status_code, headers, headers.get("content-type"), fresh_until, stale_until)
 
 
 class RedisCache:
+    """Cache de respostas em dois níveis: L1 em memória (por processo) na frente do Redis (compartilhado)."""
 
     def __init__(self, redis_client: redis.Redis):
         self.redis_client = redis_client
-        
+        self.__local: OrderedDict[str, tuple[float, CachedEntry]] = OrderedDict()
+        self.__flights: dict[str, asyncio.Future] = {}
+        self.__routes = [
+            (name, re.compile(pattern), ttl) for name, (pattern, ttl) in CacheSettings.CACHEABLE_ROUTES.items()
+        ]
+        # Contadores deste processo ainda não enviados ao hash de estatísticas no Redis
+        self.__pending_stats: Counter[str] = Counter()
+
+    @staticmethod
+    def route_tag(route: str) -> str:
+        return f"route:{route}"
+
+    @staticmethod
+    def param_tag(name: str, value: Any) -> str:
+        return f"{name}:{value}"
+
+    def tag_key(self, tag: str) -> str:
+        return f"{CacheSettings.CACHE_PREFIX}tag:{tag}"
+
+    @property
+    def stats_key(self) -> str:
+        return f"{CacheSettings.CACHE_PREFIX}stats"
+
     def generate_cache_key(self, request: Request) -> str:
-        """Gera uma chave única para o cache baseada na URL e query parameters."""
+        """Gera a chave do cache a partir da rota e da query normalizada (ordenada, sem parâmetros vazios)."""
         url_path = str(request.url.path)
-        query_params = str(request.url.query)
-        
-        # Incluir alguns headers relevantes para diferenciação
-        headers_to_include = ["authorization", "accept-language", "user-agent"]
-        header_values = []
-        for header in headers_to_include:
-            if header in request.headers:
-                # Limitar tamanho do header para evitar chaves muito longas
-                header_value = request.headers[header][:50]
-                header_values.append(f"{header}:{header_value}")
-        
-        # Criar string única
-        cache_string = f"{url_path}?{query_params}|{','.join(header_values)}"
-        
+        query_params = urlencode(sorted((k, v) for k, v in request.query_params.multi_items() if v != ""))
+        cache_string = f"{url_path}?{query_params}" if query_params else url_path
+
         # Hash para evitar chaves muito longas
         if len(cache_string) > CacheSettings.MAX_KEY_LENGTH:
             cache_hash = hashlib.md5(cache_string.encode()).hexdigest()
             return f"{CacheSettings.CACHE_PREFIX}{cache_hash}"
-        
+
         return f"{CacheSettings.CACHE_PREFIX}{cache_string.replace(' ', '_').replace('/', ':')}"
 
-    def get_cache_ttl(self, request: Request) -> int:
-        """Determina o TTL baseado na rota."""
+    def get_cache_policy(self, request: Request) -> Optional[tuple[int, List[str]]]:
+        """TTL e tags da rota, ou None se a rota não está na allowlist de cache."""
         path = request.url.path
-        
-        # Verifica TTL específico para a rota
-        for route_prefix, ttl in CacheSettings.ROUTE_TTL.items():
-            if path.startswith(route_prefix):
-                return ttl
-        
-        return CacheSettings.DEFAULT_TTL
-
-    async def get_cached_response(self, cache_key: str) -> Optional[JSONResponse]:
-        """Recupera resposta do cache."""
+        for name, pattern, ttl in self.__routes:
+            match = pattern.match(path)
+            if match:
+                tags = [self.route_tag(name)] + [self.param_tag(k, v) for k, v in match.groupdict().items()]
+                return max(CacheSettings.MIN_TTL, min(ttl, CacheSettings.MAX_TTL)), tags
+        return None
+
+    ########################## L1 ##########################
+
+    def __get_local(self, cache_key: str, now: float) -> Optional[CachedEntry]:
+        item = self.__local.get(cache_key)
+        if item is None:
+            return None
+        local_expires_at, entry = item
+        if local_expires_at <= now:
+            del self.__local[cache_key]
+            return None
+        self.__local.move_to_end(cache_key)
+        return entry
+
+    def __set_local(self, cache_key: str, entry: CachedEntry) -> None:
+        # L1 curto: limita a defasagem entre workers após uma invalidação
+        local_expires_at = min(time.time() + CacheSettings.L1_TTL, entry.stale_until)
+        self.__local[cache_key] = (local_expires_at, entry)
+        self.__local.move_to_end(cache_key)
+        if len(self.__local) > CacheSettings.L1_MAX_ENTRIES:
+            self.__local.popitem(last=False)
+
+    def __drop_local(self, pattern: str = "") -> int:
+        keys = [key for key in self.__local if pattern in key]
+        for key in keys:
+            del self.__local[key]
+        return len(keys)
+
+    def __drop_local_keys(self, keys: Iterable[str | bytes]) -> None:
+        for key in keys:
+            self.__local.pop(key.decode() if isinstance(key, bytes) else key, None)
+
+    def invalidate_local(self, *patterns: str) -> int:
+        """Remove entradas só do L1 deste processo (sem padrões: limpa tudo)."""
+        if not patterns:
+            return self.__drop_local()
+        return sum(self.__drop_local(pattern) for pattern in patterns)
+
+    ########################## L2 (Redis) ##########################
+
+    async def get_cached_response(self, cache_key: str) -> Optional[CachedEntry]:
+        """Recupera a entrada do Redis (fresca ou ainda dentro da janela stale)."""
         try:
             cached_data = await self.redis_client.get(cache_key)
             if cached_data:
-                data = json.loads(cached_data)
-                
-                # Verificar se o cache não expirou manualmente
-                cached_at = data.get("cached_at", 0)
-                if time.time() - cached_at > CacheSettings.DEFAULT_TTL * 2:  # Dupla verificação
-                    await self.redis_client.delete(cache_key)
-                    return None
-                
-                return JSONResponse(
-                    content=data["content"],
-                    status_code=data["status_code"],
-                    headers=data.get("headers", {}),
-                    media_type=data.get("media_type", "application/json")
-                )
-        except (json.JSONDecodeError, KeyError, redis.RedisError) as e:
+                entry = CachedEntry.from_redis(cached_data)
+                return entry if entry.is_usable() else None
+        except (struct.error, gzip.BadGzipFile, zlib.error, EOFError, orjson.JSONDecodeError, ValueError, redis.RedisError) as e:
             print(f"Error retrieving cache: {e}")
             # Remover cache corrompido
             try:
@@ -77,191 +236,290 @@ class RedisCache:
                 pass
         return None
 
-    async def set_cached_response(self, cache_key: str, response: Response, ttl: int):
-        """Armazena resposta no cache."""
+    async def set_cached_response(self, cache_key: str, entry: CachedEntry, ttl: int, tags: List[str]):
+        """Armazena a entrada no Redis e a registra nos sets das suas tags."""
+        # A chave vive além do TTL para servir stale durante o refresh
+        expire = ttl + CacheSettings.STALE_TTL
+        self.__pending_stats["sets"] += 1
         try:
-            # Só cachear respostas de sucesso
-            if response.status_code < 200 or response.status_code >= 300:
-                return
-            
-            # Verificar tamanho da resposta (não cachear respostas muito grandes)
-            response_body = None
-            if hasattr(response, 'body') and response.body:
-                if isinstance(response.body, bytes):
-                    if len(response.body) > 1024 * 1024:  # 1MB limite
-                        return
-                    response_body = response.body.decode('utf-8')
-                else:
-                    response_body = str(response.body)
-                    if len(response_body) > 1024 * 1024:  # 1MB limite
-                        return
-            elif hasattr(response, 'content') and response.content:
-                response_body = response.content
-                if len(str(response_body)) > 1024 * 1024:  # 1MB limite
-                    return
-            
-            if response_body:
-                try:
-                    # Tentar parsear como JSON
-                    if isinstance(response_body, str):
-                        try:
-                            content = json.loads(response_body)
-                        except json.JSONDecodeError:
-                            content = response_body
-                    else:
-                        content = response_body
-                        
-                    # Filtrar headers sensíveis
-                    safe_headers = {}
-                    sensitive_headers = ['set-cookie', 'authorization', 'x-api-key']
-                    for key, value in dict(response.headers).items():
-                        if key.lower() not in sensitive_headers:
-                            safe_headers[key] = value
-                            
-                    cache_data = {
-                        "content": content,
-                        "status_code": response.status_code,
-                        "headers": safe_headers,
-                        "media_type": getattr(response, 'media_type', 'application/json'),
-                        "cached_at": time.time()
-                    }
-                    
-                    await self.redis_client.setex(
-                        cache_key, 
-                        ttl, 
-                        json.dumps(cache_data, ensure_ascii=False, separators=(',', ':'))
-                    )
-                except Exception as e:
-                    print(f"Error serializing cache data: {e}")
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, expire, entry.to_redis())
+            for tag in tags:
+                pipe.sadd(self.tag_key(tag), cache_key)
+                pipe.expire(self.tag_key(tag), expire)
+            self.__queue_stats(pipe)
+            await pipe.execute()
         except Exception as e:
             print(f"Error setting cache: {e}")
 
+    async def __acquire_lock(self, cache_key: str) -> bool:
+        try:
+            return bool(await self.redis_client.set(f"{cache_key}:lock", "1", nx=True, px=CacheSettings.LOCK_TTL_MS))
+        except redis.RedisError as e:
+            print(f"Error acquiring cache lock: {e}")
+            return True
+
+    async def __release_lock(self, cache_key: str) -> None:
+        try:
+            await self.redis_client.delete(f"{cache_key}:lock")
+        except redis.RedisError as e:
+            print(f"Error releasing cache lock: {e}")
+
+    async def __wait_for_entry(self, cache_key: str) -> Optional[CachedEntry]:
+        # Outro worker está recalculando: aguarda a entrada aparecer no Redis
+        deadline = time.time() + CacheSettings.LOCK_WAIT_SECONDS
+        while time.time() < deadline:
+            await asyncio.sleep(CacheSettings.LOCK_POLL_SECONDS)
+            entry = await self.get_cached_response(cache_key)
+            if entry is not None and entry.is_fresh():
+                self.__set_local(cache_key, entry)
+                return entry
+        return None
+
     def should_cache_request(self, request: Request) -> bool:
         """Determina se a requisição deve ser cacheada."""
         # Só cachear métodos GET
         if request.method != "GET":
             return False
-            
+
         # Não cachear se tem parâmetros sensíveis
         query_lower = str(request.url.query).lower()
-        sensitive_params = ['password', 'token', 'key', 'secret']
-        if any(param in query_lower for param in sensitive_params):
+        if any(param in query_lower for param in CacheSettings.SENSITIVE_PARAMS):
             return False
-            
+
         # Não cachear rotas específicas
         for path in CacheSettings.NO_CACHE_PATHS:
             if request.url.path.startswith(path):
                 return False
-                
+
         # Não cachear se tem header no-cache
         cache_control = request.headers.get("cache-control", "").lower()
         if "no-cache" in cache_control or "no-store" in cache_control:
             return False
-            
-        # Não cachear requests com authorization (podem ser específicos do usuário)
-        if request.headers.get("authorization"):
-            # Exceto para rotas públicas
-            if not request.url.path.startswith("/public/"):
-                return False
-                
+
         return True
 
+    async def __compute(self, cache_key: str, request: Request, call_next, ttl: int, tags: List[str], locked: bool) -> Response:
+        """Executa a rota (single flight por chave neste processo) e grava o resultado nos dois níveis."""
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.__flights[cache_key] = future
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+
+            entry: Optional[CachedEntry] = None
+            if (
+                response.status_code == 200
+                and len(body) <= CacheSettings.MAX_BODY_SIZE
+                and "set-cookie" not in response.headers
+                and "content-encoding" not in response.headers
+            ):
+                entry = CachedEntry.from_response(body, response, ttl, getattr(request.state, "etag", None))
+                self.__set_local(cache_key, entry)
+                await self.set_cached_response(cache_key, entry, ttl, tags)
+            future.set_result(entry)
+
+            if entry is not None:
+                return entry.to_response("MISS", request)
+
+            fresh_response = Response(content=body, status_code=response.status_code)
+            fresh_response.raw_headers = response.raw_headers
+            fresh_response.headers["X-Cache"] = "MISS"
+            return fresh_response
+        finally:
+            if not future.done():
+                future.set_result(None)
+            self.__flights.pop(cache_key, None)
+            if locked:
+                await self.__release_lock(cache_key)
+
     async def cache_middleware(self, request: Request, call_next):
         """Middleware para gerenciar cache."""
-        # Verificar se deve cachear
-        if not self.should_cache_request(request):
-            response = await call_next(request)
-            response.headers["X-Cache"] = "BYPASS"
-            return response
-        
-        # Gerar chave do cache
+        policy = self.get_cache_policy(request)
+        if policy is None or not self.should_cache_request(request):
+            return await call_next(request)
+        ttl, tags = policy
+
         cache_key = self.generate_cache_key(request)
-        
-        # Tentar recuperar do cache
-        cached_response = await self.get_cached_response(cache_key)
-        if cached_response:
-            # Adicionar headers indicando que veio do cache
-            cached_response.headers["X-Cache"] = "HIT"
-            cached_response.headers["X-Cache-Key"] = cache_key.split(":")[-1][:20]  # Só os últimos 20 chars
-            return cached_response
-        
-        # Executar requisição normal
-        response = await call_next(request)
-        
-        # Cachear a resposta se apropriado
-        if isinstance(response, (JSONResponse, Response)) and response.status_code == 200:
-            ttl = self.get_cache_ttl(request)
-            # Executar cache em background para não afetar a resposta
-            asyncio.create_task(self.set_cached_response(cache_key, response, ttl))
-            
-        # Adicionar headers indicando que não veio do cache
-        response.headers["X-Cache"] = "MISS"
-        response.headers["X-Cache-Key"] = cache_key.split(":")[-1][:20]  # Só os últimos 20 chars
-        
-        return response
+        now = time.time()
+
+        entry = self.__get_local(cache_key, now)
+        if entry is None:
+            entry = await self.get_cached_response(cache_key)
+            if entry is not None:
+                self.__set_local(cache_key, entry)
+
+        if entry is not None and entry.is_fresh(now):
+            self.__pending_stats["hits"] += 1
+            return entry.to_response("HIT", request)
+
+        if entry is not None:
+            # Stale-while-revalidate: só quem pega o lock recalcula, os demais recebem a versão antiga
+            if cache_key in self.__flights or not await self.__acquire_lock(cache_key):
+                self.__pending_stats["stale"] += 1
+                return entry.to_response("STALE", request)
+            self.__pending_stats["misses"] += 1
+            return await self.__compute(cache_key, request, call_next, ttl, tags, locked=True)
+
+        # Miss: requisições concorrentes deste processo aguardam o mesmo cálculo
+        flight = self.__flights.get(cache_key)
+        if flight is not None:
+            try:
+                entry = await asyncio.wait_for(asyncio.shield(flight), CacheSettings.LOCK_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                entry = None
+            if entry is not None:
+                self.__pending_stats["hits"] += 1
+                return entry.to_response("HIT", request)
+            self.__pending_stats["misses"] += 1
+            return await call_next(request)
+
+        locked = await self.__acquire_lock(cache_key)
+        if not locked:
+            entry = await self.__wait_for_entry(cache_key)
+            if entry is not None:
+                self.__pending_stats["hits"] += 1
+                return entry.to_response("HIT", request)
+        self.__pending_stats["misses"] += 1
+        return await self.__compute(cache_key, request, call_next, ttl, tags, locked)
+
+    ########################## INVALIDAÇÃO / MANUTENÇÃO ##########################
+
+    def __queue_stats(self, pipe) -> None:
+        for name, value in self.__pending_stats.items():
+            if value:
+                pipe.hincrby(self.stats_key, name, value)
+        self.__pending_stats.clear()
+
+    async def flush_stats(self) -> None:
+        if not self.__pending_stats:
+            return
+        pending = self.__pending_stats.copy()
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self.__queue_stats(pipe)
+            await pipe.execute()
+        except redis.RedisError as e:
+            # Devolve os contadores para a próxima tentativa
+            self.__pending_stats.update(pending)
+            print(f"Error flushing cache stats: {e}")
+
+    async def __unlink(self, keys: List[str]) -> int:
+        # UNLINK libera a memória fora da thread principal do Redis
+        for i in range(0, len(keys), CacheSettings.UNLINK_BATCH_SIZE):
+            await self.redis_client.unlink(*keys[i:i + CacheSettings.UNLINK_BATCH_SIZE])
+        return len(keys)
+
+    async def __scan_unlink(self, match: str) -> int:
+        total = 0
+        batch: List[str] = []
+        async for key in self.redis_client.scan_iter(match=match, count=CacheSettings.SCAN_COUNT):
+            batch.append(key)
+            if len(batch) >= CacheSettings.UNLINK_BATCH_SIZE:
+                total += await self.__unlink(batch)
+                batch = []
+        if batch:
+            total += await self.__unlink(batch)
+        return total
+
+    async def invalidate_tags(self, *tags: str) -> int:
+        """Invalida todas as entradas registradas nas tags (SMEMBERS + UNLINK)."""
+        if not tags:
+            return 0
+        tag_keys = [self.tag_key(tag) for tag in tags]
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+            keys = list(set().union(*members))
+            self.__drop_local_keys(keys)
+            await self.__unlink(keys + tag_keys)
+            self.__pending_stats["invalidations"] += len(keys)
+            return len(keys)
+        except redis.RedisError as e:
+            print(f"Error invalidating cache tags: {e}")
+            return 0
+
+    async def __prune_members(self, tag_key: str, members: List[str]) -> int:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for member in members:
+            pipe.exists(member)
+        alive = await pipe.execute()
+        dead = [member for member, exists in zip(members, alive) if not exists]
+        if dead:
+            await self.redis_client.srem(tag_key, *dead)
+        return len(dead)
+
+    async def invalidate_url_stats(self, *short_codes: str) -> int:
+        """Invalida /{short_code}/stats; sem short_codes invalida as estatísticas de todas as urls."""
+        if not short_codes:
+            return await self.invalidate_tags(self.route_tag(CacheSettings.URL_STATS_ROUTE))
+        return await self.invalidate_tags(*[self.param_tag("short_code", code) for code in set(short_codes)])
+
+    async def prune_tags(self) -> int:
+        """Remove dos sets de tags as chaves que já expiraram."""
+        pruned = 0
+        try:
+            async for tag_key in self.redis_client.scan_iter(match=self.tag_key("*"), count=CacheSettings.SCAN_COUNT):
+                batch: List[str] = []
+                async for member in self.redis_client.sscan_iter(tag_key, count=CacheSettings.SCAN_COUNT):
+                    batch.append(member)
+                    if len(batch) >= CacheSettings.UNLINK_BATCH_SIZE:
+                        pruned += await self.__prune_members(tag_key, batch)
+                        batch = []
+                if batch:
+                    pruned += await self.__prune_members(tag_key, batch)
+        except redis.RedisError as e:
+            print(f"Error pruning cache tags: {e}")
+        return pruned
+
+    async def periodic_maintenance(self) -> None:
+        while True:
+            await asyncio.sleep(CacheSettings.CACHE_CLEANUP_INTERVAL)
+            await self.flush_stats()
+            await self.prune_tags()
 
     async def invalidate_cache_pattern(self, pattern: str) -> int:
-        """Invalida cache baseado em um padrão."""
+        """Invalida cache baseado em um padrão (SCAN + UNLINK em lotes)."""
+        self.__drop_local(pattern)
         try:
-            keys = await self.redis_client.keys(f"{CacheSettings.CACHE_PREFIX}*{pattern}*")
-            if keys:
-                await self.redis_client.delete(*keys)
-                return len(keys)
+            total = await self.__scan_unlink(f"{CacheSettings.CACHE_PREFIX}*{pattern}*")
+            self.__pending_stats["invalidations"] += total
+            return total
         except redis.RedisError as e:
             print(f"Error invalidating cache: {e}")
         return 0
 
     async def clear_all_cache(self) -> int:
-        """Limpa todo o cache."""
+        """Limpa todo o cache (entradas, tags e estatísticas)."""
+        self.__drop_local()
+        self.__pending_stats.clear()
         try:
-            keys = await self.redis_client.keys(f"{CacheSettings.CACHE_PREFIX}*")
-            if keys:
-                await self.redis_client.delete(*keys)
-                return len(keys)
+            return await self.__scan_unlink(f"{CacheSettings.CACHE_PREFIX}*")
         except redis.RedisError as e:
             print(f"Error clearing cache: {e}")
         return 0
 
     async def get_cache_stats(self) -> Dict[str, Any]:
-        """Retorna estatísticas do cache."""
+        """Retorna estatísticas do cache a partir dos contadores (sem varrer as chaves)."""
+        await self.flush_stats()
         try:
-            keys = await self.redis_client.keys(f"{CacheSettings.CACHE_PREFIX}*")
-            total_keys = len(keys)
-            
-            # Estatísticas por tipo de rota
-            route_stats = {}
-            for key in keys:
-                # Extrair informação da rota da chave
-                try:
-                    key_info = await self.redis_client.get(key)
-                    if key_info:
-                        data = json.loads(key_info)
-                        # Estimar rota baseado na chave (simplificado)
-                        route_type = "unknown"
-                        if "public" in key:
-                            route_type = "public"
-                        elif "admin" in key:
-                            route_type = "admin"
-                        elif "manager" in key:
-                            route_type = "manager"
-                        
-                        if route_type not in route_stats:
-                            route_stats[route_type] = 0
-                        route_stats[route_type] += 1
-                except:
-                    continue
-            
-            # Informações sobre o Redis
-            info = await self.redis_client.info()
-            memory_used = info.get('used_memory_human', 'N/A')
-            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall(self.stats_key)
+            for name, _, _ in self.__routes:
+                pipe.scard(self.tag_key(self.route_tag(name)))
+            pipe.info("memory")
+            counters, *route_counts, info = await pipe.execute()
+
             return {
-                "total_cached_keys": total_keys,
-                "route_stats": route_stats,
-                "memory_used": memory_used,
+                "counters": {name.decode(): int(value) for name, value in counters.items()},
+                "local_cached_keys": len(self.__local),
+                "route_stats": {name: count for (name, _, _), count in zip(self.__routes, route_counts)},
+                "memory_used": info.get('used_memory_human', 'N/A'),
                 "cache_prefix": CacheSettings.CACHE_PREFIX,
                 "default_ttl": CacheSettings.DEFAULT_TTL,
-                "route_ttl_config": CacheSettings.ROUTE_TTL
+                "route_ttl_config": {name: ttl for name, _, ttl in self.__routes}
             }
         except redis.RedisError as e:
             print(f"Error getting cache stats: {e}")
@@ -272,21 +530,21 @@ class RedisCache:
         try:
             # Teste de ping
             ping_result = await self.redis_client.ping()
-            
+
             # Teste de escrita/leitura
             test_key = f"{CacheSettings.CACHE_PREFIX}health_check"
             await self.redis_client.setex(test_key, 10, "test_value")
             test_value = await self.redis_client.get(test_key)
             await self.redis_client.delete(test_key)
-            
+
             return {
                 "status": "healthy",
                 "ping": ping_result,
-                "write_test": test_value == "test_value"
+                "write_test": test_value == b"test_value"
             }
         except Exception as e:
             return {
                 "status": "unhealthy",
                 "error": str(e)
             }
-        
\ No newline at end of file
+
@@ -18,13 +18,43 @@ class CacheSettings:
     MIN_TTL: int = 30
     MAX_TTL: int = 3600
         
-    CACHE_PREFIX: str = os.getenv("CACHE_PREFIX")
+    CACHE_PREFIX: str = os.getenv("CACHE_PREFIX", "cache:")
     MAX_KEY_LENGTH: int = 250    
+    MAX_BODY_SIZE: int = 1024 * 1024 # 1MB
+
+    # Compressão das entradas no Redis
+    COMPRESS_MIN_SIZE: int = 1024
+    COMPRESS_LEVEL: int = 6
     
-    # TTL específicos por rota (em segundos)
-    ROUTE_TTL: dict[str, int] = {
-        "/admin": int(os.getenv("CACHE_TTL_ADMIN"))
+    # Rotas públicas servidas pelo cache de respostas (nome -> (regex, TTL em segundos)).
+    # Cada entrada recebe as tags route:<nome> e <grupo>:<valor> para cada grupo nomeado da regex.
+    # /dashboard/data não entra: já tem seu próprio cache pré-serializado (src/services/dashboard.py)
+    URL_STATS_ROUTE: str = "url_stats"
+    CACHEABLE_ROUTES: dict[str, tuple[str, int]] = {
+        URL_STATS_ROUTE: (r"^/(?P<short_code>[^/]+)/stats$", int(os.getenv("CACHE_TTL_URL_STATS", "30")))
     }
+
+    # Stale-while-revalidate: por quanto tempo após o TTL a versão antiga ainda pode ser servida
+    STALE_TTL: int = 60
+
+    # L1 em memória (por processo)
+    L1_TTL: int = 5
+    L1_MAX_ENTRIES: int = 2048
+
+    # Single flight entre workers
+    LOCK_TTL_MS: int = 5000
+    LOCK_WAIT_SECONDS: float = 2.0
+    LOCK_POLL_SECONDS: float = 0.05
+
+    # Near-cache em memória (CLIENT TRACKING BCAST) para chaves quentes do Redis
+    NEAR_CACHE_PREFIXES: list[str] = [Constants.SAFE_CACHE_PREFIX, Constants.REDIRECT_CACHE_PREFIX]
+    NEAR_CACHE_MAX_BYTES: int = int(os.getenv("NEAR_CACHE_MAX_BYTES", str(8 * 1024 * 1024))) # 8MB
+    NEAR_CACHE_TTL: int = 300
+    NEAR_CACHE_RETRY_SECONDS: float = 1.0
+
+    # Manutenção (SCAN/UNLINK em lotes, nunca KEYS)
+    SCAN_COUNT: int = 500
+    UNLINK_BATCH_SIZE: int = 500
     
     # Rotas que nunca devem ser cacheadas
     NO_CACHE_PATHS: list[str] = [
@@ -53,13 +83,6 @@ class CacheSettings:
         "cookie"
     ]
     
-    # Headers que devem ser considerados na chave do cache
-    CACHE_KEY_HEADERS: list[str] = [
-        "accept-language",
-        "user-agent",
-        "accept"
-    ]
-    
     # Configurações de ambiente
     ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE") == "1"
     CACHE_DEBUG: bool = os.getenv("CACHE_DEBUG") == "1"
@@ -0,0 +1,32 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+class DimensionCache:
+    """Cache em memória (LRU) dos ids das tabelas de dimensões de analytics."""
+
+    def __init__(self, max_size: int = 50_000):
+        self.max_size = max_size
+        self.__ids: dict[str, OrderedDict[str, int]] = {}
+
+    def get(self, dimension: str, value: str) -> Optional[int]:
+        ids = self.__ids.get(dimension)
+        if ids is None:
+            return None
+        dimension_id = ids.get(value)
+        if dimension_id is not None:
+            ids.move_to_end(value)
+        return dimension_id
+
+    def set(self, dimension: str, value: str, dimension_id: int) -> None:
+        ids = self.__ids.setdefault(dimension, OrderedDict())
+        ids[value] = dimension_id
+        ids.move_to_end(value)
+        if len(ids) > self.max_size:
+            ids.popitem(last=False)
+
+    def clear(self) -> None:
+        self.__ids.clear()
+
+    def size(self) -> int:
+        return sum(len(ids) for ids in self.__ids.values())
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from typing import Optional, Iterable
+import redis.asyncio as redis
+import asyncio
+import time
+
+
+INVALIDATE_CHANNEL = "__redis__:invalidate"
+
+
+class NearCache:
+    """
+    Cache em memória na frente do Redis (client-side caching assistido pelo servidor).
+    Usa CLIENT TRACKING em modo BCAST para os prefixos configurados: o Redis avisa pelo canal
+    __redis__:invalidate sempre que uma chave desses prefixos muda, expira ou é removida.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        prefixes: Iterable[str],
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl: float = 300,
+        retry_seconds: float = 1.0
+    ):
+        self.__client = client
+        self.prefixes = tuple(prefixes)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self.__entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.__size = 0
+        # Leituras em andamento: uma invalidação durante o GET descarta o valor lido
+        self.__inflight: dict[str, object] = {}
+        self.__ready = False
+        self.__task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def __tracked(self, key: str) -> bool:
+        return key.startswith(self.prefixes)
+
+    def __drop(self, key: str) -> None:
+        self.__inflight.pop(key, None)
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__size -= len(key) + len(entry[1])
+
+    def __store(self, key: str, value: str) -> None:
+        self.__drop(key)
+        cost = len(key) + len(value)
+        if cost > self.max_bytes:
+            return
+        self.__entries[key] = (time.monotonic() + self.ttl, value)
+        self.__size += cost
+        while self.__size > self.max_bytes:
+            old_key, (_, old_value) = self.__entries.popitem(last=False)
+            self.__size -= len(old_key) + len(old_value)
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__inflight.clear()
+        self.__size = 0
+
+    def invalidate(self, keys: Optional[list]) -> None:
+        # keys None = FLUSHDB/FLUSHALL no servidor
+        if keys is None:
+            self.clear()
+            return
+        for key in keys:
+            self.__drop(key.decode() if isinstance(key, bytes) else key)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        self.invalidate([key for key in self.__entries if key.startswith(prefix)])
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.__ready or not self.__tracked(key):
+            return await self.__client.get(key)
+
+        entry = self.__entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.__drop(key)
+
+        self.misses += 1
+        token = object()
+        self.__inflight[key] = token
+        try:
+            value = await self.__client.get(key)
+        finally:
+            valid = self.__inflight.get(key) is token
+            if valid:
+                del self.__inflight[key]
+        # Chaves inexistentes não ficam no near-cache
+        if valid and value is not None and self.__ready:
+            self.__store(key, value)
+        return value
+
+    async def setex(self, key: str, ttl: int, value: str) -> None:
+        self.__drop(key)
+        await self.__client.setex(key, ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        for key in keys:
+            self.__drop(key)
+        await self.__client.unlink(*keys)
+
+    async def delete_prefix(self, prefix: str, batch_size: int = 500) -> int:
+        self.invalidate_prefix(prefix)
+        deleted, batch = 0, []
+        async for key in self.__client.scan_iter(match=f"{prefix}*", count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += await self.__client.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += await self.__client.unlink(*batch)
+        return deleted
+
+    async def __listen(self) -> None:
+        # Conexões dedicadas fora do pool: o tracking vale enquanto a conexão que o ativou estiver aberta
+        pool = self.__client.connection_pool
+        listener = pool.make_connection()
+        tracker = pool.make_connection()
+        try:
+            await listener.connect()
+            await tracker.connect()
+            await listener.send_command("CLIENT", "ID")
+            client_id = await listener.read_response()
+            await listener.send_command("SUBSCRIBE", INVALIDATE_CHANNEL)
+            await listener.read_response()
+
+            args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST"]
+            for prefix in self.prefixes:
+                args.extend(["PREFIX", prefix])
+            await tracker.send_command(*args)
+            await tracker.read_response()
+
+            self.__ready = True
+            print(f"[NEAR CACHE READY] prefixes={list(self.prefixes)}")
+            while True:
+                message = await listener.read_response(timeout=None)
+                if isinstance(message, list) and len(message) == 3 and message[0] in ("message", b"message"):
+                    self.invalidate(message[2])
+        finally:
+            # Sem o canal de invalidação nada local é confiável
+            self.__ready = False
+            self.clear()
+            await listener.disconnect()
+            await tracker.disconnect()
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                await self.__listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[NEAR CACHE ERROR]: {e}")
+            await asyncio.sleep(self.retry_seconds)
+
+    def start(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.__ready,
+            "entries": len(self.__entries),
+            "bytes": self.__size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
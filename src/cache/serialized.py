@@ -0,0 +1,60 @@
+from fastapi import Request
+from fastapi.responses import Response
+from typing import Optional
+import hashlib
+import gzip
+import time
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca: W/"x" equivale a "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+class SerializedResponse:
+    """Corpo JSON já serializado (e comprimido) pronto para ser devolvido sem tocar no banco."""
+
+    __slots__ = ("body", "gzip_body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, gzip_body: bytes, etag: str, ttl: float):
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+        self.expires_at = time.monotonic() + ttl
+
+    @classmethod
+    def build(cls, body: bytes, version: str, ttl: float) -> "SerializedResponse":
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        return cls(body, gzip.compress(body, compresslevel=6), f'"{version}-{digest}"', ttl)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def to_redis(self) -> dict[str, bytes]:
+        return {"body": self.body, "gzip": self.gzip_body, "etag": self.etag.encode()}
+
+    @classmethod
+    def from_redis(cls, data: dict[bytes, bytes], ttl: float) -> Optional["SerializedResponse"]:
+        try:
+            return cls(data[b"body"], data[b"gzip"], data[b"etag"].decode(), ttl)
+        except KeyError:
+            return None
+
+    def to_response(self, request: Request, media_type: str = "application/json", cache_control: str = "no-cache") -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        if accepts_gzip(request):
+            # Content-Encoding já definido: o GZipMiddleware repassa sem recomprimir
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=self.gzip_body, media_type=media_type, headers=headers)
+        return Response(content=self.body, media_type=media_type, headers=headers)
@@ -0,0 +1,84 @@
+from src.schemas.urls import UrlTag
+from collections import OrderedDict, deque
+from typing import List, Optional
+import time
+
+
+class _TrieNode:
+
+    __slots__ = ("children", "tags")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.tags: List[UrlTag] = []
+
+
+class TagTrie:
+    """Trie (case-insensitive) com as tags de um usuário, para autocomplete por prefixo."""
+
+    def __init__(self, tags: List[UrlTag]):
+        self.__root = _TrieNode()
+        self.__size = 0
+        for tag in tags:
+            self.insert(tag)
+
+    def insert(self, tag: UrlTag) -> None:
+        node = self.__root
+        for char in tag.name.lower():
+            node = node.children.setdefault(char, _TrieNode())
+        node.tags.append(tag)
+        self.__size += 1
+
+    def search(self, prefix: str, limit: int) -> List[UrlTag]:
+        node = self.__root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        # BFS: nomes mais curtos (mais próximos do prefixo) primeiro
+        results: List[UrlTag] = []
+        queue = deque([node])
+        while queue and len(results) < limit:
+            current = queue.popleft()
+            results.extend(current.tags)
+            queue.extend(current.children[char] for char in sorted(current.children))
+        return results[:limit]
+
+    def __len__(self) -> int:
+        return self.__size
+
+
+class TagTrieCache:
+    """Cache em memória (LRU + TTL) das tries de tags por usuário. O TTL limita a defasagem entre workers."""
+
+    def __init__(self, max_users: int = 1_000, ttl: float = 60):
+        self.max_users = max_users
+        self.ttl = ttl
+        self.__tries: OrderedDict[str, tuple[float, TagTrie]] = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[TagTrie]:
+        entry = self.__tries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, trie = entry
+        if expires_at <= time.monotonic():
+            del self.__tries[user_id]
+            return None
+        self.__tries.move_to_end(user_id)
+        return trie
+
+    def set(self, user_id: str, trie: TagTrie) -> None:
+        self.__tries[user_id] = (time.monotonic() + self.ttl, trie)
+        self.__tries.move_to_end(user_id)
+        if len(self.__tries) > self.max_users:
+            self.__tries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self.__tries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.__tries.clear()
+
+    def size(self) -> int:
+        return len(self.__tries)
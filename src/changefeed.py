@@ -0,0 +1,120 @@
+from src.constants import Constants
+from src.globals import Globals
+from typing import Optional
+import asyncpg
+import asyncio
+
+
+# Aplica as invalidações emitidas pelos triggers de urls, user_urls, domains e url_tags
+# (db/tables.sql, [CHANGE FEED]). As chaves são apagadas no Redis, não só na cópia local:
+# escritas feitas fora dos services (SQL direto, cascatas) não deixam redirect:<code>
+# com o destino ou o dono antigo até o TTL.
+# Payload: '<entidade>:<chave>,<chave>' ou '<entidade>:*'
+
+
+def resync() -> None:
+    # Notificações perdidas enquanto a conexão estava fora: descarta tudo que é local
+    Globals.near_cache.clear()
+    Globals.cache_service.invalidate_local()
+    Globals.tag_trie_cache.clear()
+
+
+async def apply(payload: str) -> None:
+    entity, _, raw_keys = payload.partition(":")
+    keys = [key for key in raw_keys.split(",") if key]
+
+    if entity == "url":
+        if raw_keys == "*":
+            await Globals.near_cache.delete_prefix(Constants.REDIRECT_CACHE_PREFIX)
+            Globals.cache_service.invalidate_local()
+            return
+        await Globals.near_cache.delete(*[f"{Constants.REDIRECT_CACHE_PREFIX}{key}" for key in keys])
+        Globals.cache_service.invalidate_local(*[f":{key}:stats" for key in keys])
+    elif entity == "domain":
+        if raw_keys == "*":
+            await Globals.near_cache.delete_prefix(Constants.SAFE_CACHE_PREFIX)
+            return
+        await Globals.near_cache.delete(*[f"{Constants.SAFE_CACHE_PREFIX}{key}" for key in keys])
+    elif entity == "tag":
+        # Trie de autocomplete só existe em memória
+        if raw_keys == "*":
+            Globals.tag_trie_cache.clear()
+            return
+        for key in keys:
+            Globals.tag_trie_cache.invalidate(key)
+    else:
+        print(f"[CHANGE FEED] Unknown payload: {payload}")
+
+
+class ChangeFeed:
+    """Conexão asyncpg dedicada (fora do pool) em LISTEN no canal de invalidação, com reconexão."""
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = Constants.CHANGE_FEED_CHANNEL,
+        keepalive: float = Constants.CHANGE_FEED_KEEPALIVE_SECONDS,
+        retry_seconds: float = Constants.CHANGE_FEED_RETRY_SECONDS
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.keepalive = keepalive
+        self.retry_seconds = retry_seconds
+        self.__task: Optional[asyncio.Task] = None
+        self.__pending: set[asyncio.Task] = set()
+
+    async def __apply(self, payload: str) -> None:
+        try:
+            await apply(payload)
+        except Exception as e:
+            print(f"[CHANGE FEED ERROR]: {e}")
+
+    def __on_notify(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        # O callback do asyncpg é síncrono: a invalidação (que fala com o Redis) roda numa task
+        task = asyncio.create_task(self.__apply(payload))
+        self.__pending.add(task)
+        task.add_done_callback(self.__pending.discard)
+
+    async def __listen(self) -> None:
+        conn: asyncpg.Connection = await asyncpg.connect(self.dsn)
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _: lost.set())
+        try:
+            await conn.add_listener(self.channel, self.__on_notify)
+            # Resync depois do LISTEN: nada emitido a partir daqui se perde
+            resync()
+            print(f"[CHANGE FEED LISTENING] channel={self.channel}")
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    # Detecta conexões mortas silenciosamente (sem FIN)
+                    await asyncio.wait_for(conn.execute("SELECT 1"), timeout=self.keepalive)
+        finally:
+            if not conn.is_closed():
+                await conn.close(timeout=5)
+
+    async def __run(self) -> None:
+        while True:
+            try:
+                await self.__listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[CHANGE FEED ERROR]: {e}")
+            await asyncio.sleep(self.retry_seconds)
+
+    def start(self) -> None:
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        if self.__pending:
+            await asyncio.gather(*self.__pending, return_exceptions=True)
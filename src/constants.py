@@ -52,9 +52,69 @@ class Constants:
     LOCK_TIME_MINUTES = 16
     CACHE_EXPIRE_SECONDS = 60
 
-    SAFE_BROWSING_URL = f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={os.getenv('GOOGLE_SAFE_BROWSING_API_KEY')}"
+    SAFE_BROWSING_ENDPOINT = os.getenv("SAFE_BROWSING_ENDPOINT", "https://safebrowsing.googleapis.com/v4/threatMatches:find")
+    SAFE_BROWSING_URL = f"{SAFE_BROWSING_ENDPOINT}?key={os.getenv('GOOGLE_SAFE_BROWSING_API_KEY')}"
+
+    # Cliente HTTP compartilhado (src/http_client.py)
+    HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "1") == "1"
+    HTTP_CLIENT_TIMEOUT = 5.0
+    HTTP_CLIENT_CONNECT_TIMEOUT = 3.0
+    HTTP_CLIENT_MAX_CONNECTIONS = 100
+    HTTP_CLIENT_MAX_KEEPALIVE = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY = 30.0
 
     SAFE_CACHE_TTL=21600 # 6 hours
+    SAFE_CACHE_PREFIX = "safe_domains:"
+    # Micro-lotes de consultas ao Safe Browsing (threatMatches:find aceita até 500 entradas)
+    SAFE_BROWSING_BATCH_WINDOW_MS = 5
+    SAFE_BROWSING_MAX_ENTRIES = 500
+
+    # Destino dos redirects (UrlRedirect serializado), lido via near-cache
+    REDIRECT_CACHE_PREFIX = "redirect:"
+    REDIRECT_CACHE_TTL = 3600 # 1 hour
+
+    # Change feed (LISTEN/NOTIFY) para invalidar caches em memória entre workers
+    CHANGE_FEED_CHANNEL = "cache_invalidation"
+    CHANGE_FEED_KEEPALIVE_SECONDS = 30
+    CHANGE_FEED_RETRY_SECONDS = 2
+
+    USER_URLS_COUNT_TTL = 300 # 5 minutes
+    USER_CACHE_TTL = 60
+    USER_URL_SEARCH_CACHE_TTL = 30
+    USER_URL_SEARCH_MIN_SIMILARITY = 0.3
+
+    DASHBOARD_REFRESH_MINUTES = 60
+    DASHBOARD_REFRESH_CHECK_SECONDS = 60
+    DASHBOARD_REFRESH_LOCK_ID = 7302
+    DASHBOARD_CACHE_SECONDS = 15
+    DASHBOARD_CACHE_KEY = "dashboard:response"
+
+    ANALYTICS_DEFAULT_RANGE_DAYS = 30
+    ANALYTICS_CACHE_TTL = 86400 # 24 hours
+
+    ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "180"))
+    ANALYTICS_RETENTION_BATCH_SIZE = 5000
+    ANALYTICS_RETENTION_BATCH_PAUSE = 0.5 # seconds
+    ANALYTICS_RETENTION_INTERVAL = 21600 # 6 hours
+    ANALYTICS_RETENTION_LOCK_ID = 7301
+
+    CLICK_STREAM_BUFFER_SIZE = 256
+    CLICK_STREAM_HEARTBEAT_SECONDS = 15
+
+    CLICK_EVENTS_STREAM = "clicks:raw"
+    CLICK_EVENTS_MAXLEN = 1_000_000
+    CLICK_WORKER_GROUP = "click_enrichers"
+    CLICK_WORKER_BATCH_SIZE = int(os.getenv("CLICK_WORKER_BATCH_SIZE", "500"))
+    CLICK_WORKER_BLOCK_MS = 5000
+    CLICK_WORKER_CLAIM_IDLE_MS = 60000
+    # Entradas que falham sozinhas este número de entregas vão para o dead-letter stream
+    CLICK_WORKER_MAX_DELIVERIES = 5
+    CLICK_DEAD_LETTER_STREAM = "clicks:dead"
+    CLICK_DEAD_LETTER_MAXLEN = 100_000
+
+    TAG_TRIE_MAX_USERS = 1000
+    TAG_TRIE_TTL = 60 # seconds
+    TAG_AUTOCOMPLETE_FUZZY_MIN_LENGTH = 3
 
     PRIVATE_NETWORKS = [
         ipaddress.ip_network("127.0.0.0/8"),
@@ -1,7 +1,8 @@
 from asyncpg import create_pool, Pool, Connection
 from src.migrate import db_migrate
 from dotenv import load_dotenv
-from typing import Callable
+from typing import Callable, Optional
+from src.schemas.pagination import CountMode
 from src.constants import Constants
 import psycopg
 import os
@@ -47,6 +48,41 @@ async def db_count(table: str, conn: Connection) -> int:
     return dict(r)['total']
 
 
+# Tabelas com total exato mantido em dashboard_counters
+COUNTER_TABLES: dict[str, str] = {
+    "urls": "urls",
+    "users": "users",
+    "user_session_tokens": "sessions"
+}
+
+
+async def db_estimate_count(table: str, conn: Connection) -> int:
+    if table in COUNTER_TABLES:
+        r = await conn.fetchval("SELECT SUM(value)::BIGINT FROM dashboard_counters WHERE name = $1", COUNTER_TABLES[table])
+        if r is not None:
+            return max(r, 0)
+    # reltuples é -1 enquanto a tabela nunca passou por VACUUM/ANALYZE
+    r = await conn.fetchval("SELECT reltuples::BIGINT FROM pg_class WHERE oid = to_regclass($1)", table)
+    if r is None or r < 0:
+        return await db_count(table, conn)
+    return r
+
+
+async def db_total(
+    table: str,
+    count_mode: CountMode,
+    conn: Connection,
+    where: str = "",
+    *params
+) -> tuple[Optional[int], bool]:
+    """Total para paginação: (total, é estimativa). Estimativas só valem sem filtro."""
+    if count_mode == "has_more":
+        return None, False
+    if count_mode == "estimated" and not where:
+        return await db_estimate_count(table, conn), True
+    return await conn.fetchval(f"SELECT COUNT(*) FROM {table} {where}", *params), False
+
+
 async def db_version(conn: Connection) -> str:
     r = await conn.fetchrow("SELECT version()")    
     return r['version']
@@ -64,11 +100,20 @@ async def db_reset(migration: Callable[[Connection], None], conn: Connection) ->
         "DROP TABLE IF EXISTS url_tags CASCADE;",
         "DROP TABLE IF EXISTS url_tag_relations CASCADE;",
         "DROP TABLE IF EXISTS url_analytics CASCADE;",
+        "DROP TABLE IF EXISTS url_analytics_daily CASCADE;",
+        "DROP TABLE IF EXISTS analytics_user_agents CASCADE;",
+        "DROP TABLE IF EXISTS analytics_referers CASCADE;",
+        "DROP TABLE IF EXISTS analytics_browsers CASCADE;",
+        "DROP TABLE IF EXISTS analytics_os CASCADE;",
+        "DROP TABLE IF EXISTS analytics_device_types CASCADE;",
         "DROP TABLE IF EXISTS logs CASCADE;",
         "DROP TABLE IF EXISTS time_perf CASCADE;",
         "DROP TABLE IF EXISTS rate_limit_logs CASCADE;",
         "DROP TABLE IF EXISTS logs CASCADE;",
-        "DROP MATERIALIZED VIEW IF EXISTS mv_dashboard CASCADE;"
+        "DROP TABLE IF EXISTS dashboard_counters CASCADE;",
+        "DROP TABLE IF EXISTS dashboard_daily_counters CASCADE;",
+        "DROP MATERIALIZED VIEW IF EXISTS mv_dashboard CASCADE;",
+        "DROP MATERIALIZED VIEW IF EXISTS mv_dashboard_global CASCADE;"
     ]
 
     await conn.execute("SELECT pg_advisory_lock(9999);")
@@ -0,0 +1,67 @@
+from src.schemas.urls import RawClick, EnrichedClick, ClickEvent
+from src.globals import Globals
+from src import util
+from functools import lru_cache
+from typing import Optional
+from user_agents import parse
+
+
+def _geo_value(value: Optional[str]) -> Optional[str]:
+    # O IP2Location devolve '-' ou uma mensagem quando o campo não existe no .BIN
+    if not value or value.strip() == '-' or value.startswith("This parameter") or value.startswith("INVALID"):
+        return None
+    return value.strip()
+
+
+def lookup_geo(ip_address: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    if not ip_address:
+        return None, None
+    try:
+        record = Globals.geoip_reader.get_all(ip_address)
+    except Exception as e:
+        print(f"[GEOIP ERROR]: {e}")
+        return None, None
+    country_code = _geo_value(record.country_short)
+    return (country_code[:2] if country_code else None), _geo_value(record.city)
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(user_agent_string: Optional[str]) -> tuple[str, Optional[str], Optional[str]]:
+    user_agent = parse(user_agent_string or "")
+
+    if user_agent.is_mobile:
+        device_type = 'mobile'
+    elif user_agent.is_tablet:
+        device_type = 'tablet'
+    elif user_agent.is_pc:
+        device_type = 'desktop'
+    elif user_agent.is_bot:
+        device_type = 'bot'
+    else:
+        device_type = 'unknown'
+
+    return device_type, user_agent.browser.family, user_agent.os.family
+
+
+def enrich_click(raw: RawClick) -> EnrichedClick:
+    country_code, city = lookup_geo(raw.ip_address)
+    device_type, browser, os = parse_user_agent(raw.user_agent or None)
+    return EnrichedClick(
+        url_id=raw.url_id,
+        short_code=raw.short_code,
+        user_id=raw.user_id,
+        clicked_at=raw.clicked_at,
+        country_code=country_code,
+        device_type=device_type,
+        browser=browser,
+        os=os,
+        referer=util.extract_host(raw.referer),
+        ip_address=raw.ip_address,
+        city=city,
+        user_agent=raw.user_agent or None
+    )
+
+
+def click_event(click: EnrichedClick) -> dict:
+    # Evento publicado no stream ao vivo: sem IP nem user agent
+    return ClickEvent.model_validate(click.model_dump(include=set(ClickEvent.model_fields))).model_dump(mode="json")
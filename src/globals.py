@@ -1,6 +1,12 @@
 from fastapi.security import OAuth2PasswordBearer
 from src.cache.cache import RedisCache
 from src.cache.config import CacheSettings
+from src.cache.dimensions import DimensionCache
+from src.cache.near import NearCache
+from src.cache.tags import TagTrieCache
+from src.constants import Constants
+from src.pubsub import ClickBroker
+from src.safe_browsing import SafeBrowsingBatcher
 import redis.asyncio as redis
 import IP2Location
 
@@ -12,5 +18,18 @@ class Globals:
     
     oauth2_admin_scheme = OAuth2PasswordBearer(tokenUrl="/admin/admin-login")
     redis_client = redis.from_url(CacheSettings.REDIS_URL, decode_responses=True)
-    cache_service = RedisCache(redis_client)
-    geoip_reader = IP2Location.IP2Location("res/IP2LOCATION-LITE-DB1.BIN")
\ No newline at end of file
+    # Cliente sem decode para payloads binários (respostas serializadas, gzip)
+    redis_bytes_client = redis.from_url(CacheSettings.REDIS_URL, decode_responses=False)
+    cache_service = RedisCache(redis_bytes_client)
+    near_cache = NearCache(
+        redis_client,
+        CacheSettings.NEAR_CACHE_PREFIXES,
+        CacheSettings.NEAR_CACHE_MAX_BYTES,
+        CacheSettings.NEAR_CACHE_TTL,
+        CacheSettings.NEAR_CACHE_RETRY_SECONDS
+    )
+    geoip_reader = IP2Location.IP2Location("res/IP2LOCATION-LITE-DB1.BIN")
+    dimension_cache = DimensionCache()
+    tag_trie_cache = TagTrieCache(Constants.TAG_TRIE_MAX_USERS, Constants.TAG_TRIE_TTL)
+    click_broker = ClickBroker(redis_client, Constants.CLICK_STREAM_BUFFER_SIZE)
+    safe_browsing = SafeBrowsingBatcher(Constants.SAFE_BROWSING_BATCH_WINDOW_MS, Constants.SAFE_BROWSING_MAX_ENTRIES)
\ No newline at end of file
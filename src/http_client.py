@@ -0,0 +1,47 @@
+from src.constants import Constants
+from typing import Optional
+import httpx
+
+
+# Cliente HTTP compartilhado por todas as chamadas externas (hoje, o Safe Browsing):
+# keep-alive e HTTP/2 evitam um handshake TCP+TLS por requisição.
+
+
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=Constants.HTTP_CLIENT_HTTP2,
+        timeout=httpx.Timeout(
+            Constants.HTTP_CLIENT_TIMEOUT,
+            connect=Constants.HTTP_CLIENT_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=Constants.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=Constants.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=Constants.HTTP_CLIENT_KEEPALIVE_EXPIRY
+        ),
+        headers={"User-Agent": f"{Constants.API_NAME}/{Constants.API_VERSION}"}
+    )
+
+
+async def http_init() -> None:
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    # Fora do lifespan (scripts, workers) o cliente é criado sob demanda
+    global http_client
+    if http_client is None:
+        http_client = create_http_client()
+    return http_client
+
+
+async def http_close() -> None:
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
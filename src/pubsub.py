@@ -0,0 +1,104 @@
+from typing import Optional
+import redis.asyncio as redis
+import asyncio
+import json
+
+
+class ClickSubscription:
+
+    def __init__(self, user_id: Optional[str], buffer_size: int):
+        # user_id None recebe os eventos de todos os usuários (admin)
+        self.user_id = user_id
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+
+class ClickBroker:
+    """Fanout de eventos de clique para os assinantes deste processo, sincronizado entre workers via Redis pub/sub."""
+
+    CHANNEL = "clicks:live"
+
+    def __init__(self, redis_client: redis.Redis, buffer_size: int = 256):
+        self.redis_client = redis_client
+        self.buffer_size = buffer_size
+        self.__subscribers: set[ClickSubscription] = set()
+        self.__listener_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: Optional[str]) -> ClickSubscription:
+        subscription = ClickSubscription(user_id, self.buffer_size)
+        self.__subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ClickSubscription) -> None:
+        self.__subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        return len(self.__subscribers)
+
+    def fanout(self, event: dict) -> None:
+        for subscription in list(self.__subscribers):
+            if subscription.user_id is not None and subscription.user_id != event.get("user_id"):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Consumidor lento: descarta a assinatura em vez de acumular memória
+                subscription.dropped = True
+                self.__subscribers.discard(subscription)
+
+    async def publish(self, event: dict) -> None:
+        try:
+            await self.redis_client.publish(self.CHANNEL, json.dumps(event, default=str))
+        except redis.RedisError as e:
+            print(f"[CLICK BROKER ERROR]: {e}")
+            self.fanout(event)
+
+    async def publish_many(self, events: list[dict]) -> None:
+        if not events:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for event in events:
+                pipe.publish(self.CHANNEL, json.dumps(event, default=str))
+            await pipe.execute()
+        except redis.RedisError as e:
+            print(f"[CLICK BROKER ERROR]: {e}")
+            for event in events:
+                self.fanout(event)
+
+    async def __listen(self) -> None:
+        while True:
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        self.fanout(json.loads(message["data"]))
+                    except (json.JSONDecodeError, TypeError):
+                        continue
+            except asyncio.CancelledError:
+                raise
+            except redis.RedisError as e:
+                print(f"[CLICK BROKER ERROR]: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def start(self) -> None:
+        if self.__listener_task is None or self.__listener_task.done():
+            self.__listener_task = asyncio.create_task(self.__listen())
+
+    async def stop(self) -> None:
+        if self.__listener_task is None:
+            return
+        self.__listener_task.cancel()
+        try:
+            await self.__listener_task
+        except asyncio.CancelledError:
+            pass
+        self.__listener_task = None
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status
 from src.security import require_admin
 from src.db import get_db
 from src.schemas.reports import SystemReport
 from src.schemas.admin import HealthReport
 from src.services import admin as admin_service
 from src.services import report as report_service
+from src.services import urls as url_service
 from asyncpg import Connection
 from typing import Optional
 import random
@@ -82,5 +83,10 @@ async def reset_database(conn: Connection = Depends(get_db)):
 
 @router.get("/url/analytics")
 async def get_url_analytics(conn: Connection = Depends(get_db)):
-    r = await conn.fetch("SELECT * FROM url_analytics")
-    return [dict(i) for i in r]
\ No newline at end of file
+    r = await conn.fetch("SELECT * FROM v_url_analytics")
+    return [dict(i) for i in r]
+
+
+@router.get("/clicks/stream")
+async def stream_clicks(request: Request):
+    return await url_service.stream_clicks(request, None)
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from src.security import get_user_from_token
+from src.schemas.analytics import AnalyticsQuery, AnalyticsQueryResult
+from src.schemas.user import User
+from src.services import analytics as analytics_service
+from asyncpg import Connection
+from src.db import get_db
+
+
+router = APIRouter()
+
+
+@router.post("/query", response_model=AnalyticsQueryResult)
+async def query_analytics(
+    query: AnalyticsQuery,
+    user: User = Depends(get_user_from_token),
+    conn: Connection = Depends(get_db)
+):
+    return await analytics_service.query_user_analytics(user, query, conn)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, status
+from src.security import require_admin
+from src.schemas.analytics import AnalyticsQuery, AnalyticsQueryResult, AnalyticsRetention, AnalyticsRetentionResult
+from src.services import analytics as analytics_service
+from asyncpg import Connection
+from src.db import get_db
+from uuid import UUID
+
+
+router = APIRouter(prefix="/analytics", dependencies=[Depends(require_admin)], tags=["admin_analytics"])
+
+
+@router.post("/query", response_model=AnalyticsQueryResult)
+async def query_analytics(query: AnalyticsQuery, conn: Connection = Depends(get_db)):
+    return await analytics_service.query_analytics(query, conn)
+
+
+@router.put("/retention/urls/{url_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def set_url_retention(url_id: int, retention: AnalyticsRetention, conn: Connection = Depends(get_db)):
+    await analytics_service.set_url_retention(url_id, retention, conn)
+
+
+@router.put("/retention/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def set_user_retention(user_id: UUID, retention: AnalyticsRetention, conn: Connection = Depends(get_db)):
+    await analytics_service.set_user_retention(user_id, retention, conn)
+
+
+@router.post("/retention/run", response_model=AnalyticsRetentionResult)
+async def run_retention(conn: Connection = Depends(get_db)):
+    return await analytics_service.purge_expired_clicks(conn)
@@ -33,10 +33,11 @@ async def login(
 async def get_manager_active_sessions(
     limit: int = Query(default=64, le=64, ge=1),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
     user: User = Depends(get_user_from_token),
     conn: Connection = Depends(get_db)
 ):
-    return await auth_service.get_user_sessions(user, limit, offset, conn)
+    return await auth_service.get_user_sessions(user, limit, offset, conn, cursor)
 
 
 @router.post("/refresh", response_model=User)
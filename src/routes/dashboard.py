@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Request, status
 from src.schemas.dashboard import Dashboard
 from src.services import dashboard as dashboard_service
 from src.db import get_db
@@ -10,8 +10,8 @@ router = APIRouter()
 
 
 @router.get("/data", response_model=Dashboard)
-async def get_dashboard(conn: Connection = Depends(get_db)):
-    return await dashboard_service.get_dashboard(conn)
+async def get_dashboard(request: Request):
+    return await dashboard_service.get_dashboard_response(request)
 
 
 @router.put(
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Query, status
 from typing import Optional
 from src.security import require_admin
 from src.db import get_db
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.domain import DomainCreate, DomainDelete, DomainUpdate, Domain
 from src.services import admin as admin_service
 from asyncpg import Connection
@@ -17,9 +17,11 @@ async def get_domains(
     is_secure: Optional[bool] = Query(default=None),
     limit: int = Query(default=64, ge=1, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await admin_service.get_domains(q, is_secure, limit, offset, conn)
+    return await admin_service.get_domains(q, is_secure, limit, offset, conn, count, cursor)
 
 
 @router.post("/", response_model=Domain, status_code=status.HTTP_201_CREATED)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Query
 from typing import Optional, Literal
 from src.security import require_admin
 from src.db import get_db
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.log import Log, RateLimitViolation, DeletedLogs
 from src.services import logs as log_service
 from asyncpg import Connection
@@ -15,9 +15,11 @@ router = APIRouter(prefix="/logs", dependencies=[Depends(require_admin)], tags=[
 async def get_logs(
     limit: int = Query(default=64, ge=0, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await log_service.get_logs(limit, offset, conn)
+    return await log_service.get_logs(limit, offset, conn, count, cursor)
 
 
 @router.delete("/", response_model=DeletedLogs)
@@ -5,6 +5,7 @@ from src.schemas.user import User
 from src.services import urls as url_service
 from asyncpg import Connection
 from src.db import get_db
+from src import versioning
 from typing import Optional
 
 
@@ -31,6 +32,6 @@ async def redirect_from_short_code(
     return await url_service.redirect_from_short_code(short_code, request, conn)
 
 
-@router.get("/{short_code}/stats", response_model=UrlStats)
+@router.get("/{short_code}/stats", response_model=UrlStats, dependencies=[Depends(versioning.url_stats_etag)])
 async def get_url_stats(short_code: str, conn: Connection = Depends(get_db)):
     return await url_service.get_url_stats(short_code, conn)
@@ -1,5 +1,5 @@
 from src.security import get_user_from_token
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.user import User
 from src.schemas.urls import (
     UrlTagCreate, 
@@ -8,6 +8,8 @@ from src.schemas.urls import (
     UrlTagDelete, 
     UrlTagRelationCreate, 
     UrlTagRelationDelete, 
+    UrlTagRelationBulk,
+    UrlTagRelationBulkResult,
     UrlTagId, 
     URLResponse
 )
@@ -15,19 +17,38 @@ from fastapi import APIRouter, Depends, status, Query, Request
 from src.services import tag as tag_service
 from asyncpg import Connection
 from src.db import get_db
+from src import versioning
+from typing import Optional, List
 
 
 router = APIRouter()
 
 
-@router.get("/", status_code=status.HTTP_200_OK, response_model=Pagination[UrlTag])
+@router.get(
+    "/", 
+    status_code=status.HTTP_200_OK, 
+    response_model=Pagination[UrlTag], 
+    dependencies=[Depends(versioning.user_etag(versioning.USER_TAGS))]
+)
 async def get_user_tags(
     user: User = Depends(get_user_from_token), 
     limit: int = Query(default=64, le=64, ge=0),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="exact"),
     conn: Connection = Depends(get_db)
 ):
-    return await tag_service.get_user_tags(user, limit, offset, conn)
+    return await tag_service.get_user_tags(user, limit, offset, conn, count, cursor)
+
+
+@router.get("/autocomplete", status_code=status.HTTP_200_OK, response_model=List[UrlTag])
+async def autocomplete_tags(
+    q: str = Query(min_length=1, max_length=64),
+    limit: int = Query(default=10, le=32, ge=1),
+    user: User = Depends(get_user_from_token), 
+    conn: Connection = Depends(get_db)
+):
+    return await tag_service.autocomplete_tags(user, q, limit, conn)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=UrlTag)
@@ -57,16 +78,22 @@ async def delete_tag(
     await tag_service.delete_tag(user, tag, conn)
 
 
-@router.get("/relations", status_code=status.HTTP_200_OK, response_model=Pagination[URLResponse])
+@router.get(
+    "/relations", 
+    status_code=status.HTTP_200_OK, 
+    response_model=Pagination[URLResponse], 
+    dependencies=[Depends(versioning.user_etag(versioning.USER_URLS, versioning.USER_TAGS))]
+)
 async def get_urls_from_tag(
     tag: UrlTagId,
     request: Request,
     limit: int = Query(default=64, le=64, ge=0),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
     user: User = Depends(get_user_from_token), 
     conn: Connection = Depends(get_db)
 ):
-    return await tag_service.get_urls_from_tag(request, user, tag, limit, offset, conn)
+    return await tag_service.get_urls_from_tag(request, user, tag, limit, offset, conn, cursor)
     
 
 @router.post("/relations", status_code=status.HTTP_201_CREATED)
@@ -87,6 +114,24 @@ async def create_url_tag(
     await tag_service.delete_tag_relation(user, tag, conn)
 
 
+@router.post("/relations/bulk", status_code=status.HTTP_201_CREATED, response_model=UrlTagRelationBulkResult)
+async def create_url_tags(
+    relations: UrlTagRelationBulk,
+    user: User = Depends(get_user_from_token), 
+    conn: Connection = Depends(get_db)
+):
+    return await tag_service.create_tag_relations(user, relations, conn)
+
+
+@router.delete("/relations/bulk", status_code=status.HTTP_200_OK, response_model=UrlTagRelationBulkResult)
+async def delete_url_tags(
+    relations: UrlTagRelationBulk,
+    user: User = Depends(get_user_from_token), 
+    conn: Connection = Depends(get_db)
+):
+    return await tag_service.delete_tag_relations(user, relations, conn)
+
+
 @router.delete("/relations/clear", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_tag(
     tag: UrlTagId,
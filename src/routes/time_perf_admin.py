@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Query, status
 from src.security import require_admin
 from src.db import get_db
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.time_perf import (
     TimePerfResponse, 
     TimePerfStats, 
@@ -9,7 +9,7 @@ from src.schemas.time_perf import (
 )
 from src.services import time_perf as time_perf_service
 from asyncpg import Connection
-from typing import List
+from typing import List, Optional
 
 
 router = APIRouter(prefix="/time_perf", dependencies=[Depends(require_admin)], tags=["admin_time_perf"])
@@ -19,9 +19,11 @@ router = APIRouter(prefix="/time_perf", dependencies=[Depends(require_admin)], t
 async def get_time_perf(
     limit: int = Query(default=64, ge=0, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await time_perf_service.get_time_perf(limit, offset, conn)
+    return await time_perf_service.get_time_perf(limit, offset, conn, count, cursor)
 
 
 @router.get("/stats", response_model=TimePerfStats)
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, Query, Request, status
 from src.schemas.urls import URLDelete
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.urls import URLResponse
 from src.security import require_admin
 from src.services import admin as admin_service
 from src.services import urls as urls_service
 from asyncpg import Connection
 from src.db import get_db
+from typing import Optional
 
 
 router = APIRouter(prefix="/urls", dependencies=[Depends(require_admin)], tags=["admin_urls"])
@@ -17,9 +18,11 @@ async def get_urls(
     request: Request,
     limit: int = Query(default=64, ge=0, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await urls_service.get_urls(request, limit, offset, conn)
+    return await urls_service.get_urls(request, limit, offset, conn, count, cursor)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,25 +1,49 @@
 from fastapi import APIRouter, Depends, Query, Request, status
 from src.security import get_user_from_token
 from src.schemas.user import User
-from src.schemas.urls import URLDelete, CreateFavoriteURL, UserURLResponse
+from src.schemas.urls import URLDelete, CreateFavoriteURL, UserURLResponse, UserURLSearch
 from src.schemas.pagination import Pagination
 from src.services import user as user_service
+from src.services import urls as url_service
 from asyncpg import Connection
 from src.db import get_db
+from src import versioning
+from typing import Optional
 
 
 router = APIRouter()
 
 
-@router.get("/url", response_model=Pagination[UserURLResponse])
+@router.get(
+    "/url", 
+    response_model=Pagination[UserURLResponse], 
+    dependencies=[Depends(versioning.user_etag(versioning.USER_URLS))]
+)
 async def get_user_urls(
     request: Request,
     limit: int = Query(default=64, le=64, ge=0),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
     user: User = Depends(get_user_from_token), 
     conn: Connection = Depends(get_db)
 ):
-    return await user_service.get_user_urls(user.id, request, limit, offset, conn)
+    return await user_service.get_user_urls(user.id, request, limit, offset, conn, cursor)
+
+
+@router.get("/url/search", response_model=UserURLSearch)
+async def search_user_urls(
+    request: Request,
+    q: str = Query(min_length=1, max_length=256),
+    limit: int = Query(default=20, le=64, ge=1),
+    user: User = Depends(get_user_from_token), 
+    conn: Connection = Depends(get_db)
+):
+    return await user_service.search_user_urls(user.id, q, request, limit, conn)
+
+
+@router.get("/clicks/stream")
+async def stream_user_clicks(request: Request, user: User = Depends(get_user_from_token)):
+    return await url_service.stream_clicks(request, str(user.id))
 
 
 @router.put("/url/favorite", status_code=status.HTTP_201_CREATED)
@@ -2,10 +2,11 @@ from fastapi import APIRouter, Depends, Query, status
 from src.security import require_admin
 from src.db import get_db
 from src.schemas.user import User, UserDelete
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.services import admin as admin_service
 from src.schemas.user import UserSession
 from asyncpg import Connection
+from typing import Optional
 
 
 router = APIRouter(prefix='/users', dependencies=[Depends(require_admin)])
@@ -15,9 +16,11 @@ router = APIRouter(prefix='/users', dependencies=[Depends(require_admin)])
 async def get_users(
     limit: int = Query(default=64, ge=0, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await admin_service.get_users(limit, offset, conn)
+    return await admin_service.get_users(limit, offset, conn, count, cursor)
 
 
 @router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
@@ -39,9 +42,11 @@ async def delete_user_sessions(conn: Connection = Depends(get_db)):
 async def get_sessions(
     limit: int = Query(default=64, ge=0, le=64),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None),
+    count: CountMode = Query(default="estimated"),
     conn: Connection = Depends(get_db)
 ):
-    return await admin_service.get_user_sessions(limit, offset, conn)
+    return await admin_service.get_user_sessions(limit, offset, conn, count, cursor)
 
 
 @router.delete("/sessions/expired", status_code=status.HTTP_204_NO_CONTENT)
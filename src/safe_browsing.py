@@ -0,0 +1,89 @@
+from src.constants import Constants
+from src.http_client import get_http_client
+from typing import Optional, List
+import asyncio
+
+
+def build_request_body(urls: List[str]) -> dict:
+    return {
+        "client": {"clientId": "fastapi-url-shortener", "clientVersion": "1.0"},
+        "threatInfo": {
+            "threatTypes": [
+                "MALWARE",
+                "SOCIAL_ENGINEERING",
+                "UNWANTED_SOFTWARE",
+                "POTENTIALLY_HARMFUL_APPLICATION",
+            ],
+            "platformTypes": ["ANY_PLATFORM"],
+            "threatEntryTypes": ["URL"],
+            "threatEntries": [{"url": url} for url in urls],
+        },
+    }
+
+
+class SafeBrowsingBatcher:
+    """
+    Agrupa as consultas ao threatMatches:find: os domínios pedidos dentro de uma janela curta
+    (ou até o limite de entradas da API) vão numa única requisição, e consultas simultâneas
+    do mesmo domínio compartilham o mesmo resultado (single flight).
+    """
+
+    def __init__(self, window_ms: float = 5, max_entries: int = 500):
+        self.window = window_ms / 1000
+        self.max_entries = max_entries
+        # Aguardando o próximo lote / já enviados e ainda sem resposta
+        self.__pending: dict[str, asyncio.Future] = {}
+        self.__inflight: dict[str, asyncio.Future] = {}
+        self.__timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.lookups = 0
+
+    @staticmethod
+    def __consume(future: asyncio.Future) -> None:
+        # Evita "exception was never retrieved" quando todos os chamadores desistiram
+        if not future.cancelled():
+            future.exception()
+
+    async def is_unsafe(self, url: str) -> bool:
+        """True se o Safe Browsing tiver alguma ocorrência para a url."""
+        self.lookups += 1
+        future = self.__inflight.get(url) or self.__pending.get(url)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            future.add_done_callback(self.__consume)
+            self.__pending[url] = future
+            if len(self.__pending) >= self.max_entries:
+                self.__flush()
+            elif self.__timer is None:
+                self.__timer = loop.call_later(self.window, self.__flush)
+        # shield: o cancelamento de um chamador não derruba os demais
+        return await asyncio.shield(future)
+
+    def __flush(self) -> None:
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+        if not self.__pending:
+            return
+        batch, self.__pending = self.__pending, {}
+        self.__inflight.update(batch)
+        asyncio.create_task(self.__send(batch))
+
+    async def __send(self, batch: dict[str, asyncio.Future]) -> None:
+        self.batches += 1
+        try:
+            resp = await get_http_client().post(Constants.SAFE_BROWSING_URL, json=build_request_body(list(batch)))
+            resp.raise_for_status()
+            matches = {match.get("threat", {}).get("url") for match in resp.json().get("matches", [])}
+            for url, future in batch.items():
+                if not future.done():
+                    future.set_result(url in matches)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for url, future in batch.items():
+                if self.__inflight.get(url) is future:
+                    del self.__inflight[url]
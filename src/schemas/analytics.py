@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from datetime import date
+from uuid import UUID
+
+
+AnalyticsDimension = Literal["day", "url_id", "country", "device", "browser", "os"]
+
+
+class AnalyticsQuery(BaseModel):
+
+    url_ids: Optional[List[int]] = Field(default=None, max_length=1000)
+    tag_id: Optional[int] = None
+    user_id: Optional[UUID] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    country: Optional[str] = Field(default=None, min_length=2, max_length=2)
+    device: Optional[str] = None
+    browser: Optional[str] = None
+    group_by: List[AnalyticsDimension] = Field(default_factory=list, max_length=6)
+    limit: int = Field(default=10, ge=1, le=1000)
+
+
+class AnalyticsRow(BaseModel):
+
+    day: Optional[date] = None
+    url_id: Optional[int] = None
+    country: Optional[str] = None
+    device: Optional[str] = None
+    browser: Optional[str] = None
+    os: Optional[str] = None
+    clicks: int
+
+
+class AnalyticsQueryResult(BaseModel):
+
+    start_date: date
+    end_date: date
+    group_by: List[AnalyticsDimension]
+    cached: bool = False
+    results: List[AnalyticsRow]
+
+
+class AnalyticsRetention(BaseModel):
+
+    # None volta a usar o padrão (dono da url ou servidor)
+    days: Optional[int] = Field(default=None, ge=1, le=3650)
+
+
+class AnalyticsRetentionResult(BaseModel):
+
+    deleted: int
+    skipped: bool = False
@@ -1,19 +1,67 @@
 from pydantic import BaseModel, model_validator
-from typing import Generic, TypeVar, List, Optional
+from typing import Generic, TypeVar, List, Optional, Literal
 
 T = TypeVar("T", bound=BaseModel)
 
+
+# exact: COUNT(*) | estimated: contadores/pg_class em listagens sem filtro | has_more: sem total
+CountMode = Literal["exact", "estimated", "has_more"]
+
+
 class Pagination(BaseModel, Generic[T]):
 
-    total: int
+    total: Optional[int] = None
     limit: int
     offset: int
     page: Optional[int] = None
     pages: Optional[int] = None
+    has_more: Optional[bool] = None
+    total_is_estimate: bool = False
+    # Keyset: enviar como ?cursor= para a próxima página (offset é ignorado)
+    next_cursor: Optional[str] = None
     results: List[T]
 
+    @classmethod
+    def build(
+        cls,
+        results: List[T],
+        limit: int,
+        offset: int,
+        total: Optional[int] = None,
+        total_is_estimate: bool = False,
+        next_cursor: Optional[str] = None,
+        cursor: Optional[str] = None
+    ):
+        """Monta a página a partir de uma consulta feita com LIMIT limit + 1 (cursor = o ?cursor= recebido)."""
+        # Keyset: a posição absoluta é desconhecida, então offset/page não valem e a estimativa não é ajustada
+        if cursor:
+            offset = 0
+        has_more = len(results) > limit
+        results = results[:limit]
+        seen = offset + len(results)
+        # Página vazia além do fim não confirma nada: a estimativa fica como está
+        if total is not None and total_is_estimate and not cursor and (results or offset == 0):
+            # A estimativa não pode contradizer o que acabamos de ler
+            total = max(total, seen + 1) if has_more else seen
+            total_is_estimate = has_more
+        pagination = cls(
+            total=total,
+            limit=limit,
+            offset=offset,
+            has_more=has_more,
+            total_is_estimate=total_is_estimate,
+            next_cursor=next_cursor if has_more else None,
+            results=results
+        )
+        if cursor:
+            pagination.page = None
+        return pagination
+
     @model_validator(mode="after")
     def compute_pages(self):
-        self.page = (self.offset // self.limit) + 1
-        self.pages = (self.total + self.limit - 1) // self.limit
-        return self
\ No newline at end of file
+        self.page = (self.offset // self.limit) + 1 if self.limit else 1
+        if self.total is not None:
+            self.pages = (self.total + self.limit - 1) // self.limit if self.limit else 0
+            if self.has_more is None:
+                self.has_more = self.offset + len(self.results) < self.total
+        return self
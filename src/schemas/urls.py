@@ -1,4 +1,4 @@
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, Field
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
@@ -77,7 +77,41 @@ class UrlAnalyticPagination(BaseModel):
 class UrlRedirect(BaseModel):
 
     id: int
+    short_code: str
     original_url: str
+    user_id: Optional[UUID] = None
+
+
+class ClickEvent(BaseModel):
+
+    url_id: int
+    short_code: str
+    user_id: Optional[UUID] = None
+    clicked_at: datetime
+    country_code: Optional[str] = None
+    device_type: Optional[str] = None
+    browser: Optional[str] = None
+    os: Optional[str] = None
+    referer: Optional[str] = None
+
+
+class RawClick(BaseModel):
+
+    url_id: int
+    short_code: str
+    user_id: Optional[UUID] = None
+    clicked_at: datetime
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    referer: Optional[str] = None
+
+
+class EnrichedClick(ClickEvent):
+
+    ip_address: Optional[str] = None
+    city: Optional[str] = None
+    user_agent: Optional[str] = None
+    stream_id: Optional[str] = None
 
 
 class UrlStats(BaseModel):
@@ -145,6 +179,17 @@ class UrlTagRelationDelete(BaseModel):
     tag_id: int
 
 
+class UrlTagRelationBulk(BaseModel):
+
+    url_ids: List[int] = Field(min_length=1, max_length=1000)
+    tag_ids: List[int] = Field(min_length=1, max_length=100)
+
+
+class UrlTagRelationBulkResult(BaseModel):
+
+    affected: int
+
+
 class URLResponse(BaseModel):
     
     id: int
@@ -185,3 +230,15 @@ class UserURLResponse(BaseModel):
     clicks: int = 0
     is_favorite: Optional[bool] = False
     created_at: datetime
+
+
+class UserURLSearchResult(UserURLResponse):
+
+    score: float
+
+
+class UserURLSearch(BaseModel):
+
+    q: str
+    results: List[UserURLSearchResult]
+    cached: bool = False
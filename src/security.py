@@ -101,6 +101,16 @@ def check_user_login_attempts(lock: UserLoginAttempt):
         raise HTTPException(status_code=403, detail=f"Account locked until {lock.locked_until}")
     
 
+def get_user_id_from_access_token(access_token: Optional[str]) -> Optional[str]:
+    if access_token is None:
+        return None
+    try:
+        payload = jwt.decode(access_token, Constants.SECRET_KEY, algorithms=[Constants.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
 async def get_user_from_token(
     access_token: Optional[str] = Cookie(default=None),
     conn: Connection = Depends(get_db)
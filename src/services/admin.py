@@ -10,12 +10,13 @@ from src.schemas.admin import (
     CpuInfo, 
     DiskInfo
 )
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.user import UserSession, User
 from src.tables import users as users_table
 from src.tables import domains as domains_table
 from src.tables import urls as urls_table
 from src.services import domain as domain_service
+from src.services import user as user_service
 from fastapi.exceptions import HTTPException
 from fastapi import status
 from asyncpg import Connection
@@ -23,6 +24,9 @@ from typing import Optional
 from src.db import db_count, db_version, db_reset
 from src.migrate import db_migrate
 from src.perf.system_monitor import get_monitor
+from src.globals import Globals
+from src.constants import Constants
+from src import versioning
 from datetime import datetime
 
 
@@ -46,12 +50,19 @@ async def get_system_health(conn: Connection) -> HealthReport:
     )
 
 
-async def get_users(limit: int, offset: int, conn: Connection) -> Pagination[User]:
-    return await users_table.get_users(limit, offset, conn)
+async def get_users(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[User]:
+    return await users_table.get_users(limit, offset, conn, count_mode, cursor)
     
 
 async def delete_user(user_id: str, conn: Connection):
     await users_table.delete_user(user_id, conn)
+    await user_service.invalidate_user_urls_count(user_id)
 
 
 async def delete_all_users(conn: Connection):
@@ -63,9 +74,11 @@ async def get_domains(
     is_secure: Optional[bool], 
     limit: int, 
     offset: int, 
-    conn: Connection
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
 ) -> Pagination[Domain]:
-    return await domains_table.get_domains(q, is_secure, limit, offset, conn)
+    return await domains_table.get_domains(q, is_secure, limit, offset, conn, count_mode, cursor)
 
 
 async def create_domain(domain: DomainCreate, conn: Connection) -> Domain:
@@ -87,8 +100,14 @@ async def delete_all_user_sessions(conn: Connection) -> None:
     await users_table.delete_sessions(conn)
 
 
-async def get_user_sessions(limit: int, offset: int, conn: Connection) -> Pagination[UserSession]:
-    return await users_table.get_sessions(limit, offset, conn)
+async def get_user_sessions(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[UserSession]:
+    return await users_table.get_sessions(limit, offset, conn, count_mode, cursor)
 
 
 async def cleanup_expired_sessions(conn: Connection) -> None:
@@ -97,7 +116,14 @@ async def cleanup_expired_sessions(conn: Connection) -> None:
 
 async def reset_database(conn: Connection) -> None:
     await db_reset(db_migrate, conn)
+    Globals.dimension_cache.clear()
+    await Globals.cache_service.clear_all_cache()
+    await Globals.near_cache.delete_prefix(Constants.REDIRECT_CACHE_PREFIX)
+    await versioning.bump_url_stats(versioning.ALL)
 
 
 async def delete_all_urls(conn: Connection) -> None:
-    await urls_table.delete_all_urls(conn)
\ No newline at end of file
+    owners = await urls_table.delete_all_urls(conn)
+    await user_service.user_urls_removed(*owners)
+    await Globals.near_cache.delete_prefix(Constants.REDIRECT_CACHE_PREFIX)
+    await versioning.bump_url_stats(versioning.ALL)
@@ -0,0 +1,120 @@
+from src.schemas.analytics import AnalyticsQuery, AnalyticsQueryResult, AnalyticsRow, AnalyticsRetention, AnalyticsRetentionResult
+from src.schemas.user import User
+from src.tables import analytics as analytics_table
+from src.tables import tag as tags_table
+from src.constants import Constants
+from src.globals import Globals
+from src.db import get_db_pool
+from src import versioning
+from fastapi.exceptions import HTTPException
+from fastapi import status
+from asyncpg import Connection
+from datetime import datetime, timezone, timedelta
+from typing import List
+from uuid import UUID
+import redis.asyncio as redis
+import asyncio
+import hashlib
+
+
+async def query_analytics(query: AnalyticsQuery, conn: Connection) -> AnalyticsQueryResult:
+    today = datetime.now(timezone.utc).date()
+    end_date = query.end_date or today
+    start_date = query.start_date or end_date - timedelta(days=Constants.ANALYTICS_DEFAULT_RANGE_DAYS - 1)
+    if start_date > end_date:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start_date must be before end_date")
+
+    # Normaliza a consulta para que filtros equivalentes gerem o mesmo fingerprint
+    query = query.model_copy(
+        update={
+            "start_date": start_date,
+            "end_date": end_date,
+            "url_ids": sorted(set(query.url_ids)) if query.url_ids else None,
+            "country": query.country.upper() if query.country else None,
+            "group_by": list(dict.fromkeys(query.group_by))
+        }
+    )
+
+    # Períodos passados não mudam mais: podem ficar em cache
+    is_past_period = end_date < today
+    cache_key = f"analytics_query:{hashlib.sha256(query.model_dump_json().encode()).hexdigest()}"
+    if is_past_period:
+        try:
+            cached = await Globals.redis_client.get(cache_key)
+            if cached is not None:
+                result = AnalyticsQueryResult.model_validate_json(cached)
+                result.cached = True
+                return result
+        except redis.RedisError as e:
+            print(f"[ANALYTICS CACHE ERROR]: {e}")
+
+    rows: List[AnalyticsRow] = await analytics_table.query_daily_clicks(query, start_date, end_date, conn)
+    result = AnalyticsQueryResult(
+        start_date=start_date,
+        end_date=end_date,
+        group_by=query.group_by,
+        results=rows
+    )
+
+    if is_past_period:
+        try:
+            await Globals.redis_client.setex(cache_key, Constants.ANALYTICS_CACHE_TTL, result.model_dump_json())
+        except redis.RedisError as e:
+            print(f"[ANALYTICS CACHE ERROR]: {e}")
+
+    return result
+
+
+async def query_user_analytics(user: User, query: AnalyticsQuery, conn: Connection) -> AnalyticsQueryResult:
+    if query.tag_id is not None and not await tags_table.user_has_access_to_tag(user.id, query.tag_id, conn):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
+    return await query_analytics(query.model_copy(update={"user_id": user.id}), conn)
+
+
+async def set_url_retention(url_id: int, retention: AnalyticsRetention, conn: Connection) -> None:
+    if not await analytics_table.set_url_retention(url_id, retention.days, conn):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found")
+
+
+async def set_user_retention(user_id: UUID, retention: AnalyticsRetention, conn: Connection) -> None:
+    if not await analytics_table.set_user_retention(user_id, retention.days, conn):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+
+async def purge_expired_clicks(conn: Connection) -> AnalyticsRetentionResult:
+    # Só uma instância executa a limpeza por vez
+    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", Constants.ANALYTICS_RETENTION_LOCK_ID):
+        return AnalyticsRetentionResult(deleted=0, skipped=True)
+
+    total = 0
+    try:
+        while True:
+            deleted = await analytics_table.delete_expired_clicks(
+                Constants.ANALYTICS_RETENTION_DAYS,
+                Constants.ANALYTICS_RETENTION_BATCH_SIZE,
+                conn
+            )
+            total += deleted
+            if deleted < Constants.ANALYTICS_RETENTION_BATCH_SIZE:
+                break
+            # Pausa entre lotes para não competir com o tráfego de escrita
+            await asyncio.sleep(Constants.ANALYTICS_RETENTION_BATCH_PAUSE)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", Constants.ANALYTICS_RETENTION_LOCK_ID)
+
+    # Visitantes únicos vêm dos cliques brutos: a retenção muda as estatísticas
+    if total:
+        await versioning.bump_url_stats(versioning.ALL)
+    return AnalyticsRetentionResult(deleted=total)
+
+
+async def periodic_retention() -> None:
+    while True:
+        try:
+            async with get_db_pool().acquire() as conn:
+                result = await purge_expired_clicks(conn)
+            if result.deleted:
+                print(f"[ANALYTICS RETENTION]: {result.deleted} raw clicks removed")
+        except Exception as e:
+            print(f"[ANALYTICS RETENTION ERROR]: {e}")
+        await asyncio.sleep(Constants.ANALYTICS_RETENTION_INTERVAL)
@@ -9,6 +9,7 @@ from src.tables import users as users_table
 from datetime import datetime, timezone, timedelta
 from src.constants import Constants
 from src import security
+from src import versioning
 from uuid import UUID
 from typing import Optional
 from src import util
@@ -53,6 +54,7 @@ async def login(login: UserLogin, request: Request, conn: Connection):
     )
 
     await users_table.update_user_last_login_at(user_login_data.id, conn)
+    await versioning.bump_user(user_login_data.id, versioning.USER_SESSIONS)
     
     user = User(
         id=user_login_data.id,
@@ -66,8 +68,15 @@ async def login(login: UserLogin, request: Request, conn: Connection):
     return response
 
 
-async def get_user_sessions(user: User, limit: int, offset: int, conn: Connection) -> Pagination[UserSession]:
-    return await users_table.get_user_sessions(user.id, limit, offset, conn)
+async def get_user_sessions(user: User, limit: int, offset: int, conn: Connection, cursor: Optional[str] = None) -> Pagination[UserSession]:
+    return await versioning.cached_user_read(
+        user.id,
+        (versioning.USER_SESSIONS,),
+        "user_sessions",
+        (limit, offset, cursor),
+        Pagination[UserSession],
+        lambda: users_table.get_user_sessions(user.id, limit, offset, conn, cursor)
+    )
 
 
 async def refresh_access_token(refresh_token: Optional[str], conn: Connection) -> User:
@@ -86,6 +95,7 @@ async def refresh_access_token(refresh_token: Optional[str], conn: Connection) -
         session_token.refresh_token,
         conn 
     )
+    await versioning.bump_user(user.id, versioning.USER_SESSIONS)
 
     user: User = await users_table.get_user(user.id, conn)
     response = JSONResponse(user.model_dump(mode='json'))
@@ -106,7 +116,9 @@ async def signup(new_user: UserCreate, conn: Connection):
 
 async def logout(refresh_token: Optional[str], conn: Connection):
     if refresh_token is not None:
-        await users_table.delete_user_session_token(refresh_token, conn)
+        user_id: Optional[UUID] = await users_table.delete_user_session_token(refresh_token, conn)
+        if user_id is not None:
+            await versioning.bump_user(user_id, versioning.USER_SESSIONS)
     
     response = Response()
     security.unset_session_token_cookie(response)
@@ -115,6 +127,7 @@ async def logout(refresh_token: Optional[str], conn: Connection):
 
 async def logout_all(user: User, conn: Connection):
     await users_table.delete_all_user_session_tokens(user.id, conn)
+    await versioning.bump_user(user.id, versioning.USER_SESSIONS)
     response = Response()
     security.unset_session_token_cookie(response)
     return response
\ No newline at end of file
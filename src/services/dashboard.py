@@ -1,17 +1,131 @@
 from src.tables import dashboard as dashboard_view
 from src.schemas.dashboard import Dashboard
+from src.cache.serialized import SerializedResponse
+from src.constants import Constants
+from src.globals import Globals
+from src.db import get_db_pool
+from fastapi import Request
+from fastapi.responses import Response
 from asyncpg import Connection
 from src.util import minutes_since
+from typing import Optional
+import redis.asyncio as redis
+import asyncio
 
 
-async def get_dashboard(conn: Connection) -> Dashboard:
-    dashboard: Dashboard = await dashboard_view.get_dashboard(conn)
-    if dashboard.last_updated and minutes_since(dashboard.last_updated) >= 60:
+_refresh_task: Optional[asyncio.Task] = None
+_cached_response: Optional[SerializedResponse] = None
+_build_lock = asyncio.Lock()
+
+
+def is_stale(dashboard: Dashboard) -> bool:
+    return minutes_since(dashboard.last_updated) >= Constants.DASHBOARD_REFRESH_MINUTES
+
+
+async def refresh_dashboard_if_stale(conn: Connection, force: bool = False) -> bool:
+    # Single-flight entre instâncias: quem não pega o lock apenas segue servindo a view atual
+    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", Constants.DASHBOARD_REFRESH_LOCK_ID):
+        return False
+    try:
+        if not force:
+            # Outra instância pode ter atualizado enquanto esperávamos
+            dashboard: Dashboard = await dashboard_view.get_dashboard(conn)
+            if not is_stale(dashboard):
+                return False
         await dashboard_view.refresh_dashboard(conn)
-        return await dashboard_view.get_dashboard(conn)
-    return dashboard
+        await invalidate_cache()
+        return True
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", Constants.DASHBOARD_REFRESH_LOCK_ID)
+
+
+async def _background_refresh() -> None:
+    try:
+        async with get_db_pool().acquire() as conn:
+            await refresh_dashboard_if_stale(conn)
+    except Exception as e:
+        print(f"[DASHBOARD REFRESH ERROR]: {e}")
+
+
+def schedule_refresh() -> None:
+    # Single-flight dentro do processo
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_background_refresh())
+
+
+async def periodic_refresh() -> None:
+    while True:
+        await _background_refresh()
+        await asyncio.sleep(Constants.DASHBOARD_REFRESH_CHECK_SECONDS)
+
+
+async def invalidate_cache() -> None:
+    global _cached_response
+    _cached_response = None
+    try:
+        await Globals.redis_bytes_client.delete(Constants.DASHBOARD_CACHE_KEY)
+    except redis.RedisError as e:
+        print(f"[DASHBOARD CACHE ERROR]: {e}")
+
+
+async def _get_shared_response() -> Optional[SerializedResponse]:
+    try:
+        pipe = Globals.redis_bytes_client.pipeline(transaction=False)
+        pipe.hgetall(Constants.DASHBOARD_CACHE_KEY)
+        pipe.pttl(Constants.DASHBOARD_CACHE_KEY)
+        data, pttl = await pipe.execute()
+    except redis.RedisError as e:
+        print(f"[DASHBOARD CACHE ERROR]: {e}")
+        return None
+    if not data or pttl <= 0:
+        return None
+    return SerializedResponse.from_redis(data, pttl / 1000)
+
+
+async def _set_shared_response(serialized: SerializedResponse) -> None:
+    try:
+        pipe = Globals.redis_bytes_client.pipeline(transaction=True)
+        pipe.delete(Constants.DASHBOARD_CACHE_KEY)
+        pipe.hset(Constants.DASHBOARD_CACHE_KEY, mapping=serialized.to_redis())
+        pipe.expire(Constants.DASHBOARD_CACHE_KEY, Constants.DASHBOARD_CACHE_SECONDS)
+        await pipe.execute()
+    except redis.RedisError as e:
+        print(f"[DASHBOARD CACHE ERROR]: {e}")
+
+
+async def _build_response() -> SerializedResponse:
+    async with get_db_pool().acquire() as conn:
+        dashboard: Dashboard = await dashboard_view.get_dashboard(conn)
+
+    # Stale-while-revalidate: nunca espera o refresh
+    if is_stale(dashboard):
+        schedule_refresh()
+
+    return SerializedResponse.build(
+        dashboard.model_dump_json().encode(),
+        version=str(int(dashboard.last_updated.timestamp())),
+        ttl=Constants.DASHBOARD_CACHE_SECONDS
+    )
+
+
+async def get_dashboard_response(request: Request) -> Response:
+    # Memória -> Redis -> banco. Contadores são ao vivo, por isso o TTL curto;
+    # a versão da view global (last_updated) faz parte do ETag.
+    global _cached_response
+    serialized = _cached_response
+    if serialized is None or not serialized.is_fresh():
+        async with _build_lock:
+            serialized = _cached_response
+            if serialized is None or not serialized.is_fresh():
+                serialized = await _get_shared_response()
+                if serialized is None:
+                    serialized = await _build_response()
+                    await _set_shared_response(serialized)
+                _cached_response = serialized
+    return serialized.to_response(request)
 
 
 async def refresh_dashboard(conn: Connection) -> Dashboard:
-    await dashboard_view.refresh_dashboard(conn)
-    return await dashboard_view.get_dashboard(conn)
\ No newline at end of file
+    await refresh_dashboard_if_stale(conn, force=True)
+    return await dashboard_view.get_dashboard(conn)
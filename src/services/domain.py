@@ -6,6 +6,8 @@ from src.tables import domains as domains_table
 from src.tables import time_perf as time_perf_table
 from src.tables import urls as urls_table
 from src.services import logs as log_service
+from src.services import user as user_service
+from src import versioning
 from asyncpg import Connection
 from asyncpg.exceptions import CheckViolationError
 from fastapi import Request, status
@@ -20,61 +22,51 @@ async def create_domain(domain_create: DomainCreate, conn: Connection) -> Domain
     except CheckViolationError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Url inválida")
     if not domain_create.is_secure:
-        await urls_table.delete_urls_by_domain(domain, conn)
+        deleted = await urls_table.delete_urls_by_domain(domain, conn)
+        await Globals.near_cache.delete(*[f"{Constants.REDIRECT_CACHE_PREFIX}{code}" for code in deleted["short_codes"]])
+        await versioning.bump_url_stats(versioning.ALL)
+        await user_service.user_urls_removed(*deleted["user_ids"])
     return domain
 
 
 async def delete_domain(domain: DomainDelete, conn: Connection):
-    await domains_table.delete_domain_by_id(domain.id, conn)
+    owners = await domains_table.delete_domain_by_id(domain.id, conn)
+    await user_service.user_urls_removed(*owners)
+    # URLs do domínio caem em cascata
+    await Globals.near_cache.delete_prefix(Constants.REDIRECT_CACHE_PREFIX)
+    await versioning.bump_url_stats(versioning.ALL)
 
 
 async def is_safe_domain(request: Request, domain: Domain, conn: Connection) -> bool:
     # Short time storage
-    cache_key = f"safe_domains:{domain.url}"
-    cached = await Globals.redis_client.get(cache_key)
+    cache_key = f"{Constants.SAFE_CACHE_PREFIX}{domain.url}"
+    cached = await Globals.near_cache.get(cache_key)
     if cached is not None:
         return cached == "safe"    
-    
-    body = {
-        "client": {"clientId": "fastapi-url-shortener", "clientVersion": "1.0"},
-        "threatInfo": {
-            "threatTypes": [
-                "MALWARE",
-                "SOCIAL_ENGINEERING",
-                "UNWANTED_SOFTWARE",
-                "POTENTIALLY_HARMFUL_APPLICATION",
-            ],
-            "platformTypes": ["ANY_PLATFORM"],
-            "threatEntryTypes": ["URL"],
-            "threatEntries": [{"url": domain.url}],
-        },
-    }
 
     try:
-        async with httpx.AsyncClient(timeout=5) as client:
-            t1: float = time.perf_counter()
-            resp = await client.post(Constants.SAFE_BROWSING_URL, json=body)
-            resp.raise_for_status()
-            data = resp.json()
-            t2: float = time.perf_counter()
+        # Consulta agrupada com as de outras requisições (src/safe_browsing.py)
+        t1: float = time.perf_counter()
+        unsafe: bool = await Globals.safe_browsing.is_unsafe(domain.url)
+        t2: float = time.perf_counter()
 
-            if not Constants.IS_PRODUCTION:
-                await time_perf_table.create_time_perf(
-                    TimePerfCreate(
-                        perf_type='api_request',
-                        execution_time=t2 - t1,
-                        perf_subtype='safe_browsing_api'
-                    ),
-                    conn
-                )
+        if not Constants.IS_PRODUCTION:
+            await time_perf_table.create_time_perf(
+                TimePerfCreate(
+                    perf_type='api_request',
+                    execution_time=t2 - t1,
+                    perf_subtype='safe_browsing_api'
+                ),
+                conn
+            )
 
-            if data.get("matches"):
-                await Globals.redis_client.setex(cache_key, Constants.SAFE_CACHE_TTL, "unsafe")
-                await domains_table.upsert_domain(domain.id, False, conn)
-                return False
+        if unsafe:
+            await Globals.near_cache.setex(cache_key, Constants.SAFE_CACHE_TTL, "unsafe")
+            await domains_table.upsert_domain(domain.id, False, conn)
+            return False
 
-            await Globals.redis_client.setex(cache_key, Constants.SAFE_CACHE_TTL, "safe")
-            return True
+        await Globals.near_cache.setex(cache_key, Constants.SAFE_CACHE_TTL, "safe")
+        return True
     except httpx.RequestError as e:
         await log_service.log_error(
             request,
@@ -89,5 +81,8 @@ async def is_safe_domain(request: Request, domain: Domain, conn: Connection) ->
 async def update_domain(domain: DomainUpdate, conn: Connection) -> None:
     await domains_table.update_domain(domain, conn)
     if not domain.is_secure:
-        await urls_table.delete_urls_by_domain(domain, conn)
+        deleted = await urls_table.delete_urls_by_domain(domain, conn)
+        await Globals.near_cache.delete(*[f"{Constants.REDIRECT_CACHE_PREFIX}{code}" for code in deleted["short_codes"]])
+        await versioning.bump_url_stats(versioning.ALL)
+        await user_service.user_urls_removed(*deleted["user_ids"])
     return await domains_table.get_domain_by_id(domain.id, conn)
\ No newline at end of file
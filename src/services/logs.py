@@ -1,6 +1,6 @@
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.log import Log, RateLimitViolation, DeletedLogs
 from src.tables import logs as logs_table
 from src.perf.system_monitor import get_monitor
@@ -135,8 +135,14 @@ async def log_rate_limit_violation(
 
 
 
-async def get_logs(limit: int, offset: int, conn: Connection) -> Pagination[Log]:
-    return await logs_table.get_logs(limit=limit, offset=offset, conn=conn)
+async def get_logs(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[Log]:
+    return await logs_table.get_logs(limit=limit, offset=offset, conn=conn, count_mode=count_mode, cursor=cursor)
 
 
 async def delete_logs(interval_minutes: Optional[int], method: Optional[Literal['GET', 'PUT', 'POST', 'DELETE']], conn: Connection) -> DeletedLogs:
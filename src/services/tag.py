@@ -5,10 +5,12 @@ from src.schemas.urls import (
     UrlTagDelete, 
     UrlTagRelationCreate, 
     UrlTagRelationDelete, 
+    UrlTagRelationBulk,
+    UrlTagRelationBulkResult,
     UrlTagId, 
     URLResponse
 )
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.user import User
 from src.tables import tag as tags_table
 from src.tables import urls as urls_table
@@ -17,17 +19,58 @@ from asyncpg import Connection
 from fastapi.responses import Response
 from fastapi.exceptions import HTTPException
 from fastapi import status, Request
-from typing import Optional
+from src.cache.tags import TagTrie
+from src.constants import Constants
+from src.globals import Globals
+from src import versioning
+from typing import Optional, List
 from src import util
 
 
-async def get_user_tags(user: User, limit: int, offset: int, conn: Connection) -> Pagination[UrlTag]:
-    return await tags_table.get_user_tags(user, limit, offset, conn)
+async def get_user_tags(
+    user: User,
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[UrlTag]:
+    return await versioning.cached_user_read(
+        user.id,
+        (versioning.USER_TAGS,),
+        "user_tags",
+        (limit, offset, count_mode, cursor),
+        Pagination[UrlTag],
+        lambda: tags_table.get_user_tags(user, limit, offset, conn, count_mode, cursor)
+    )
+
+
+async def autocomplete_tags(user: User, q: str, limit: int, conn: Connection) -> List[UrlTag]:
+    q = q.strip()
+    user_id = str(user.id)
+    trie: Optional[TagTrie] = Globals.tag_trie_cache.get(user_id)
+    if trie is None:
+        trie = TagTrie(await tags_table.get_all_user_tags(user.id, conn))
+        Globals.tag_trie_cache.set(user_id, trie)
+
+    results: List[UrlTag] = trie.search(q, limit)
+    if len(results) >= limit or len(q) < Constants.TAG_AUTOCOMPLETE_FUZZY_MIN_LENGTH:
+        return results
+
+    # Completa com correspondências aproximadas (erros de digitação, termo no meio do nome)
+    seen = {tag.id for tag in results}
+    for tag in await tags_table.search_user_tags(user.id, q, limit, conn):
+        if tag.id not in seen:
+            results.append(tag)
+    return results[:limit]
 
 
 async def create_tag(user: User, tag: UrlTagCreate, conn: Connection) -> UrlTag:
     try:
-        return await tags_table.create_tag(user, tag, conn)
+        created_tag: UrlTag = await tags_table.create_tag(user, tag, conn)
+        Globals.tag_trie_cache.invalidate(str(user.id))
+        await versioning.bump_user(user.id, versioning.USER_TAGS)
+        return created_tag
     except UniqueViolationError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Tag already exists!")
     except CheckViolationError as e:
@@ -57,6 +100,9 @@ async def update_tag(user: User, tag: UrlTagUpdate, conn: Connection) -> UrlTag:
 
     if updated_tag is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This tag doesn't exist.")
+    Globals.tag_trie_cache.invalidate(str(user.id))
+    # As tags também aparecem embutidas na listagem de urls
+    await versioning.bump_user(user.id, versioning.USER_TAGS, versioning.USER_URLS)
     return updated_tag
 
 
@@ -64,13 +110,35 @@ async def delete_tag(user: User, tag: UrlTagDelete, conn: Connection):
     if not await tags_table.user_has_access_to_tag(user.id, tag.id, conn):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
     await tags_table.delete_user_tag(user.id, tag.id, conn)
+    Globals.tag_trie_cache.invalidate(str(user.id))
+    await versioning.bump_user(user.id, versioning.USER_TAGS, versioning.USER_URLS)
+
+
+async def get_urls_from_tag(
+    request: Request,
+    user: User,
+    tag: UrlTagId,
+    limit: int,
+    offset: int,
+    conn: Connection,
+    cursor: Optional[str] = None
+) -> Pagination[URLResponse]:
+    base_url = util.extract_base_url(request)
 
+    async def load() -> Pagination[URLResponse]:
+        # A verificação de acesso fica dentro do cache: perder a tag avança a versão de USER_TAGS
+        if not await tags_table.user_has_access_to_tag(user.id, tag.id, conn):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
+        return await tags_table.get_tag_urls(base_url, tag.id, limit, offset, conn, cursor)
 
-async def get_urls_from_tag(request: Request, user: User, tag: UrlTagId, limit: int, offset: int, conn: Connection) -> Pagination[URLResponse]:
-    base_url = util.extract_base_url(request)
-    if not await tags_table.user_has_access_to_tag(user.id, tag.id, conn):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
-    return await tags_table.get_tag_urls(base_url, tag.id, limit, offset, conn)
+    return await versioning.cached_user_read(
+        user.id,
+        (versioning.USER_URLS, versioning.USER_TAGS),
+        "tag_urls",
+        (base_url, tag.id, limit, offset, cursor),
+        Pagination[URLResponse],
+        load
+    )
 
 
 async def create_tag_relation(user: User, tag: UrlTagRelationCreate, conn: Connection):        
@@ -78,6 +146,7 @@ async def create_tag_relation(user: User, tag: UrlTagRelationCreate, conn: Conne
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
     
     await tags_table.create_tag_relation(tag.url_id, tag.tag_id, conn)
+    await versioning.bump_user(user.id, versioning.USER_URLS)
     return Response(status_code=status.HTTP_201_CREATED)
 
 
@@ -85,9 +154,29 @@ async def delete_tag_relation(user: User, tag: UrlTagRelationDelete, conn: Conne
     if not await urls_table.user_has_access_to_url(user.id, tag.tag_id, conn):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
     await tags_table.delete_tag_relation(tag.url_id, tag.tag_id, conn)       
+    await versioning.bump_user(user.id, versioning.USER_URLS)
+
+
+async def create_tag_relations(user: User, relations: UrlTagRelationBulk, conn: Connection) -> UrlTagRelationBulkResult:
+    ok, affected = await tags_table.create_tag_relations(user.id, relations.url_ids, relations.tag_ids, conn)
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Some of these tags or URLs don't exist or you don't have access to them.")
+    if affected:
+        await versioning.bump_user(user.id, versioning.USER_URLS)
+    return UrlTagRelationBulkResult(affected=affected)
+
+
+async def delete_tag_relations(user: User, relations: UrlTagRelationBulk, conn: Connection) -> UrlTagRelationBulkResult:
+    ok, affected = await tags_table.delete_tag_relations(user.id, relations.url_ids, relations.tag_ids, conn)
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Some of these tags or URLs don't exist or you don't have access to them.")
+    if affected:
+        await versioning.bump_user(user.id, versioning.USER_URLS)
+    return UrlTagRelationBulkResult(affected=affected)
 
 
 async def clear_tag(user: User, tag: UrlTagId, conn: Connection):
     if not await urls_table.user_has_access_to_url(user.id, tag.id, conn):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="This tag doesn't exist or you don't have access to this URL.")
-    await tags_table.clear_tag(tag.id, conn)
\ No newline at end of file
+    await tags_table.clear_tag(tag.id, conn)
+    await versioning.bump_user(user.id, versioning.USER_URLS)
\ No newline at end of file
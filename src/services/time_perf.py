@@ -1,20 +1,22 @@
 from src.tables import time_perf as time_perf_table
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.time_perf import (
     TimePerfResponse, 
     TimePerfGroupedStats, 
     TimePerfStats
 )
-from typing import List
+from typing import List, Optional
 from asyncpg import Connection
 
 
 async def get_time_perf(
     limit: int,
     offset: int,
-    conn: Connection
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
 ) -> Pagination[TimePerfResponse]:
-    return await time_perf_table.get_time_perf(limit, offset, conn)
+    return await time_perf_table.get_time_perf(limit, offset, conn, count_mode, cursor)
 
 
 async def get_time_perf_globals_stats(conn: Connection) -> TimePerfStats:
@@ -3,36 +3,52 @@ from src.schemas.urls import (
     UrlRedirect, 
     UrlStats, 
     URLResponse, 
-    URLDelete
+    URLDelete,
+    RawClick,
+    EnrichedClick
 )
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
 from src.schemas.user import User
 from src.schemas.token import SessionToken
 from src.schemas.domain import Domain
 from src.services import domain as domain_service
+from src.services import user as user_service
 from src.tables import urls as urls_table
 from src.tables import users as users_table
 from src.tables import domains as domains_table
 from fastapi.exceptions import HTTPException
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, StreamingResponse
 from fastapi import Request, status
 from asyncpg import Connection
 from src import security
+from src.constants import Constants
+from src.globals import Globals
+from src.pubsub import ClickSubscription
 from typing import Optional
+from datetime import datetime, timezone
+from src import enrichment
 from src import util
+from src import versioning
+import redis.asyncio as redis
+import asyncio
+import json
 
 
 async def get_urls(
     request: Request, 
     limit: int, 
     offset: int, 
-    conn: Connection
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
 ) -> Pagination[URLResponse]:
     return await urls_table.get_urls(
         util.extract_base_url(request),
         limit, 
         offset, 
-        conn
+        conn,
+        count_mode,
+        cursor
     )
 
 
@@ -44,6 +60,11 @@ async def shorten(url: URLCreate, request: Request, conn: Connection, refresh_to
     
     base_url: str = util.extract_base_url(request)
     url_response: URLResponse = await urls_table.create_url(domain, url, user, base_url, conn)
+    if user:
+        await user_service.invalidate_user_urls_count(user.id)
+        await versioning.bump_user(user.id, versioning.USER_URLS)
+        # URL já existente pode ter mudado de dono (user_id usado nos cliques)
+        await Globals.near_cache.delete(f"{Constants.REDIRECT_CACHE_PREFIX}{url_response.short_code}")
 
     response = JSONResponse(content=url_response.model_dump(mode="json"))
     if not user and refresh_token:
@@ -51,27 +72,110 @@ async def shorten(url: URLCreate, request: Request, conn: Connection, refresh_to
         if user:
             session_token: SessionToken = security.create_session_token(user.id)
             await users_table.update_user_session_token(user.id, session_token.refresh_token, conn)
+            await versioning.bump_user(user.id, versioning.USER_SESSIONS)
             security.set_session_token_cookie(response, session_token)
             return response
 
     return response
         
 
+async def record_click(click: RawClick, conn: Connection) -> None:
+    fields = {
+        key: "" if value is None else str(value) 
+        for key, value in click.model_dump(mode="json").items()
+    }
+    try:
+        await Globals.redis_client.xadd(
+            Constants.CLICK_EVENTS_STREAM,
+            fields,
+            maxlen=Constants.CLICK_EVENTS_MAXLEN,
+            approximate=True
+        )
+    except redis.RedisError as e:
+        # Sem Redis: enriquece e grava inline para não perder o clique
+        print(f"[CLICK STREAM ERROR]: {e}")
+        enriched: EnrichedClick = enrichment.enrich_click(click)
+        await urls_table.create_click_events([enriched], conn)
+        if enriched.user_id is not None:
+            await versioning.bump_user(str(enriched.user_id), versioning.USER_URLS)
+        await versioning.bump_url_stats(enriched.short_code)
+        await Globals.click_broker.publish(enrichment.click_event(enriched))
+
+
+async def get_redirect_url(short_code: str, conn: Connection) -> Optional[UrlRedirect]:
+    cache_key = f"{Constants.REDIRECT_CACHE_PREFIX}{short_code.strip()}"
+    try:
+        cached: Optional[str] = await Globals.near_cache.get(cache_key)
+        if cached is not None:
+            return UrlRedirect.model_validate_json(cached)
+    except redis.RedisError as e:
+        print(f"[REDIRECT CACHE ERROR]: {e}")
+
+    url: Optional[UrlRedirect] = await urls_table.get_redirect_url(short_code, conn)
+    if url is not None:
+        try:
+            await Globals.near_cache.setex(cache_key, Constants.REDIRECT_CACHE_TTL, url.model_dump_json())
+        except redis.RedisError as e:
+            print(f"[REDIRECT CACHE ERROR]: {e}")
+    return url
+
+
 async def redirect_from_short_code(
     short_code: str, 
     request: Request, 
     conn: Connection
 ) -> RedirectResponse:
-    url: Optional[UrlRedirect] = await urls_table.get_redirect_url(short_code, conn)
+    url: Optional[UrlRedirect] = await get_redirect_url(short_code, conn)
 
     if url is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="URL not found.")
 
-    await urls_table.add_click_event(url.id, request, conn)
+    await record_click(
+        RawClick(
+            url_id=url.id,
+            short_code=url.short_code,
+            user_id=url.user_id,
+            clicked_at=datetime.now(timezone.utc),
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            referer=request.headers.get("referer")
+        ),
+        conn
+    )
     
     return RedirectResponse(url=url.original_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
 
+async def stream_clicks(request: Request, user_id: Optional[str]) -> StreamingResponse:
+    subscription: ClickSubscription = Globals.click_broker.subscribe(user_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscription.dropped:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), 
+                        timeout=Constants.CLICK_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: click\ndata: {json.dumps(event)}\n\n"
+            if subscription.dropped:
+                yield "event: overflow\ndata: {}\n\n"
+        finally:
+            Globals.click_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
 async def get_url_stats(short_code: str, conn: Connection) -> UrlStats:
     url_id = await urls_table.get_url_id_by_short_code(short_code, conn)
     if url_id is None:
@@ -90,4 +194,8 @@ async def get_url_stats(short_code: str, conn: Connection) -> UrlStats:
 
 
 async def delete_url(url: URLDelete, conn: Connection):
-    await urls_table.delete_url(url.id, conn)
\ No newline at end of file
+    deleted = await urls_table.delete_url(url.id, conn)
+    if deleted is not None:
+        await Globals.near_cache.delete(f"{Constants.REDIRECT_CACHE_PREFIX}{deleted['short_code']}")
+        await versioning.bump_url_stats(deleted["short_code"])
+        await user_service.user_urls_removed(*deleted["user_ids"])
\ No newline at end of file
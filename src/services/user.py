@@ -1,5 +1,5 @@
 from src.schemas.user import User
-from src.schemas.urls import URLDelete, CreateFavoriteURL, UserURLResponse
+from src.schemas.urls import URLDelete, CreateFavoriteURL, UserURLResponse, UserURLSearch
 from src.schemas.pagination import Pagination
 from src.tables import users as users_table
 from src.tables import urls as urls_table
@@ -7,20 +7,123 @@ from fastapi.responses import Response
 from fastapi.exceptions import HTTPException
 from fastapi import status, Request 
 from asyncpg import Connection
+from src.constants import Constants
+from src.globals import Globals
 from src import util
+from src import versioning
+from typing import Optional
+import redis.asyncio as redis
+import hashlib
+
+
+def _user_urls_count_key(user_id: str) -> str:
+    return f"user_urls_count:{user_id}"
+
+
+async def get_user_urls_count(user_id: str, conn: Connection) -> int:
+    key = _user_urls_count_key(user_id)
+    try:
+        cached = await Globals.redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+    except redis.RedisError as e:
+        print(f"[USER URLS COUNT ERROR]: {e}")
+        return await urls_table.count_user_urls(user_id, conn)
+
+    total: int = await urls_table.count_user_urls(user_id, conn)
+    try:
+        await Globals.redis_client.setex(key, Constants.USER_URLS_COUNT_TTL, total)
+    except redis.RedisError as e:
+        print(f"[USER URLS COUNT ERROR]: {e}")
+    return total
+
+
+async def invalidate_user_urls_count(*user_ids: str) -> None:
+    if not user_ids:
+        return
+    try:
+        await Globals.redis_client.delete(*[_user_urls_count_key(str(user_id)) for user_id in user_ids])
+    except redis.RedisError as e:
+        print(f"[USER URLS COUNT ERROR]: {e}")
+
+
+async def user_urls_removed(*user_ids: str) -> None:
+    # Listagens dos donos mudaram: total em cache + versão (ETag e cache_user_read)
+    await invalidate_user_urls_count(*user_ids)
+    await versioning.bump_users(versioning.USER_URLS, *user_ids)
 
 
 async def delete_user_url(user: User, url: URLDelete, conn: Connection):
-    await users_table.delete_user_url(user.id, url.id, conn)
+    deleted = await users_table.delete_user_url(user.id, url.id, conn)
+    if deleted is not None:
+        short_code: str = deleted["short_code"]
+        await Globals.near_cache.delete(f"{Constants.REDIRECT_CACHE_PREFIX}{short_code}")
+        await versioning.bump_url_stats(short_code)
+        await user_urls_removed(*deleted["user_ids"])
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-async def get_user_urls(user_id: str, request: Request, limit: int, offset: int, conn: Connection) -> Pagination[UserURLResponse]:
-    return await urls_table.get_user_urls(user_id, limit, offset, util.extract_base_url(request), conn)
+async def get_user_urls(
+    user_id: str,
+    request: Request,
+    limit: int,
+    offset: int,
+    conn: Connection,
+    cursor: Optional[str] = None
+) -> Pagination[UserURLResponse]:
+    base_url: str = util.extract_base_url(request)
+
+    async def load() -> Pagination[UserURLResponse]:
+        total: int = await get_user_urls_count(user_id, conn)
+        return await urls_table.get_user_urls(user_id, limit, offset, base_url, total, conn, cursor)
+
+    return await versioning.cached_user_read(
+        user_id,
+        (versioning.USER_URLS,),
+        "user_urls",
+        (base_url, limit, offset, cursor),
+        Pagination[UserURLResponse],
+        load
+    )
+
+
+async def search_user_urls(
+    user_id: str,
+    q: str,
+    request: Request,
+    limit: int,
+    conn: Connection
+) -> UserURLSearch:
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty search query.")
+
+    base_url: str = util.extract_base_url(request)
+    cache_key = f"url_search:{user_id}:{limit}:{hashlib.sha256(f'{base_url}|{q.lower()}'.encode()).hexdigest()}"
+    try:
+        cached = await Globals.redis_client.get(cache_key)
+        if cached is not None:
+            result = UserURLSearch.model_validate_json(cached)
+            result.cached = True
+            return result
+    except redis.RedisError as e:
+        print(f"[URL SEARCH CACHE ERROR]: {e}")
+
+    async with conn.transaction():
+        await conn.execute(f"SET LOCAL pg_trgm.word_similarity_threshold = {Constants.USER_URL_SEARCH_MIN_SIMILARITY}")
+        results = await urls_table.search_user_urls(user_id, q, limit, base_url, conn)
+    result = UserURLSearch(q=q, results=results)
+
+    try:
+        await Globals.redis_client.setex(cache_key, Constants.USER_URL_SEARCH_CACHE_TTL, result.model_dump_json())
+    except redis.RedisError as e:
+        print(f"[URL SEARCH CACHE ERROR]: {e}")
+    return result
 
 
 async def set_user_favorite_url(user: User, url: CreateFavoriteURL, conn: Connection):        
     if not await urls_table.user_url_exists(user.id, url.url_id, conn):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="This URL was not found or does not belong to you.")
     await users_table.set_user_favorite_url(user.id, url.url_id, url.is_favorite, conn)    
+    await versioning.bump_user(user.id, versioning.USER_URLS)
     return Response(status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,150 @@
+from src.schemas.analytics import AnalyticsQuery, AnalyticsRow
+from asyncpg import Connection
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+
+# dimensão -> (coluna no cubo, expressão de saída, join com a tabela de lookup)
+DIMENSIONS: dict[str, tuple[str, str, str]] = {
+    "day": ("day", "agg.day", ""),
+    "url_id": ("url_id", "agg.url_id", ""),
+    "country": ("country_code", "NULLIF(agg.country_code, '--')", ""),
+    "device": ("device_type_id", "dt.name", "LEFT JOIN analytics_device_types dt ON dt.id = agg.device_type_id"),
+    "browser": ("browser_id", "b.name", "LEFT JOIN analytics_browsers b ON b.id = agg.browser_id"),
+    "os": ("os_id", "o.name", "LEFT JOIN analytics_os o ON o.id = agg.os_id")
+}
+
+
+async def query_daily_clicks(
+    query: AnalyticsQuery,
+    start_date: date,
+    end_date: date,
+    conn: Connection
+) -> List[AnalyticsRow]:
+    filters = ["d.day >= $1", "d.day <= $2"]
+    params: list = [start_date, end_date]
+
+    def add_filter(clause: str, value) -> None:
+        params.append(value)
+        filters.append(clause.format(f"${len(params)}"))
+
+    if query.url_ids:
+        add_filter("d.url_id = ANY({}::BIGINT[])", query.url_ids)
+    if query.tag_id is not None:
+        add_filter("d.url_id IN (SELECT url_id FROM url_tag_relations WHERE tag_id = {})", query.tag_id)
+    if query.user_id is not None:
+        add_filter("d.url_id IN (SELECT url_id FROM user_urls WHERE user_id = {})", query.user_id)
+    if query.country:
+        add_filter("d.country_code = UPPER({})", query.country)
+    if query.device:
+        add_filter("d.device_type_id = (SELECT id FROM analytics_device_types WHERE name = {})", query.device)
+    if query.browser:
+        add_filter("d.browser_id = (SELECT id FROM analytics_browsers WHERE name = {})", query.browser)
+
+    group_by = list(dict.fromkeys(query.group_by))
+    cube_columns = [DIMENSIONS[dim][0] for dim in group_by]
+    output_columns = [f"{DIMENSIONS[dim][1]} AS {dim}" for dim in group_by]
+    joins = [DIMENSIONS[dim][2] for dim in group_by if DIMENSIONS[dim][2]]
+
+    params.append(query.limit)
+    rows = await conn.fetch(
+        f"""
+            SELECT
+                {''.join(f'{col}, ' for col in output_columns)}
+                agg.clicks
+            FROM (
+                SELECT
+                    {''.join(f'd.{col}, ' for col in cube_columns)}
+                    COALESCE(SUM(d.clicks), 0)::BIGINT AS clicks
+                FROM
+                    url_analytics_daily d
+                WHERE
+                    {' AND '.join(filters)}
+                {'GROUP BY ' + ', '.join(f'd.{col}' for col in cube_columns) if cube_columns else ''}
+                ORDER BY
+                    clicks DESC
+                LIMIT
+                    ${len(params)}
+            ) agg
+            {' '.join(joins)}
+            ORDER BY
+                agg.clicks DESC
+        """,
+        *params
+    )
+    return [AnalyticsRow(**dict(row)) for row in rows]
+
+
+async def delete_expired_clicks(default_days: int, batch_size: int, conn: Connection) -> int:
+    # Apaga um lote de cliques brutos fora da janela de retenção.
+    # Retenção efetiva: url -> maior valor entre os donos -> padrão do servidor.
+    # O corte mínimo limita a varredura ao trecho antigo do índice por clicked_at.
+    r = await conn.fetchval(
+        """
+            WITH min_retention AS (
+                SELECT LEAST(
+                    $1::INTEGER,
+                    (SELECT MIN(analytics_retention_days) FROM urls),
+                    (SELECT MIN(analytics_retention_days) FROM users)
+                ) AS days
+            ),
+            expired AS (
+                SELECT
+                    a.id,
+                    a.clicked_at
+                FROM
+                    url_analytics a
+                JOIN
+                    urls u ON u.id = a.url_id
+                LEFT JOIN LATERAL (
+                    SELECT
+                        MAX(COALESCE(us.analytics_retention_days, $1::INTEGER)) AS days
+                    FROM
+                        user_urls uu
+                    JOIN
+                        users us ON us.id = uu.user_id
+                    WHERE
+                        uu.url_id = a.url_id
+                ) owner ON TRUE
+                WHERE
+                    a.clicked_at < NOW() - make_interval(days => (SELECT days FROM min_retention))
+                    AND a.clicked_at < NOW() - make_interval(days => COALESCE(u.analytics_retention_days, owner.days, $1))
+                LIMIT
+                    $2
+            ),
+            deleted AS (
+                DELETE FROM
+                    url_analytics a
+                USING
+                    expired e
+                WHERE
+                    a.id = e.id
+                    AND a.clicked_at = e.clicked_at
+                RETURNING
+                    1
+            )
+            SELECT COUNT(*) FROM deleted
+        """,
+        default_days,
+        batch_size
+    )
+    return r or 0
+
+
+async def set_url_retention(url_id: int, days: Optional[int], conn: Connection) -> bool:
+    r = await conn.fetchval(
+        "UPDATE urls SET analytics_retention_days = $2 WHERE id = $1 RETURNING id",
+        url_id,
+        days
+    )
+    return r is not None
+
+
+async def set_user_retention(user_id: UUID, days: Optional[int], conn: Connection) -> bool:
+    r = await conn.fetchval(
+        "UPDATE users SET analytics_retention_days = $2 WHERE id = $1 RETURNING id",
+        user_id,
+        days
+    )
+    return r is not None
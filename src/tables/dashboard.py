@@ -1,30 +1,125 @@
 from src.schemas.dashboard import Dashboard
 from asyncpg import Connection
-from src.db import db_count
+from datetime import datetime, timezone, timedelta
 import json
 
 
+DAILY_GROWTH_DAYS = 30
+
+
 async def refresh_dashboard(conn: Connection):
-    await conn.execute("SELECT * FROM refresh_dashboard_stats()")
+    await conn.execute("SELECT * FROM refresh_dashboard_global()")
+
+
+async def get_dashboard_counters(conn: Connection) -> dict[str, int]:
+    rows = await conn.fetch("SELECT name, SUM(value)::BIGINT AS value FROM dashboard_counters GROUP BY name")
+    return {r['name']: r['value'] for r in rows}
+
+
+async def get_dashboard_daily_counters(days: int, conn: Connection) -> dict[str, dict]:
+    rows = await conn.fetch(
+        """
+            SELECT
+                name,
+                day,
+                SUM(value)::BIGINT AS value
+            FROM
+                dashboard_daily_counters
+            WHERE
+                day >= (NOW() AT TIME ZONE 'UTC')::date - $1::INTEGER + 1
+            GROUP BY
+                name,
+                day
+        """,
+        days
+    )
+    buckets: dict[str, dict] = {}
+    for r in rows:
+        buckets.setdefault(r['name'], {})[r['day']] = r['value']
+    return buckets
 
 
 async def get_dashboard(conn: Connection) -> Dashboard:
-    total_urls: int = await db_count('urls', conn)
-    row = await conn.fetchrow("SELECT * FROM mv_dashboard;")
+    row = await conn.fetchrow("SELECT * FROM mv_dashboard_global;")
     if not row:
         raise ValueError("No dashboard data found")
-    
+
     data = dict(row)
-    
-    json_fields = [
-        "users", "urls", "clicks", "analytics", "top_urls",
-        "geography", "client_info", "tags", "domains",
-        "daily_growth", "sessions", "conversion",
-    ]
-
-    for field in json_fields:
+    for field in ("top_urls", "geography", "client_info", "tags", "domains", "conversion"):
         value = data.get(field)
         if isinstance(value, str):
             data[field] = json.loads(value)
 
-    return Dashboard(**data, total_urls=total_urls)
\ No newline at end of file
+    counters = await get_dashboard_counters(conn)
+    buckets = await get_dashboard_daily_counters(DAILY_GROWTH_DAYS, conn)
+
+    # Janelas em dias UTC completos; "24h" é o bucket do dia corrente
+    today = datetime.now(timezone.utc).date()
+    days = [today - timedelta(days=i) for i in range(DAILY_GROWTH_DAYS - 1, -1, -1)]
+
+    def last(name: str, n: int) -> int:
+        series = buckets.get(name, {})
+        return sum(series.get(day, 0) for day in days[-n:])
+
+    total_urls = counters.get('urls', 0)
+    total_clicks = counters.get('clicks', 0)
+    total_sessions = counters.get('sessions', 0)
+    revoked_sessions = counters.get('sessions_revoked', 0)
+
+    return Dashboard(
+        total_urls=total_urls,
+        last_updated=data['last_updated'],
+        users={
+            'total': counters.get('users', 0),
+            'new_30d': last('new_users', 30),
+            'new_7d': last('new_users', 7),
+            'active_30d': data['active_users_30d'],
+            'active_7d': data['active_users_7d'],
+            'active_24h': data['active_users_24h']
+        },
+        urls={
+            'total': total_urls,
+            'new_30d': last('new_urls', 30),
+            'new_7d': last('new_urls', 7),
+            'new_24h': last('new_urls', 1),
+            'avg_clicks': round(total_clicks / total_urls, 2) if total_urls else 0,
+            'median_clicks': data['median_clicks']
+        },
+        clicks={
+            'total': total_clicks,
+            'last_30d': last('clicks', 30),
+            'last_7d': last('clicks', 7),
+            'last_24h': last('clicks', 1)
+        },
+        analytics={
+            'total_records': counters.get('analytics_records', 0),
+            'records_30d': last('clicks', 30),
+            'records_7d': last('clicks', 7),
+            'records_24h': last('clicks', 1),
+            'unique_visitors_all_time': data['unique_visitors_all_time'],
+            'unique_visitors_30d': data['unique_visitors_30d'],
+            'countries_reached': data['countries_reached']
+        },
+        top_urls=data['top_urls'],
+        geography=data['geography'],
+        client_info=data['client_info'],
+        tags=data['tags'],
+        domains=data['domains'],
+        daily_growth=[
+            {
+                'date': day,
+                'new_urls': buckets.get('new_urls', {}).get(day, 0),
+                'new_users': buckets.get('new_users', {}).get(day, 0),
+                'clicks': buckets.get('clicks', {}).get(day, 0)
+            }
+            for day in days
+        ],
+        sessions={
+            'total': total_sessions,
+            'active': total_sessions - revoked_sessions,
+            'revoked': revoked_sessions,
+            'users_with_sessions': data['users_with_active_sessions'],
+            'avg_duration_hours': data['avg_session_duration_hours']
+        },
+        conversion=data['conversion']
+    )
@@ -0,0 +1,72 @@
+from src.globals import Globals
+from asyncpg import Connection
+from typing import Optional
+
+
+DIMENSION_TABLES: dict[str, str] = {
+    "user_agent": "analytics_user_agents",
+    "referer": "analytics_referers",
+    "browser": "analytics_browsers",
+    "os": "analytics_os",
+    "device_type": "analytics_device_types"
+}
+
+
+DIMENSION_MAX_LENGTH: dict[str, int] = {
+    "user_agent": 255,
+    "referer": 255,
+    "browser": 50,
+    "os": 50,
+    "device_type": 20
+}
+
+
+async def get_dimension_id(dimension: str, value: Optional[str], conn: Connection) -> Optional[int]:
+    if not value: return None
+    value = value[:DIMENSION_MAX_LENGTH[dimension]]
+
+    dimension_id: Optional[int] = Globals.dimension_cache.get(dimension, value)
+    if dimension_id is not None:
+        return dimension_id
+
+    table = DIMENSION_TABLES[dimension]
+
+    # SELECT antes do INSERT para não consumir a sequence a cada conflito
+    dimension_id = await conn.fetchval(
+        f"""
+        WITH existing AS (
+            SELECT
+                id
+            FROM
+                {table}
+            WHERE
+                name = $1
+        ),
+        ins AS (
+            INSERT INTO {table} (
+                name
+            )
+            SELECT
+                $1
+            WHERE
+                NOT EXISTS (SELECT 1 FROM existing)
+            ON CONFLICT
+                (name)
+            DO NOTHING
+            RETURNING
+                id
+        )
+        SELECT id FROM existing
+        UNION ALL
+        SELECT id FROM ins
+        """,
+        value
+    )
+
+    if dimension_id is None:
+        # Inserido por outra transação concorrente
+        dimension_id = await conn.fetchval(f"SELECT id FROM {table} WHERE name = $1", value)
+
+    if dimension_id is not None:
+        Globals.dimension_cache.set(dimension, value, dimension_id)
+    return dimension_id
@@ -1,7 +1,9 @@
 from src.schemas.domain import Domain, DomainCreate, DomainUpdate
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
 from asyncpg import Connection
-from typing import Optional
+from typing import Optional, List
+from uuid import UUID
 from src import util
 
 async def get_domain_by_id(id: int, conn: Connection) -> Optional[Domain]:
@@ -154,13 +156,26 @@ async def upsert_domain(domain_id: int, is_secure: bool, conn: Connection):
         domain_id
     )
 
-async def delete_domain_by_id(domain_id, conn: Connection):
-    await conn.execute(
+async def delete_domain_by_id(domain_id, conn: Connection) -> List[UUID]:
+    # Retorna os donos das urls que caem em cascata
+    return await conn.fetchval(
         """
-            DELETE FROM 
-                domains
-            WHERE
-                id = $1
+            WITH owners AS (
+                SELECT DISTINCT
+                    uu.user_id
+                FROM
+                    user_urls uu
+                JOIN
+                    urls u ON u.id = uu.url_id
+                WHERE
+                    u.domain_id = $1
+            ), deleted AS (
+                DELETE FROM 
+                    domains
+                WHERE
+                    id = $1
+            )
+            SELECT ARRAY(SELECT user_id FROM owners)
         """,
         domain_id
     )
@@ -171,7 +186,9 @@ async def get_domains(
     is_secure: Optional[bool],
     limit: int,
     offset: int,
-    conn: Connection
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
 ) -> Pagination[Domain]:
     filters = []
     params = []
@@ -189,16 +206,15 @@ async def get_domains(
 
     where_clause = f"WHERE {' AND '.join(filters)}" if filters else ""
 
-    total = await conn.fetchval(
-        f"""
-            SELECT 
-                COUNT(*) 
-            FROM 
-                domains
-            {where_clause}
-        """,
-        *params
-    )
+    total, total_is_estimate = await db_total("domains", count_mode, conn, where_clause, *params)
+
+    # Keyset por id DESC: com cursor o offset é ignorado
+    if cursor:
+        (before_id,) = util.decode_cursor(cursor, int)
+        filters.append(f"id < ${param_index}")
+        params.append(before_id)
+        param_index += 1
+        where_clause = f"WHERE {' AND '.join(filters)}"
 
     rows = await conn.fetch(
         f"""
@@ -218,15 +234,18 @@ async def get_domains(
                 ${param_index + 1}
         """,
         *params, 
-        limit, 
-        offset
+        limit + 1, 
+        0 if cursor else offset
     )
 
-    return Pagination(
-        total=total,
+    return Pagination.build(
+        [Domain(**dict(r)) for r in rows],
         limit=limit,
         offset=offset,
-        results=[Domain(**dict(r)) for r in rows]
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "id")
     )
 
 async def update_domain(domain: DomainUpdate, conn: Connection) -> None:
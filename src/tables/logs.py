@@ -1,4 +1,6 @@
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
+from src import util
 from src.schemas.log import Log, LogStats, LogLevelStat, LogStatusStat, LogMethodStat, LogDailyStat, LogHourlyStat, LogErrorEndpoint, RateLimitViolation, DeletedLogs
 from asyncpg import Connection
 from typing import Literal, Optional
@@ -87,9 +89,21 @@ async def create_log(
 async def get_logs(
     limit: int,
     offset: int,
-    conn: Connection
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
 ) -> Pagination[Log]:
-    total: int = await conn.fetchval("SELECT COUNT(*) AS total FROM logs")
+    total, total_is_estimate = await db_total("logs", count_mode, conn)
+
+    # Keyset por (created_at, id) DESC: com cursor o offset é ignorado
+    params: list = [limit + 1]
+    where_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, util.parse_datetime, int))
+        where_clause = "WHERE (created_at, id) < ($2, $3)"
+    else:
+        params.append(offset)
+
     rows = await conn.fetch(
         f"""
             SELECT 
@@ -105,19 +119,23 @@ async def get_logs(
                 created_at
             FROM 
                 logs
+            {where_clause}
             ORDER BY 
-                created_at DESC
+                created_at DESC,
+                id DESC
             LIMIT $1
-            OFFSET $2
+            {'' if cursor else 'OFFSET $2'}
         """,
-        limit,
-        offset
+        *params
     )
-    return Pagination(
-        total=total,
+    return Pagination.build(
+        [Log(**dict(i)) for i in rows],
         limit=limit,
         offset=offset,
-        results=[Log(**dict(i)) for i in rows]
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "created_at", "id")
     )    
 
 
@@ -1,7 +1,8 @@
 from src.schemas.urls import UrlTagCreate, UrlTag, URLResponse, UrlTagUpdate
 from src.schemas.user import User
-from src.schemas.pagination import Pagination
-from typing import Optional
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
+from typing import Optional, List
 from asyncpg import Connection
 from src import util
 
@@ -54,6 +55,39 @@ async def get_tag_by_id(tag_id: int, conn: Connection) -> Optional[UrlTag]:
     return UrlTag(**dict(row)) if row else None
 
 
+async def get_tags_for_urls(url_ids: List[int], conn: Connection) -> dict[int, List[UrlTag]]:
+    tags: dict[int, List[UrlTag]] = {url_id: [] for url_id in url_ids}
+    if not url_ids:
+        return tags
+
+    rows = await conn.fetch(
+        """
+            SELECT
+                utr.url_id,
+                url_tags.id,
+                url_tags.name,
+                url_tags.descr,
+                url_tags.color,
+                url_tags.user_id,
+                url_tags.created_at
+            FROM
+                url_tag_relations utr
+            JOIN
+                url_tags ON url_tags.id = utr.tag_id
+            WHERE
+                utr.url_id = ANY($1::BIGINT[])
+            ORDER BY
+                utr.url_id, url_tags.name
+        """,
+        url_ids
+    )
+
+    for row in rows:
+        row = dict(row)
+        tags[row.pop("url_id")].append(UrlTag(**row))
+    return tags
+
+
 async def update_tag(user: User, tag: UrlTagUpdate, conn: Connection) -> UrlTag:
     old_tag: Optional[UrlTag] = await get_tag_by_id(tag.id, conn)
     if not old_tag: return
@@ -83,13 +117,28 @@ async def update_tag(user: User, tag: UrlTagUpdate, conn: Connection) -> UrlTag:
     return old_tag
 
 
-async def get_user_tags(user: User, limit: int, offset: int, conn: Connection) -> Pagination[UrlTag]:
-    total: int = await conn.fetchval(
-        "SELECT COUNT(*) AS total FROM url_tags WHERE user_id = $1",
-        user.id
-    )
+async def get_user_tags(
+    user: User,
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[UrlTag]:
+    # Listagem filtrada por usuário: "estimated" cai na contagem exata
+    total, total_is_estimate = await db_total("url_tags", count_mode, conn, "WHERE user_id = $1", user.id)
+
+    # Keyset por id: com cursor o offset é ignorado
+    params: list = [user.id, limit + 1]
+    cursor_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, int))
+        cursor_clause = "AND id > $3"
+    else:
+        params.append(offset)
+
     rows = await conn.fetch(
-        """
+        f"""
             SELECT
                 id,
                 user_id,
@@ -101,21 +150,76 @@ async def get_user_tags(user: User, limit: int, offset: int, conn: Connection) -
                 url_tags
             WHERE
                 user_id = $1
+                {cursor_clause}
+            ORDER BY
+                id
             LIMIT
                 $2
-            OFFSET
-                $3
+            {'' if cursor else 'OFFSET $3'}
         """,
-        user.id,
-        limit,
-        offset
+        *params
     )
-    return Pagination(
-        total=total,
+    return Pagination.build(
+        [UrlTag(**dict(row)) for row in rows],
         limit=limit,
         offset=offset,
-        results=[UrlTag(**dict(row)) for row in rows]
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "id")
+    )
+
+
+async def get_all_user_tags(user_id: str, conn: Connection) -> List[UrlTag]:
+    rows = await conn.fetch(
+        """
+            SELECT
+                id,
+                user_id,
+                name,
+                color,
+                descr,
+                created_at
+            FROM
+                url_tags
+            WHERE
+                user_id = $1
+            ORDER BY
+                name
+        """,
+        user_id
+    )
+    return [UrlTag(**dict(row)) for row in rows]
+
+
+async def search_user_tags(user_id: str, q: str, limit: int, conn: Connection) -> List[UrlTag]:
+    # Busca aproximada via idx_url_tags_name_trgm
+    rows = await conn.fetch(
+        """
+            SELECT
+                id,
+                user_id,
+                name,
+                color,
+                descr,
+                created_at
+            FROM
+                url_tags
+            WHERE
+                user_id = $1
+                AND (name % $2 OR name ILIKE $3)
+            ORDER BY
+                similarity(name, $2) DESC,
+                name
+            LIMIT
+                $4
+        """,
+        user_id,
+        q,
+        f"%{util.escape_like(q)}%",
+        limit
     )
+    return [UrlTag(**dict(row)) for row in rows]
 
 
 async def get_tag_urls(
@@ -123,7 +227,8 @@ async def get_tag_urls(
     tag_id: int,
     limit: int,
     offset: int,
-    conn: Connection
+    conn: Connection,
+    cursor: Optional[str] = None
 ) -> Pagination[URLResponse]:
     total = await conn.fetchval(
         """
@@ -139,8 +244,18 @@ async def get_tag_urls(
         tag_id
     )
 
+    # Keyset por url_id: com cursor o offset é ignorado
+    params: list = [tag_id, limit + 1]
+    cursor_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, int))
+        cursor_clause = "AND utr.url_id > $3"
+    else:
+        params.append(offset)
+
+    # Seleciona a página primeiro; o dono vem de um LATERAL por url (idx_user_urls_url_id_id)
     rows = await conn.fetch(
-        """
+        f"""
         SELECT
             u.id,
             u.domain_id,
@@ -152,37 +267,47 @@ async def get_tag_urls(
             u.clicks,
             COALESCE(uu.is_favorite, FALSE) AS is_favorite,
             u.created_at
-        FROM 
-            urls u
+        FROM (
+            SELECT 
+                utr.url_id
+            FROM 
+                url_tag_relations utr
+            WHERE
+                utr.tag_id = $1
+                {cursor_clause}
+            ORDER BY 
+                utr.url_id
+            LIMIT
+                $2
+            {'' if cursor else 'OFFSET $3'}
+        ) page
         JOIN
-            url_tag_relations utr ON utr.url_id = u.id
-        LEFT JOIN (
-            SELECT DISTINCT ON (url_id) *
+            urls u ON u.id = page.url_id
+        LEFT JOIN LATERAL (
+            SELECT 
+                user_id, 
+                is_favorite
             FROM 
                 user_urls
+            WHERE 
+                url_id = u.id
             ORDER BY 
-                url_id, 
                 id DESC
-        ) uu ON uu.url_id = u.id
-        WHERE
-            utr.tag_id = $1
+            LIMIT 1
+        ) uu ON TRUE
         ORDER BY 
             u.id
-        LIMIT
-            $2
-        OFFSET
-            $3
         """,
-        tag_id,
-        limit,
-        offset
+        *params
     )
 
-    return Pagination[URLResponse](
-        total=total,
+    return Pagination[URLResponse].build(
+        [URLResponse(**dict(row), short_url=f"{base_url}/api/v1/{row['short_code']}") for row in rows],
         limit=limit,
         offset=offset,
-        results=[URLResponse(**dict(row), short_url=f"{base_url}/api/v1/{row['short_code']}") for row in rows],
+        cursor=cursor,
+        total=total,
+        next_cursor=util.next_cursor(rows, limit, "id")
     )
 
 
@@ -277,6 +402,89 @@ async def delete_tag_relation(url_id: int, tag_id: int, conn: Connection):
     )
 
 
+# Valida a posse de todas as urls e tags em um único statement; se alguma falhar nada é gravado.
+# Retorna (ok, afetadas).
+_BULK_OWNED_CTES = """
+    requested_urls AS (
+        SELECT DISTINCT unnest($2::BIGINT[]) AS url_id
+    ),
+    requested_tags AS (
+        SELECT DISTINCT unnest($3::BIGINT[]) AS tag_id
+    ),
+    owned_urls AS (
+        SELECT r.url_id FROM requested_urls r
+        JOIN user_urls uu ON uu.url_id = r.url_id AND uu.user_id = $1
+    ),
+    owned_tags AS (
+        SELECT r.tag_id FROM requested_tags r
+        JOIN url_tags t ON t.id = r.tag_id AND t.user_id = $1
+    ),
+    validation AS (
+        SELECT
+            (SELECT COUNT(*) FROM owned_urls) = (SELECT COUNT(*) FROM requested_urls)
+            AND (SELECT COUNT(*) FROM owned_tags) = (SELECT COUNT(*) FROM requested_tags) AS ok
+    )
+"""
+
+
+async def create_tag_relations(user_id: str, url_ids: List[int], tag_ids: List[int], conn: Connection) -> tuple[bool, int]:
+    row = await conn.fetchrow(
+        f"""
+            WITH {_BULK_OWNED_CTES},
+            inserted AS (
+                INSERT INTO url_tag_relations (
+                    url_id,
+                    tag_id
+                )
+                SELECT
+                    owned_urls.url_id,
+                    owned_tags.tag_id
+                FROM
+                    owned_urls
+                CROSS JOIN
+                    owned_tags
+                WHERE
+                    (SELECT ok FROM validation)
+                ON CONFLICT
+                    (url_id, tag_id)
+                DO NOTHING
+                RETURNING 1
+            )
+            SELECT
+                (SELECT ok FROM validation) AS ok,
+                (SELECT COUNT(*) FROM inserted) AS affected
+        """,
+        user_id,
+        url_ids,
+        tag_ids
+    )
+    return row["ok"], row["affected"]
+
+
+async def delete_tag_relations(user_id: str, url_ids: List[int], tag_ids: List[int], conn: Connection) -> tuple[bool, int]:
+    row = await conn.fetchrow(
+        f"""
+            WITH {_BULK_OWNED_CTES},
+            deleted AS (
+                DELETE FROM
+                    url_tag_relations
+                WHERE
+                    url_id IN (SELECT url_id FROM owned_urls)
+                    AND tag_id IN (SELECT tag_id FROM owned_tags)
+                    AND (SELECT ok FROM validation)
+                RETURNING 1
+            )
+            SELECT
+                (SELECT ok FROM validation) AS ok,
+                (SELECT COUNT(*) FROM deleted) AS affected
+        """,
+        user_id,
+        url_ids,
+        tag_ids
+    )
+    return row["ok"], row["affected"]
+
+
 async def user_has_access_to_tag(user_id: str, tag_id: int, conn: Connection) -> bool:
     r = await conn.fetchval(
         "SELECT id FROM url_tags WHERE user_id = $1 AND id = $2",
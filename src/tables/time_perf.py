@@ -1,5 +1,7 @@
 from src.schemas.time_perf import TimePerfCreate, TimePerfResponse, TimePerfStats, TimePerfGroupedStats
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
+from src import util
 from typing import List, Optional
 from asyncpg import Connection
 
@@ -23,14 +25,28 @@ async def create_time_perf(time_perf: TimePerfCreate, conn: Connection):
     )
 
 
-async def get_time_perf(limit: int, offset: int, conn: Connection) -> Pagination[TimePerfCreate]:
-    total: int = await conn.fetchval("SELECT COUNT(*) AS total FROM time_perf")
-    rows = await conn.fetch("SELECT * FROM time_perf LIMIT $1 OFFSET $2", limit, offset)
-    return Pagination(
-        total=total,
-        offset=offset,
+async def get_time_perf(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[TimePerfCreate]:
+    total, total_is_estimate = await db_total("time_perf", count_mode, conn)
+    # Keyset por id DESC: com cursor o offset é ignorado
+    if cursor:
+        (before_id,) = util.decode_cursor(cursor, int)
+        rows = await conn.fetch("SELECT * FROM time_perf WHERE id < $2 ORDER BY id DESC LIMIT $1", limit + 1, before_id)
+    else:
+        rows = await conn.fetch("SELECT * FROM time_perf ORDER BY id DESC LIMIT $1 OFFSET $2", limit + 1, offset)
+    return Pagination.build(
+        [TimePerfResponse(**dict(row)) for row in rows],
         limit=limit,
-        results=[TimePerfResponse(**dict(row)) for row in rows]
+        offset=offset,
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "id")
     )
 
 
@@ -1,14 +1,17 @@
 from src.schemas.user import User
-from src.schemas.urls import URLCreate, UrlRedirect, URLResponse, UrlStats, UserURLResponse
-from src.schemas.pagination import Pagination
+from src.schemas.urls import URLCreate, UrlRedirect, URLResponse, UrlStats, UserURLResponse, UserURLSearchResult, EnrichedClick
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
+from src import util
 from src.schemas.domain import Domain
+from src.tables import dimensions as dimensions_table
+from src.tables import tag as tag_table
 from fastapi.exceptions import HTTPException
-from fastapi import status, Request
-from typing import Optional
-from user_agents import parse
-from src.globals import Globals
+from fastapi import status
+from typing import Optional, List, Set
 from src.constants import Constants
 from asyncpg import Connection
+from uuid import UUID
 import asyncpg
 import json
 
@@ -51,9 +54,23 @@ async def get_redirect_url(short_code: str, conn: Connection) -> Optional[UrlRed
         """
             SELECT
                 urls.id,
-                urls.original_url                
+                urls.short_code,
+                urls.original_url,
+                uu.user_id
             FROM
                 urls
+            LEFT JOIN LATERAL (
+                SELECT
+                    user_id
+                FROM
+                    user_urls
+                WHERE
+                    url_id = urls.id
+                ORDER BY
+                    id DESC
+                LIMIT
+                    1
+            ) uu ON TRUE
             WHERE
                 short_code = TRIM($1)
         """,
@@ -93,10 +110,29 @@ async def get_url_id(short_code: str, conn: Connection) -> Optional[int]:
 
 
 
-async def get_urls(base_url: str, limit: int, offset: int, conn: Connection) -> Pagination[URLResponse]:
-    total: int = await conn.fetchval("SELECT COUNT(*) FROM urls")    
+async def get_urls(
+    base_url: str,
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[URLResponse]:
+    total, total_is_estimate = await db_total("urls", count_mode, conn)
+
+    # Keyset por u.id: com cursor o offset é ignorado
+    params: list = [limit + 1]
+    where_clause = ""
+    if cursor:
+        (after_id,) = util.decode_cursor(cursor, int)
+        params.append(after_id)
+        where_clause = "WHERE id > $2"
+    else:
+        params.append(offset)
+
+    # Seleciona a página primeiro; o dono vem de um LATERAL por url (idx_user_urls_url_id_id)
     rows = await conn.fetch(
-        """
+        f"""
         SELECT
             u.id,
             u.title,
@@ -108,38 +144,49 @@ async def get_urls(base_url: str, limit: int, offset: int, conn: Connection) ->
             u.clicks,
             COALESCE(uu.is_favorite, FALSE) AS is_favorite,
             u.created_at            
-        FROM 
-            urls u
-        LEFT JOIN (
-            SELECT DISTINCT ON (url_id) *
+        FROM (
+            SELECT *
+            FROM 
+                urls
+            {where_clause}
+            ORDER BY 
+                id
+            LIMIT
+                $1
+            {'' if cursor else 'OFFSET $2'}
+        ) u
+        LEFT JOIN LATERAL (
+            SELECT 
+                user_id, 
+                is_favorite
             FROM 
                 user_urls
+            WHERE 
+                url_id = u.id
             ORDER BY 
-                url_id, 
                 id DESC
-        ) uu ON uu.url_id = u.id
+            LIMIT 1
+        ) uu ON TRUE
         ORDER BY 
             u.id
-        LIMIT
-            $1
-        OFFSET
-            $2
         """,
-        limit,
-        offset
+        *params
     )
 
-    return Pagination(
-        total=total,
-        limit=limit,
-        offset=offset,
-        results=[
+    return Pagination.build(
+        [
             URLResponse(
                 **dict(row),
                 short_url=f"{base_url}/{row['short_code']}"
             )
             for row in rows
-        ]
+        ],
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "id")
     )
 
 
@@ -219,179 +266,264 @@ async def update_url_clicks(url_id: int, conn: Connection):
     await conn.execute("SELECT increment_url_clicks($1)", url_id)
 
 
+async def count_user_urls(user_id: str, conn: Connection) -> int:
+    # url_id é FK com ON DELETE CASCADE: não precisa do JOIN com urls
+    return await conn.fetchval("SELECT COUNT(*) FROM user_urls WHERE user_id = $1", user_id)
+
+
 async def get_user_urls(
     user_id: str, 
     limit: int, 
     offset: int, 
     base_url: str, 
-    conn: Connection
+    total: int,
+    conn: Connection,
+    cursor: Optional[str] = None
 ) -> Pagination[UserURLResponse]:
-    total: int = await conn.fetchval(
-        """
-            SELECT 
-                COUNT(*) AS total 
-            FROM 
-                user_urls
-            JOIN
-                urls ON urls.id = user_urls.url_id
-            WHERE 
-                user_id = $1
-        """, 
-        user_id
-    )
+    # Keyset por (is_favorite, user_urls.id) DESC: com cursor o offset é ignorado
+    params: list = [user_id, limit + 1]
+    cursor_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, bool, int))
+        cursor_clause = "AND (user_urls.is_favorite, user_urls.id) < ($3, $4)"
+    else:
+        params.append(offset)
 
+    # Primeiro a página (idx_user_urls_user_favorite_id), depois as tags só dessas urls
     rows = await conn.fetch(
-        """
+        f"""
             SELECT
+                user_urls.id AS user_url_id,
                 urls.id,
-                domains.id AS domain_id,
+                urls.domain_id,
                 urls.title,
                 urls.descr,
                 urls.original_url,
                 urls.short_code,
                 urls.clicks,
                 user_urls.is_favorite,
-                urls.created_at,
-                COALESCE(
-                    jsonb_agg(
-                        DISTINCT jsonb_build_object(
-                            'id', url_tags.id,
-                            'name', url_tags.name,
-                            'descr', url_tags.descr,
-                            'color', url_tags.color,
-                            'user_id', url_tags.user_id,
-                            'created_at', url_tags.created_at
-                        )
-                    ) FILTER (WHERE url_tags.id IS NOT NULL),
-                    '[]'::jsonb
-                ) AS tags
+                urls.created_at
             FROM
                 user_urls
             JOIN
                 urls ON urls.id = user_urls.url_id
-            JOIN
-                domains ON domains.id = urls.domain_id
-            LEFT JOIN
-                url_tag_relations utr ON utr.url_id = urls.id
-            LEFT JOIN
-                url_tags ON url_tags.id = utr.tag_id
             WHERE
                 user_urls.user_id = $1
-            GROUP BY
-                urls.id, domains.id, user_urls.is_favorite, user_urls.id
+                {cursor_clause}
             ORDER BY
                 user_urls.is_favorite DESC,
                 user_urls.id DESC
             LIMIT
                 $2
-            OFFSET
-                $3
+            {'' if cursor else 'OFFSET $3'}
         """,
-        user_id,
-        limit,
-        offset
+        *params
     )
 
     rows = [dict(row) for row in rows]
-    for row in rows:        
-        row['tags'] = json.loads(row["tags"])
+    tags = await tag_table.get_tags_for_urls([row["id"] for row in rows[:limit]], conn)
 
-    return Pagination(
-        total=total,
+    return Pagination.build(
+        [
+            UserURLResponse(**row, tags=tags.get(row["id"], []), short_url=f"{base_url}/{row['short_code']}", user_id=user_id)
+            for row in rows
+        ],
         limit=limit,
         offset=offset,
-        results=[
-            UserURLResponse(**row, short_url=f"{base_url}/{row['short_code']}", user_id=user_id) for row in rows
-        ]
+        cursor=cursor,
+        total=total,
+        next_cursor=util.next_cursor(rows, limit, "is_favorite", "user_url_id")
     )
 
 
-async def create_url_analytic(
-    url_id: int,
-    ip_address: str,
-    country_code: Optional[str],
-    city: Optional[str],
-    user_agent: str,
-    referer: str,
-    device_type: str,
-    browser: str,
-    os: str,
+async def search_user_urls(
+    user_id: str,
+    q: str,
+    limit: int,
+    base_url: str,
     conn: Connection
-):
-    if url_id is None: return
-    await conn.execute(
+) -> List[UserURLSearchResult]:
+    # word_similarity (<%) pega termos curtos dentro de títulos/urls longos; ILIKE cobre substrings exatas.
+    # Ambos usam os índices gin_trgm_ops.
+    rows = await conn.fetch(
         """
-            INSERT INTO url_analytics (
-                url_id,
-                ip_address,
-                country_code,
-                city,
-                user_agent,
-                referer,
-                device_type,
-                browser,
-                os
-            )
-            VALUES
-                ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            SELECT
+                user_urls.id AS user_url_id,
+                urls.id,
+                urls.domain_id,
+                urls.title,
+                urls.descr,
+                urls.original_url,
+                urls.short_code,
+                urls.clicks,
+                user_urls.is_favorite,
+                urls.created_at,
+                GREATEST(
+                    word_similarity($2, urls.title),
+                    word_similarity($2, urls.descr),
+                    word_similarity($2, urls.original_url)
+                ) AS score
+            FROM
+                urls
+            JOIN
+                user_urls ON user_urls.url_id = urls.id
+            WHERE
+                user_urls.user_id = $1
+                AND (
+                    $2 <% urls.title
+                    OR $2 <% urls.descr
+                    OR $2 <% urls.original_url
+                    OR urls.title ILIKE $3
+                    OR urls.descr ILIKE $3
+                    OR urls.original_url ILIKE $3
+                )
+            ORDER BY
+                score DESC,
+                user_urls.id DESC
+            LIMIT
+                $4
         """,
-        url_id,
-        ip_address,
-        country_code,
-        city,
-        user_agent,
-        referer,
-        device_type,
-        browser,
-        os
+        user_id,
+        q,
+        f"%{util.escape_like(q)}%",
+        limit
     )
 
-
-async def add_click_event(url_id: int, request: Request, conn: Connection):
-    user_agent_string = request.headers.get("user-agent", "")
-    user_agent = parse(user_agent_string)
-    
-    ip_address = request.client.host
-    
-    # GEO
-    country_code = None
-    city = None
-    if ip_address:
-        try:
-            response = Globals.geoip_reader.get_all(ip_address)
-            country_code = response.country_short if response.country_short and response.country_short.strip() != '-' else None
-        except Exception as e:
-            print(e)
-            pass
-    
-    if user_agent.is_mobile:
-        device_type = 'mobile'
-    elif user_agent.is_tablet:
-        device_type = 'tablet'
-    elif user_agent.is_pc:
-        device_type = 'desktop'
-    elif user_agent.is_bot:
-        device_type = 'bot'
-    else:
-        device_type = 'unknown'
-
-    await conn.execute("SELECT increment_url_clicks($1)", url_id)
-    await create_url_analytic(
-        url_id,
-        ip_address,
-        country_code,
-        city,
-        user_agent_string[:255] if user_agent_string else None,
-        request.headers.get("referer"),
-        device_type,
-        user_agent.browser.family,
-        user_agent.os.family,
-        conn
+    rows = [dict(row) for row in rows]
+    tags = await tag_table.get_tags_for_urls([row["id"] for row in rows], conn)
+    return [
+        UserURLSearchResult(**row, tags=tags.get(row["id"], []), short_url=f"{base_url}/{row['short_code']}", user_id=user_id)
+        for row in rows
+    ]
+
+
+async def create_click_events(clicks: List[EnrichedClick], conn: Connection) -> Set[str]:
+    # Devolve os stream_ids realmente inseridos: reentregas já gravadas ficam de fora
+    if not clicks: return set()
+
+    columns: dict[str, list] = {
+        "url_id": [], "clicked_at": [], "ip_address": [], "country_code": [], "city": [],
+        "device_type_id": [], "browser_id": [], "os_id": [], "user_agent_id": [], "referer_id": [], "stream_id": []
+    }
+    for click in clicks:
+        columns["url_id"].append(click.url_id)
+        columns["clicked_at"].append(click.clicked_at)
+        columns["ip_address"].append(click.ip_address)
+        columns["country_code"].append(click.country_code)
+        columns["city"].append(click.city)
+        columns["device_type_id"].append(await dimensions_table.get_dimension_id("device_type", click.device_type, conn))
+        columns["browser_id"].append(await dimensions_table.get_dimension_id("browser", click.browser, conn))
+        columns["os_id"].append(await dimensions_table.get_dimension_id("os", click.os, conn))
+        columns["user_agent_id"].append(await dimensions_table.get_dimension_id("user_agent", click.user_agent, conn))
+        columns["referer_id"].append(await dimensions_table.get_dimension_id("referer", click.referer, conn))
+        columns["stream_id"].append(click.stream_id)
+
+    # Um único INSERT por lote: o trigger de rollup roda uma vez por statement e só vê as linhas inseridas.
+    # urls.clicks soma apenas o que o INSERT devolveu, no mesmo statement
+    rows = await conn.fetch(
+        """
+            WITH inserted AS (
+                INSERT INTO url_analytics (
+                    url_id,
+                    clicked_at,
+                    ip_address,
+                    country_code,
+                    city,
+                    device_type_id,
+                    browser_id,
+                    os_id,
+                    user_agent_id,
+                    referer_id,
+                    stream_id
+                )
+                SELECT
+                    c.url_id,
+                    c.clicked_at,
+                    c.ip_address,
+                    c.country_code,
+                    c.city,
+                    c.device_type_id,
+                    c.browser_id,
+                    c.os_id,
+                    c.user_agent_id,
+                    c.referer_id,
+                    c.stream_id
+                FROM
+                    unnest(
+                        $1::BIGINT[], 
+                        $2::TIMESTAMPTZ[], 
+                        $3::INET[], 
+                        $4::TEXT[], 
+                        $5::TEXT[], 
+                        $6::SMALLINT[], 
+                        $7::SMALLINT[], 
+                        $8::SMALLINT[], 
+                        $9::INTEGER[], 
+                        $10::INTEGER[],
+                        $11::TEXT[]
+                    ) AS c(
+                        url_id, 
+                        clicked_at, 
+                        ip_address, 
+                        country_code, 
+                        city, 
+                        device_type_id, 
+                        browser_id, 
+                        os_id, 
+                        user_agent_id, 
+                        referer_id,
+                        stream_id
+                    )
+                WHERE
+                    EXISTS (SELECT 1 FROM urls WHERE urls.id = c.url_id)
+                ON CONFLICT (stream_id) WHERE stream_id IS NOT NULL DO NOTHING
+                RETURNING
+                    url_id,
+                    clicked_at,
+                    stream_id
+            ), updated AS (
+                UPDATE
+                    urls
+                SET
+                    clicks = urls.clicks + c.total,
+                    last_clicked_at = GREATEST(urls.last_clicked_at, c.last_clicked_at)
+                FROM (
+                    SELECT
+                        url_id,
+                        COUNT(*) AS total,
+                        MAX(clicked_at) AS last_clicked_at
+                    FROM
+                        inserted
+                    GROUP BY
+                        url_id
+                ) c
+                WHERE
+                    urls.id = c.url_id
+            )
+            SELECT
+                stream_id
+            FROM
+                inserted
+            WHERE
+                stream_id IS NOT NULL
+        """,
+        *columns.values()
     )
+    return {row["stream_id"] for row in rows}
 
 
-async def delete_all_urls(conn: Connection):
-    await conn.execute("DELETE FROM urls")
+async def delete_all_urls(conn: Connection) -> List[UUID]:
+    # Donos lidos no mesmo snapshot do DELETE (user_urls some em cascata)
+    return await conn.fetchval(
+        """
+            WITH owners AS (
+                SELECT DISTINCT user_id FROM user_urls
+            ), deleted AS (
+                DELETE FROM urls
+            )
+            SELECT ARRAY(SELECT user_id FROM owners)
+        """
+    )
 
 
 async def delete_unsafe_urls(conn: Connection):
@@ -408,38 +540,87 @@ async def delete_unsafe_urls(conn: Connection):
     )
 
 
-async def delete_urls_by_domain(domain: Domain, conn: Connection) -> None:
-    await conn.execute(
+async def delete_urls_by_domain(domain: Domain, conn: Connection) -> asyncpg.Record:
+    return await conn.fetchrow(
         """
-        DELETE FROM
-            urls
-        WHERE
-            domain_id = $1
+        WITH owners AS (
+            SELECT DISTINCT
+                uu.user_id
+            FROM
+                user_urls uu
+            JOIN
+                urls u ON u.id = uu.url_id
+            WHERE
+                u.domain_id = $1
+        ), deleted AS (
+            DELETE FROM
+                urls
+            WHERE
+                domain_id = $1
+            RETURNING
+                short_code
+        )
+        SELECT
+            ARRAY(SELECT short_code FROM deleted) AS short_codes,
+            ARRAY(SELECT user_id FROM owners) AS user_ids
         """,
         domain.id
     )
 
 
 async def get_url_stats(url_id: int, conn: Connection) -> Optional[UrlStats]:
+    # Totais e dimensões vêm do cubo diário (sobrevivem à retenção);
+    # visitantes únicos dependem do IP e cobrem só a janela de cliques brutos
     r = await conn.fetchrow(
         """
-            SELECT 
-                url_id,
-                COUNT(*) AS total_clicks,
-                COUNT(DISTINCT ip_address) AS unique_visitors,
-                MIN(clicked_at) AS first_click,
-                MAX(clicked_at) AS last_click,
-                COUNT(*) FILTER (WHERE DATE(clicked_at) = CURRENT_DATE) AS clicks_today,
-                COALESCE(jsonb_agg(DISTINCT browser), '[]'::jsonb) AS browsers,
-                COALESCE(jsonb_agg(DISTINCT os), '[]'::jsonb) AS operating_systems,
-                COALESCE(jsonb_agg(DISTINCT device_type), '[]'::jsonb) AS device_types,
-                COALESCE(jsonb_agg(DISTINCT country_code), '[]'::jsonb) AS countries
-            FROM 
-                url_analytics
-            WHERE 
-                url_id = $1
-            GROUP BY 
-                url_id;
+            WITH daily AS (
+                SELECT
+                    url_id,
+                    SUM(clicks) AS total_clicks,
+                    MIN(day) AS first_day,
+                    SUM(clicks) FILTER (WHERE day = (NOW() AT TIME ZONE 'UTC')::date) AS clicks_today,
+                    array_agg(DISTINCT browser_id) AS browser_ids,
+                    array_agg(DISTINCT os_id) AS os_ids,
+                    array_agg(DISTINCT device_type_id) AS device_type_ids,
+                    array_agg(DISTINCT country_code) AS country_codes
+                FROM
+                    url_analytics_daily
+                WHERE
+                    url_id = $1
+                GROUP BY
+                    url_id
+            ),
+            raw AS (
+                SELECT
+                    COUNT(DISTINCT ip_address) AS unique_visitors,
+                    MIN(clicked_at) AS first_click,
+                    MAX(clicked_at) AS last_click
+                FROM
+                    url_analytics
+                WHERE
+                    url_id = $1
+            )
+            SELECT
+                d.url_id,
+                d.total_clicks,
+                raw.unique_visitors,
+                CASE
+                    WHEN raw.first_click IS NULL OR (raw.first_click AT TIME ZONE 'UTC')::date > d.first_day
+                        THEN d.first_day::timestamp AT TIME ZONE 'UTC'
+                    ELSE raw.first_click
+                END AS first_click,
+                COALESCE(raw.last_click, u.last_clicked_at) AS last_click,
+                COALESCE(d.clicks_today, 0) AS clicks_today,
+                COALESCE((SELECT jsonb_agg(name) FROM analytics_browsers WHERE id = ANY(d.browser_ids)), '[]'::jsonb) AS browsers,
+                COALESCE((SELECT jsonb_agg(name) FROM analytics_os WHERE id = ANY(d.os_ids)), '[]'::jsonb) AS operating_systems,
+                COALESCE((SELECT jsonb_agg(name) FROM analytics_device_types WHERE id = ANY(d.device_type_ids)), '[]'::jsonb) AS device_types,
+                COALESCE(to_jsonb(array_remove(d.country_codes, '--')), '[]'::jsonb) AS countries
+            FROM
+                daily d
+            CROSS JOIN
+                raw
+            JOIN
+                urls u ON u.id = d.url_id;
         """,
         url_id
     )
@@ -457,5 +638,20 @@ async def get_url_stats(url_id: int, conn: Connection) -> Optional[UrlStats]:
     return UrlStats(**data)
 
 
-async def delete_url(url_id: int, conn: Connection):
-    await conn.execute("DELETE FROM urls WHERE id = $1", url_id)
\ No newline at end of file
+async def delete_url(url_id: int, conn: Connection) -> Optional[asyncpg.Record]:
+    # Donos lidos antes do DELETE (user_urls some em cascata)
+    return await conn.fetchrow(
+        """
+            WITH owners AS (
+                SELECT user_id FROM user_urls WHERE url_id = $1
+            )
+            DELETE FROM 
+                urls 
+            WHERE 
+                id = $1 
+            RETURNING 
+                short_code,
+                ARRAY(SELECT user_id FROM owners) AS user_ids
+        """,
+        url_id
+    )
\ No newline at end of file
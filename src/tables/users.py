@@ -1,8 +1,10 @@
 from src.schemas.user import User, UserLoginData, UserSession, UserCreate
-from src.schemas.pagination import Pagination
+from src.schemas.pagination import Pagination, CountMode
+from src.db import db_total
+from src import util
 from src.schemas.token import Token
 from src.schemas.client_info import ClientInfo
-from asyncpg import Connection
+from asyncpg import Connection, Record
 from uuid import UUID
 from typing import Optional
 
@@ -26,11 +28,26 @@ async def get_user(user_id: str | UUID, conn: Connection) -> Optional[User]:
     return User(**dict(r)) if r else None
 
 
-async def get_users(limit: int, offset: int, conn: Connection) -> Pagination[User]:
-    total: int = await conn.fetchval("SELECT COUNT(*) AS total FROM users")
-    
+async def get_users(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[User]:
+    total, total_is_estimate = await db_total("users", count_mode, conn)
+
+    # Keyset por (created_at, id) DESC: com cursor o offset é ignorado
+    params: list = [limit + 1]
+    where_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, util.parse_datetime, UUID))
+        where_clause = "WHERE (created_at, id) < ($2, $3)"
+    else:
+        params.append(offset)
+
     r = await conn.fetch(
-        """
+        f"""
             SELECT
                 id,
                 email,
@@ -38,20 +55,25 @@ async def get_users(limit: int, offset: int, conn: Connection) -> Pagination[Use
                 created_at
             FROM
                 users
+            {where_clause}
+            ORDER BY
+                created_at DESC,
+                id DESC
             LIMIT 
                 $1
-            OFFSET
-                $2
+            {'' if cursor else 'OFFSET $2'}
         """,
-        limit,
-        offset
+        *params
     )
 
-    return Pagination[User](
-        total=total,
+    return Pagination[User].build(
+        [User(**dict(i)) for i in r],
         limit=limit,
         offset=offset,
-        results=[User(**dict(i)) for i in r]
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(r, limit, "created_at", "id")
     )
 
 
@@ -238,16 +260,27 @@ async def get_user_sessions(
     user_id: str | UUID, 
     limit: int, 
     offset: int,
-    conn: Connection
+    conn: Connection,
+    cursor: Optional[str] = None
 ) -> Pagination[UserSession]:
     total: int = await conn.fetchval(
         "SELECT COUNT(*) AS total FROM user_session_tokens WHERE user_id = $1", 
         user_id
     )
 
+    # Keyset por (issued_at, id) DESC: com cursor o offset é ignorado
+    params: list = [user_id, limit + 1]
+    cursor_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, util.parse_datetime, int))
+        cursor_clause = "AND (issued_at, id) < ($3, $4)"
+    else:
+        params.append(offset)
+
     r = await conn.fetch(
-        """
+        f"""
             SELECT
+                id,
                 user_id,
                 issued_at,
                 expires_at,
@@ -261,33 +294,36 @@ async def get_user_sessions(
                 user_session_tokens
             WHERE
                 user_id = $1
+                {cursor_clause}
             ORDER BY
-                issued_at DESC
+                issued_at DESC,
+                id DESC
             LIMIT
                 $2
-            OFFSET
-                $3
+            {'' if cursor else 'OFFSET $3'}
         """,
-        user_id,
-        limit,
-        offset
+        *params
     )
 
-    return Pagination[UserSession](
-        total=total,
+    return Pagination[UserSession].build(
+        [UserSession(**dict(i)) for i in r],
         limit=limit,
         offset=offset,
-        results=[UserSession(**dict(i)) for i in r]
+        cursor=cursor,
+        total=total,
+        next_cursor=util.next_cursor(r, limit, "issued_at", "id")
     )
 
 
-async def delete_user_session_token(refresh_token: str, conn: Connection):
-    await conn.execute(
+async def delete_user_session_token(refresh_token: str, conn: Connection) -> Optional[UUID]:
+    return await conn.fetchval(
         """
             DELETE FROM 
                 user_session_tokens
             WHERE
                 refresh_token = $1
+            RETURNING
+                user_id
         """,        
         refresh_token
     )
@@ -327,7 +363,7 @@ async def update_user_last_login_at(user_id: str, conn: Connection):
         user_id
     )
 
-async def delete_user_url(user_id: str, url_id: int, conn: Connection):
+async def delete_user_url(user_id: str, url_id: int, conn: Connection) -> Optional[Record]:
     r = await conn.fetchval(
         """
             SELECT
@@ -343,14 +379,21 @@ async def delete_user_url(user_id: str, url_id: int, conn: Connection):
     )
 
     if r is None:
-        return
+        return None
     
-    await conn.execute(
+    # Donos lidos antes do DELETE (user_urls some em cascata)
+    return await conn.fetchrow(
         """
+            WITH owners AS (
+                SELECT user_id FROM user_urls WHERE url_id = $1
+            )
             DELETE FROM
                 urls
             WHERE
                 id = $1
+            RETURNING
+                short_code,
+                ARRAY(SELECT user_id FROM owners) AS user_ids
         """,
         r
     )
@@ -373,11 +416,28 @@ async def set_user_favorite_url(user_id: str, url_id: int, is_favorite: bool, co
     )
 
 
-async def get_sessions(limit: int, offset: int, conn: Connection) -> Pagination[UserSession]:
-    total: int = await conn.fetchval("SELECT COUNT(*) AS total FROM user_session_tokens")
+async def get_sessions(
+    limit: int,
+    offset: int,
+    conn: Connection,
+    count_mode: CountMode = "exact",
+    cursor: Optional[str] = None
+) -> Pagination[UserSession]:
+    total, total_is_estimate = await db_total("user_session_tokens", count_mode, conn)
+
+    # Keyset por (issued_at, id) DESC: com cursor o offset é ignorado
+    params: list = [limit + 1]
+    where_clause = ""
+    if cursor:
+        params.extend(util.decode_cursor(cursor, util.parse_datetime, int))
+        where_clause = "WHERE (issued_at, id) < ($2, $3)"
+    else:
+        params.append(offset)
+
     rows = await conn.fetch(
-        """
+        f"""
             SELECT
+                id,
                 user_id,
                 issued_at,
                 expires_at,
@@ -389,22 +449,25 @@ async def get_sessions(limit: int, offset: int, conn: Connection) -> Pagination[
                 last_used_at
             FROM
                 user_session_tokens
+            {where_clause}
             ORDER BY
-                issued_at DESC
+                issued_at DESC,
+                id DESC
             LIMIT
                 $1
-            OFFSET
-                $2
+            {'' if cursor else 'OFFSET $2'}
         """,
-        limit,
-        offset
+        *params
     )
 
-    return Pagination(
-        total=total,
+    return Pagination.build(
+        [UserSession(**dict(row)) for row in rows],
         limit=limit,
         offset=offset,
-        results=[UserSession(**dict(row)) for row in rows]
+        cursor=cursor,
+        total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=util.next_cursor(rows, limit, "issued_at", "id")
     )
 
 
@@ -2,15 +2,18 @@ from src.perf.system_monitor import get_monitor
 from src.schemas.client_info import ClientInfo
 from src.cache.config import CacheSettings
 from src.globals import Globals
-from fastapi import Request
+from fastapi import Request, status
+from fastapi.exceptions import HTTPException
 from src.constants import Constants
 from pathlib import Path
 from asyncpg import Connection
 from datetime import datetime, timezone
-from typing import Optional, Any
+from typing import Optional, Any, Callable
 from urllib.parse import urlparse
 import redis.asyncio as redis
 import asyncio
+import base64
+import binascii
 import json
 
 
@@ -97,7 +100,7 @@ async def init_redis_cache():
     if CacheSettings.CACHE_DEBUG:
         print(f"[CACHE CONFIG] Default TTL: {CacheSettings.DEFAULT_TTL}s")
         print(f"[CACHE CONFIG] Cache Enabled: {CacheSettings.ENABLE_CACHE}")
-        print(f"[CACHE CONFIG] Route TTLs: {CacheSettings.ROUTE_TTL}")
+        print(f"[CACHE CONFIG] Cacheable routes: {CacheSettings.CACHEABLE_ROUTES}")
         print(f"[CACHE CONFIG] No-cache paths: {len(CacheSettings.NO_CACHE_PATHS)} paths")
     try:
         await Globals.redis_client.ping()
@@ -121,6 +124,52 @@ def extract_domain(url: str) -> str:
     return domain
 
 
+def extract_host(url: Optional[str]) -> Optional[str]:
+    if not url: return None
+    try:
+        host = urlparse(url.strip()).hostname
+    except ValueError:
+        return None
+    return host.lower() if host else None
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def encode_cursor(*values: Any) -> str:
+    """Cursor opaco com os valores da chave de ordenação do último item da página."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+        default=str
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor size mismatch")
+        return tuple(t(v) for t, v in zip(types, values))
+    except (ValueError, TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from e
+
+
+def next_cursor(rows: list, limit: int, *keys: str) -> Optional[str]:
+    """Cursor da próxima página para consultas feitas com LIMIT limit + 1."""
+    if len(rows) <= limit or limit <= 0:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(*(last[key] for key in keys))
+
+
+def parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
 def coalesce(a: Optional[Any], b: Optional[Any]) -> Any:
     if a: return a
     return b
@@ -0,0 +1,174 @@
+from fastapi import Request, Cookie
+from pydantic import BaseModel
+from src.cache.serialized import etag_matches
+from src.constants import Constants
+from src.globals import Globals
+from src import security
+from typing import Optional, Callable, Awaitable, TypeVar, Type
+from datetime import datetime, timezone
+import redis.asyncio as redis
+import hashlib
+import time
+
+
+# Contadores de versão por recurso no Redis (version:<recurso>:<escopo>), incrementados a cada escrita.
+# O ETag sai do contador: um If-None-Match igual é respondido com 304 antes de qualquer query.
+
+USER_URLS = "user_urls"
+USER_TAGS = "user_tags"
+USER_SESSIONS = "user_sessions"
+# Estatísticas públicas por short_code; o escopo ALL cobre exclusões em massa e a retenção
+URL_STATS = "url_stats"
+ALL = "*"
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class NotModified(Exception):
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def version_key(resource: str, scope: str) -> str:
+    return f"version:{resource}:{scope}"
+
+
+async def get_versions(*pairs: tuple[str, str]) -> Optional[list[int]]:
+    """Versões de vários (recurso, escopo) num único round trip."""
+    try:
+        # Contador perdido (flush/eviction) recomeça de um valor novo, nunca de 0:
+        # um ETag antigo não pode voltar a coincidir
+        pipe = Globals.redis_client.pipeline(transaction=False)
+        seed = time.time_ns()
+        for resource, scope in pairs:
+            key = version_key(resource, scope)
+            pipe.set(key, seed, nx=True)
+            pipe.get(key)
+        results = await pipe.execute()
+        return [int(version) for version in results[1::2]]
+    except redis.RedisError as e:
+        print(f"[VERSION ERROR]: {e}")
+        return None
+
+
+async def get_version(resource: str, scope: str) -> Optional[int]:
+    versions = await get_versions((resource, scope))
+    return versions[0] if versions else None
+
+
+async def _incr(keys: list[str]) -> None:
+    if not keys:
+        return
+    try:
+        pipe = Globals.redis_client.pipeline(transaction=False)
+        seed = time.time_ns()
+        for key in keys:
+            # Mesmo seed de get_version: INCR sozinho recriaria a chave em 1
+            pipe.set(key, seed, nx=True)
+            pipe.incr(key)
+        await pipe.execute()
+    except redis.RedisError as e:
+        print(f"[VERSION ERROR]: {e}")
+
+
+async def bump(resource: str, *scopes: str) -> None:
+    await _incr([version_key(resource, str(scope)) for scope in set(scopes)])
+
+
+async def bump_users(resource: str, *user_ids: str) -> None:
+    await _incr([version_key(resource, user_id) for user_id in {str(user_id) for user_id in user_ids}])
+
+
+async def bump_user(user_id: str, *resources: str) -> None:
+    await _incr([version_key(resource, str(user_id)) for resource in resources])
+
+
+async def bump_url_stats(*short_codes: str) -> None:
+    """
+    Avança a versão das estatísticas (ALL = todas as urls) e descarta as respostas cacheadas:
+    o cache de respostas guarda o ETag da versão em que foi calculado.
+    """
+    if not short_codes:
+        return
+    await bump(URL_STATS, *short_codes)
+    if ALL in short_codes:
+        await Globals.cache_service.invalidate_url_stats()
+    else:
+        await Globals.cache_service.invalidate_url_stats(*short_codes)
+
+
+async def cached_user_read(
+    user_id: str,
+    resources: tuple[str, ...],
+    name: str,
+    params: tuple,
+    model: Type[T],
+    loader: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Lê dados do usuário via cache no Redis. A chave leva as versões dos recursos de que a leitura depende:
+    uma escrita só descarta (O(1), sem SCAN) as leituras dos recursos que ela altera.
+    """
+    user_id = str(user_id)
+    versions = await get_versions(*[(resource, user_id) for resource in resources])
+    if versions is None:
+        return await loader()
+
+    digest = hashlib.sha1(repr(params).encode()).hexdigest()[:16]
+    version = ".".join(str(v) for v in versions)
+    key = f"user_cache:{user_id}:{name}:{version}:{digest}"
+    try:
+        cached = await Globals.redis_client.get(key)
+        if cached is not None:
+            return model.model_validate_json(cached)
+    except redis.RedisError as e:
+        print(f"[USER CACHE ERROR]: {e}")
+
+    result: T = await loader()
+    try:
+        # Versões antigas não são apagadas: expiram sozinhas pelo TTL
+        await Globals.redis_client.setex(key, Constants.USER_CACHE_TTL, result.model_dump_json())
+    except redis.RedisError as e:
+        print(f"[USER CACHE ERROR]: {e}")
+    return result
+
+
+def make_etag(resource: str, scope: str, version: int | str) -> str:
+    scope_hash = hashlib.sha1(scope.encode()).hexdigest()[:12]
+    return f'W/"{resource}-{scope_hash}-{version}"'
+
+
+def user_etag(*resources: str) -> Callable:
+    """Dependência para GETs de dados do usuário: responde 304 se o If-None-Match bate com as versões atuais."""
+
+    async def dependency(request: Request, access_token: Optional[str] = Cookie(default=None)) -> None:
+        # Só decodifica o JWT (sem banco); a autenticação completa continua na dependência da rota
+        user_id = security.get_user_id_from_access_token(access_token)
+        if user_id is None:
+            return
+        versions = await get_versions(*[(resource, user_id) for resource in resources])
+        if versions is None:
+            return
+        # A URL (paginação, host) e o corpo (ex.: a tag de /user/tags/relations) também mudam a resposta
+        body = await request.body()
+        scope = f"{user_id}:{request.url}:{hashlib.sha1(body).hexdigest()}"
+        etag = make_etag("+".join(resources), scope, ".".join(str(v) for v in versions))
+        request.state.etag = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise NotModified(etag)
+
+    return dependency
+
+
+async def url_stats_etag(request: Request, short_code: str) -> None:
+    """Dependência de /{short_code}/stats: ETag pelas versões, verificado antes de qualquer query."""
+    versions = await get_versions((URL_STATS, short_code), (URL_STATS, ALL))
+    if versions is None:
+        return
+    # clicks_today muda na virada do dia sem nenhuma escrita
+    today = datetime.now(timezone.utc).strftime("%Y%m%d")
+    etag = make_etag(URL_STATS, short_code, f"{today}.{versions[1]}.{versions[0]}")
+    request.state.etag = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(etag)
@@ -0,0 +1,193 @@
+from src.schemas.urls import RawClick, EnrichedClick
+from src.tables import urls as urls_table
+from src.constants import Constants
+from src.globals import Globals
+from src.db import DATABASE_URL
+from src import enrichment
+from src import versioning
+from asyncpg import create_pool, Pool
+from pydantic import ValidationError
+from typing import List, Tuple
+import redis.asyncio as redis
+import asyncio
+import socket
+import os
+
+
+# Consome o stream de cliques brutos (Constants.CLICK_EVENTS_STREAM) via consumer group,
+# enriquece os eventos em lote (user agent, geo, host do referer) e grava em url_analytics.
+# Execução: python -m src.workers.click_enricher (uma ou mais instâncias)
+
+
+CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+
+async def ensure_consumer_group() -> None:
+    try:
+        await Globals.redis_client.xgroup_create(
+            Constants.CLICK_EVENTS_STREAM,
+            Constants.CLICK_WORKER_GROUP,
+            id="0",
+            mkstream=True
+        )
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def parse_entries(entries: List[Tuple[str, dict]]) -> Tuple[List[str], List[Tuple[str, dict, RawClick]]]:
+    ids, clicks = [], []
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        if not fields:
+            continue
+        try:
+            clicks.append((entry_id, fields, RawClick(**{key: value or None for key, value in fields.items()})))
+        except ValidationError as e:
+            print(f"[CLICK WORKER] Discarding malformed entry {entry_id}: {e}")
+    return ids, clicks
+
+
+async def get_delivery_count(entry_id: str) -> int:
+    pending = await Globals.redis_client.xpending_range(
+        Constants.CLICK_EVENTS_STREAM,
+        Constants.CLICK_WORKER_GROUP,
+        min=entry_id,
+        max=entry_id,
+        count=1
+    )
+    return pending[0]["times_delivered"] if pending else 1
+
+
+async def dead_letter(entry_id: str, fields: dict, error: Exception) -> None:
+    # XADD antes do XACK: na pior das hipóteses a entrada aparece duas vezes, nunca some
+    await Globals.redis_client.xadd(
+        Constants.CLICK_DEAD_LETTER_STREAM,
+        {**fields, "original_id": entry_id, "error": str(error)[:500]},
+        maxlen=Constants.CLICK_DEAD_LETTER_MAXLEN,
+        approximate=True
+    )
+    await Globals.redis_client.xack(Constants.CLICK_EVENTS_STREAM, Constants.CLICK_WORKER_GROUP, entry_id)
+    print(f"[CLICK WORKER] Entry {entry_id} moved to {Constants.CLICK_DEAD_LETTER_STREAM}: {error}")
+
+
+def enrich(entry_id: str, raw_click: RawClick) -> EnrichedClick:
+    click = enrichment.enrich_click(raw_click)
+    # Id da entrada no stream: se o ACK se perder, a reentrega não grava o clique de novo
+    click.stream_id = entry_id
+    return click
+
+
+async def process_one_by_one(clicks: List[Tuple[str, dict, RawClick]], pool: Pool) -> List[EnrichedClick]:
+    # Isola as entradas ruins do lote: as boas são gravadas e recebem ACK na hora
+    stored: List[EnrichedClick] = []
+    for entry_id, fields, raw_click in clicks:
+        try:
+            click: EnrichedClick = enrich(entry_id, raw_click)
+            async with pool.acquire() as conn:
+                inserted = await urls_table.create_click_events([click], conn)
+        except redis.RedisError:
+            raise
+        except Exception as e:
+            if await get_delivery_count(entry_id) >= Constants.CLICK_WORKER_MAX_DELIVERIES:
+                await dead_letter(entry_id, fields, e)
+            else:
+                # Sem ACK: volta via XAUTOCLAIM e conta mais uma entrega
+                print(f"[CLICK WORKER] Entry {entry_id} failed, will retry: {e}")
+            continue
+        await Globals.redis_client.xack(Constants.CLICK_EVENTS_STREAM, Constants.CLICK_WORKER_GROUP, entry_id)
+        if entry_id in inserted:
+            stored.append(click)
+    return stored
+
+
+async def process_entries(entries: List[Tuple[str, dict]], pool: Pool) -> None:
+    if not entries:
+        return
+
+    ids, raw_clicks = parse_entries(entries)
+    try:
+        clicks: List[EnrichedClick] = [enrich(entry_id, click) for entry_id, _, click in raw_clicks]
+        async with pool.acquire() as conn:
+            inserted = await urls_table.create_click_events(clicks, conn)
+        # Versões e eventos ao vivo só para o que foi gravado agora
+        clicks = [click for click in clicks if click.stream_id in inserted]
+    except redis.RedisError:
+        raise
+    except Exception as e:
+        print(f"[CLICK WORKER] Batch of {len(ids)} failed, retrying entries one by one: {e}")
+        clicks = await process_one_by_one(raw_clicks, pool)
+        # Entradas descartadas por malformação também precisam de ACK
+        stored_ids = {entry_id for entry_id, _, _ in raw_clicks}
+        discarded = [entry_id for entry_id in ids if entry_id not in stored_ids]
+        if discarded:
+            await Globals.redis_client.xack(Constants.CLICK_EVENTS_STREAM, Constants.CLICK_WORKER_GROUP, *discarded)
+    else:
+        await Globals.redis_client.xack(Constants.CLICK_EVENTS_STREAM, Constants.CLICK_WORKER_GROUP, *ids)
+
+    if not clicks:
+        return
+
+    # Contagem de cliques mudou na listagem dos donos: invalida os ETags
+    await versioning.bump_users(versioning.USER_URLS, *[str(click.user_id) for click in clicks if click.user_id])
+    await versioning.bump_url_stats(*[click.short_code for click in clicks])
+
+    await Globals.click_broker.publish_many([enrichment.click_event(click) for click in clicks])
+
+
+async def claim_stale_entries(pool: Pool) -> None:
+    # Recupera mensagens de consumidores que morreram sem dar ACK
+    start_id = "0-0"
+    while True:
+        result = await Globals.redis_client.xautoclaim(
+            Constants.CLICK_EVENTS_STREAM,
+            Constants.CLICK_WORKER_GROUP,
+            CONSUMER_NAME,
+            min_idle_time=Constants.CLICK_WORKER_CLAIM_IDLE_MS,
+            start_id=start_id,
+            count=Constants.CLICK_WORKER_BATCH_SIZE
+        )
+        start_id, entries = result[0], result[1]
+        await process_entries(entries, pool)
+        if start_id in ("0-0", b"0-0"):
+            return
+
+
+async def run() -> None:
+    pool: Pool = await create_pool(DATABASE_URL, min_size=1, max_size=4)
+    print(f"[CLICK WORKER STARTED] consumer={CONSUMER_NAME}")
+    try:
+        await ensure_consumer_group()
+        await claim_stale_entries(pool)
+        while True:
+            try:
+                response = await Globals.redis_client.xreadgroup(
+                    Constants.CLICK_WORKER_GROUP,
+                    CONSUMER_NAME,
+                    {Constants.CLICK_EVENTS_STREAM: ">"},
+                    count=Constants.CLICK_WORKER_BATCH_SIZE,
+                    block=Constants.CLICK_WORKER_BLOCK_MS
+                )
+                if not response:
+                    await claim_stale_entries(pool)
+                    continue
+                for _, entries in response:
+                    await process_entries(entries, pool)
+            except redis.RedisError as e:
+                print(f"[CLICK WORKER REDIS ERROR]: {e}")
+                await asyncio.sleep(1)
+            except Exception as e:
+                # Lote sem ACK: será reprocessado via XAUTOCLAIM
+                print(f"[CLICK WORKER ERROR]: {e}")
+                await asyncio.sleep(1)
+    finally:
+        await pool.close()
+        await Globals.redis_client.aclose()
+        print(f"[CLICK WORKER STOPPED] consumer={CONSUMER_NAME}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,11 @@
+import os
+
+
+# Valores mínimos para importar src sem .env (config lê estas variáveis na importação)
+for name, value in {
+    "CACHE_DEFAULT_TTL": "60",
+    "CACHE_CLEANUP_INTERVAL": "60",
+    "MAX_CONCURRENT_CACHE_OPS": "10",
+    "REDIS_URL_DEV": "redis://localhost:6379/0",
+}.items():
+    os.environ.setdefault(name, value)
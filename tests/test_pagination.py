@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+from src.schemas.pagination import Pagination
+
+
+class Item(BaseModel):
+
+    id: int
+
+
+def items(n: int) -> list[Item]:
+    return [Item(id=i) for i in range(n)]
+
+
+def test_estimate_kept_on_empty_page_past_the_end():
+    page = Pagination[Item].build([], limit=10, offset=1000, total=10, total_is_estimate=True)
+    assert page.total == 10
+    assert page.total_is_estimate is True
+    assert page.pages == 1
+    assert page.has_more is False
+
+
+def test_empty_first_page_confirms_zero():
+    page = Pagination[Item].build([], limit=10, offset=0, total=25, total_is_estimate=True)
+    assert page.total == 0
+    assert page.total_is_estimate is False
+
+
+def test_last_page_confirms_total():
+    page = Pagination[Item].build(items(7), limit=10, offset=20, total=50, total_is_estimate=True)
+    assert page.total == 27
+    assert page.total_is_estimate is False
+    assert page.pages == 3
+    assert page.has_more is False
+
+
+def test_estimate_raised_when_more_rows_exist():
+    page = Pagination[Item].build(items(11), limit=10, offset=20, total=5, total_is_estimate=True)
+    assert len(page.results) == 10
+    assert page.total == 31
+    assert page.total_is_estimate is True
+    assert page.has_more is True
+
+
+def test_exact_total_untouched():
+    page = Pagination[Item].build([], limit=10, offset=1000, total=10)
+    assert page.total == 10
+    assert page.total_is_estimate is False
+
+
+def test_cursor_page_keeps_estimate():
+    page = Pagination[Item].build(items(7), limit=10, offset=500, total=10_000, total_is_estimate=True, cursor="abc")
+    assert page.total == 10_000
+    assert page.total_is_estimate is True
+    assert page.offset == 0
+    assert page.page is None
+    assert page.has_more is False
+    assert page.next_cursor is None
@@ -0,0 +1,146 @@
+from src.migrate import db_migrate
+from src.tables import urls as urls_table
+from src.tables import tag as tag_table
+from src import util
+from typing import Iterator
+import asyncpg
+import asyncio
+import pytest
+import json
+import os
+
+
+# Planos de get_urls / get_tag_urls sobre uma base semeada: o dono de cada url vem do
+# LATERAL por idx_user_urls_url_id_id, sem ordenar user_urls inteira.
+# Precisa de um banco descartável com as extensões de db/tables.sql (citext, pg_trgm, btree_gin):
+# TEST_DATABASE_URL=postgresql://... pytest tests/test_query_plans.py
+# A migração roda no próprio teste; a semente é desfeita no fim (rollback).
+
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+
+class Rollback(Exception):
+    pass
+
+
+class ExplainConnection:
+    """Repassa tudo para a conexão real, mas troca fetch() por EXPLAIN e guarda o plano."""
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+        self.plans: list[dict] = []
+
+    async def fetch(self, query: str, *args):
+        plan = await self.conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        self.plans.append(json.loads(plan)[0]["Plan"])
+        return []
+
+    def __getattr__(self, name: str):
+        return getattr(self.conn, name)
+
+
+def nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from nodes(child)
+
+
+def assert_no_user_urls_sort(plan: dict) -> None:
+    for node in nodes(plan):
+        if node["Node Type"] in ("Sort", "Incremental Sort"):
+            relations = {child.get("Relation Name") for child in nodes(node)}
+            assert "user_urls" not in relations, json.dumps(plan, indent=2)
+    assert any(node.get("Index Name") == "idx_user_urls_url_id_id" for node in nodes(plan)), json.dumps(plan, indent=2)
+
+
+async def seed(conn: asyncpg.Connection) -> int:
+    await conn.execute(
+        """
+            INSERT INTO users (email, p_hash)
+            SELECT 'plan' || g || '@example.com', '\\x00'::BYTEA
+            FROM generate_series(1, 200) g
+        """
+    )
+    domain_id = await conn.fetchval(
+        """
+            INSERT INTO domains (url, url_hash)
+            VALUES ('https://plan-test.example.com/', decode(md5('https://plan-test.example.com/'), 'hex'))
+            RETURNING id
+        """
+    )
+    await conn.execute(
+        """
+            INSERT INTO urls (domain_id, original_url, original_url_hash)
+            SELECT $1, 'https://plan-test.example.com/' || g, decode(md5('plan-test-' || g), 'hex')
+            FROM generate_series(1, 20000) g
+        """,
+        domain_id
+    )
+    # Três donos por url
+    await conn.execute(
+        """
+            WITH plan_users AS (
+                SELECT id, row_number() OVER (ORDER BY id) AS rn
+                FROM users
+                WHERE email LIKE 'plan%@example.com'
+            )
+            INSERT INTO user_urls (url_id, user_id)
+            SELECT u.id, pu.id
+            FROM urls u
+            CROSS JOIN generate_series(0, 2) k
+            JOIN plan_users pu ON pu.rn = ((u.id + k) % 200) + 1
+            WHERE u.domain_id = $1
+        """,
+        domain_id
+    )
+    tag_id = await conn.fetchval(
+        """
+            INSERT INTO url_tags (user_id, name)
+            SELECT id, 'plan-test' FROM users WHERE email = 'plan1@example.com'
+            RETURNING id
+        """
+    )
+    await conn.execute(
+        """
+            INSERT INTO url_tag_relations (url_id, tag_id)
+            SELECT id, $2 FROM urls WHERE domain_id = $1 AND id % 4 = 0
+        """,
+        domain_id,
+        tag_id
+    )
+    await conn.execute("ANALYZE urls, user_urls, url_tag_relations")
+    return tag_id
+
+
+async def collect_plans() -> list[dict]:
+    conn: asyncpg.Connection = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await db_migrate(conn)
+        explain = ExplainConnection(conn)
+        try:
+            async with conn.transaction():
+                tag_id = await seed(conn)
+                first_id = await conn.fetchval("SELECT MIN(id) FROM urls")
+                cursor = util.encode_cursor(first_id + 5000)
+
+                await urls_table.get_urls("http://test", 64, 0, explain, "has_more")
+                await urls_table.get_urls("http://test", 64, 10000, explain, "has_more")
+                await urls_table.get_urls("http://test", 64, 0, explain, "has_more", cursor)
+                await tag_table.get_tag_urls("http://test", tag_id, 64, 0, explain)
+                await tag_table.get_tag_urls("http://test", tag_id, 64, 0, explain, cursor)
+                raise Rollback()
+        except Rollback:
+            pass
+        return explain.plans
+    finally:
+        await conn.close()
+
+
+def test_listing_plans_use_lateral_owner_index():
+    plans = asyncio.run(collect_plans())
+    assert len(plans) == 5
+    for plan in plans:
+        assert_no_user_urls_sort(plan)